@@ -0,0 +1,292 @@
+# analysis/batch_reprocess.py
+"""
+Batch reprocessing of recorded test runs.
+
+Scans a directory for the CSV files written by test_torque_linearity.py
+and test_saturation_and_power.py, analyzes every run in a process pool
+and writes one fleet report row per run:
+
+    torque_linearity_*.csv    linear fit of acceleration vs. torque, the
+                              torque-to-acceleration gain over the steps
+                              that moved, implied inertia and deadband
+    saturation_power_*.csv    time to target speed, peak speed, and
+                              mean/peak power, energy and peak current
+                              per phase
+
+Parsed CSVs are cached as .npz files named by their SHA-1. An index
+keyed by path remembers each file's mtime and size, so unchanged files
+are neither hashed nor parsed again. Re-running a fleet report only
+touches new or changed files.
+
+Usage:
+    python analysis/batch_reprocess.py data/ --output fleet_report.csv
+    python analysis/batch_reprocess.py data/ --workers 8 --no-cache
+"""
+import sys
+import os
+import argparse
+import glob
+import hashlib
+import io
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIRNAME = ".rw_cache"
+CACHE_VERSION = 1
+PATTERNS = {
+    'linearity': "torque_linearity_*.csv",
+    'saturation': "saturation_power_*.csv",
+}
+
+# Defaults matching the test scripts
+TARGET_RPM = 5252.0 * 0.95
+MIN_ACCEL = 0.05   # rad/s²; smaller step responses count as stalled
+
+
+# --- Parsing and cache ---
+
+def parse_csv(kind, raw: bytes) -> dict:
+    """Parses a run CSV into a dict of NumPy arrays."""
+    df = pd.read_csv(io.BytesIO(raw))
+    arrays = {col: df[col].to_numpy() for col in df.columns if col != 'phase'}
+    if 'phase' in df.columns:
+        codes, names = pd.factorize(df['phase'].astype(str))
+        arrays['phase'] = codes.astype(np.int16)
+        arrays['phase_names'] = np.asarray(names, dtype=str)
+    return arrays
+
+
+def load_run(path, kind, sha1, cache_dir):
+    """
+    Returns (sha1, arrays) for a run, parsing the CSV unless a cached copy
+    exists. sha1 may be None, in which case the file is hashed first.
+    """
+    raw = None
+    if sha1 is None:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        sha1 = hashlib.sha1(raw).hexdigest()
+
+    cache_file = os.path.join(cache_dir, f"{sha1}.v{CACHE_VERSION}.npz") if cache_dir else None
+    if cache_file and os.path.exists(cache_file):
+        with np.load(cache_file) as npz:
+            return sha1, {k: npz[k] for k in npz.files}
+
+    if raw is None:
+        with open(path, 'rb') as f:
+            raw = f.read()
+    arrays = parse_csv(kind, raw)
+    if cache_file:
+        tmp = f"{cache_file}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, cache_file)
+    return sha1, arrays
+
+
+def load_index(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, "index.json")) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return index if index.get('version') == CACHE_VERSION else {}
+
+
+def save_index(cache_dir, files):
+    path = os.path.join(cache_dir, "index.json")
+    with open(f"{path}.tmp", 'w') as f:
+        json.dump({'version': CACHE_VERSION, 'files': files}, f, indent=1)
+    os.replace(f"{path}.tmp", path)
+
+
+# --- Analysis ---
+
+def linear_fit(x, y):
+    """Least-squares slope, intercept, slope standard error and R² (NaN if underdetermined)."""
+    n = len(x)
+    if n < 2:
+        return np.nan, np.nan, np.nan, np.nan
+    xm, ym = x.mean(), y.mean()
+    sxx = np.sum((x - xm) ** 2)
+    if sxx == 0:
+        return np.nan, np.nan, np.nan, np.nan
+    slope = np.sum((x - xm) * (y - ym)) / sxx
+    intercept = ym - slope * xm
+    resid = y - (slope * x + intercept)
+    sst = np.sum((y - ym) ** 2)
+    stderr = np.sqrt(np.sum(resid ** 2) / (n - 2) / sxx) if n > 2 else np.nan
+    r2 = 1.0 - np.sum(resid ** 2) / sst if sst > 0 else np.nan
+    return float(slope), float(intercept), float(stderr), float(r2)
+
+
+def analyze_linearity(a) -> dict:
+    torque = a['commanded_torque_Nm'].astype(float)
+    accel = a['measured_accel_rad_s2'].astype(float)
+    valid = np.isfinite(torque) & np.isfinite(accel)
+    torque, accel = torque[valid], accel[valid]
+
+    slope, intercept, slope_stderr, r2 = linear_fit(torque, accel)
+    residual = accel - (slope * torque + intercept)
+
+    # Gain and deadband from the steps that moved the right way:
+    # |accel| = gain * (|torque| - deadband)
+    moving = (np.sign(accel) == np.sign(torque)) & (torque != 0) & (np.abs(accel) > MIN_ACCEL)
+    gain, offset, gain_stderr, _ = linear_fit(np.abs(torque[moving]), np.abs(accel[moving]))
+    deadband = np.nan
+    if np.isfinite(gain) and gain > 0:
+        stalled = np.abs(torque[~moving])
+        lower = stalled.max() if len(stalled) else 0.0
+        upper = np.abs(torque[moving]).min()
+        deadband = float(np.clip(-offset / gain, lower, upper))
+
+    pos, neg = moving & (torque > 0), moving & (torque < 0)
+    return {
+        'steps': int(len(torque)),
+        'moving_steps': int(moving.sum()),
+        'slope_rad_s2_per_Nm': slope,
+        'slope_stderr': slope_stderr,
+        'r_squared': r2,
+        'max_abs_residual_rad_s2': float(np.abs(residual).max()) if len(residual) else np.nan,
+        'gain_rad_s2_per_Nm': gain,
+        'gain_stderr': gain_stderr,
+        'inertia_kg_m2': 1.0 / gain if np.isfinite(gain) and gain else np.nan,
+        'deadband_Nm': deadband,
+        'gain_pos': linear_fit(torque[pos], accel[pos])[0],
+        'gain_neg': linear_fit(torque[neg], accel[neg])[0],
+    }
+
+
+def analyze_saturation(a, target_rpm=TARGET_RPM) -> dict:
+    t = a['time_s'].astype(float)
+    speed = a['speed_rpm'].astype(float)
+    current = a['current_A'].astype(float)
+    power = a['power_W'].astype(float) if 'power_W' in a else a['vbus_V'] * current
+    out = {
+        'samples': int(len(t)),
+        'duration_s': float(t[-1] - t[0]) if len(t) else np.nan,
+        'peak_speed_rpm': float(speed.max()) if len(speed) else np.nan,
+        'min_vbus_V': float(a['vbus_V'].min()) if len(t) else np.nan,
+        'peak_current_A': float(current.max()) if len(t) else np.nan,
+        'peak_power_W': float(power.max()) if len(t) else np.nan,
+    }
+    # Trapezoidal energy, also split per phase below
+    segment = 0.5 * (power[1:] + power[:-1]) * np.diff(t)
+    out['energy_J'] = float(segment.sum()) if len(t) > 1 else np.nan
+    reached = np.flatnonzero(speed >= target_rpm)
+    out['time_to_target_s'] = float(t[reached[0]] - t[0]) if len(reached) else np.nan
+
+    if 'phase' in a and len(t):
+        codes, names = a['phase'], a['phase_names']
+        counts = np.bincount(codes, minlength=len(names))
+        sums = np.bincount(codes, weights=power, minlength=len(names))
+        order = np.argsort(codes, kind='stable')
+        starts = np.searchsorted(codes[order], np.arange(len(names)))
+        peaks = np.maximum.reduceat(power[order], starts)
+        peak_current = np.maximum.reduceat(current[order], starts)
+        # Energy per phase: trapezoids between consecutive samples of the same phase
+        same = codes[1:] == codes[:-1]
+        energy = np.bincount(codes[1:][same], weights=segment[same], minlength=len(names))
+        for i, name in enumerate(names):
+            key = str(name).replace('-', '_')
+            if counts[i]:
+                out[f'{key}_mean_power_W'] = float(sums[i] / counts[i])
+                out[f'{key}_peak_power_W'] = float(peaks[i])
+                out[f'{key}_peak_current_A'] = float(peak_current[i])
+                out[f'{key}_energy_J'] = float(energy[i])
+    return out
+
+
+def process_file(path, kind, sha1, cache_dir, target_rpm):
+    """Worker entry point: returns (path, sha1, result row)."""
+    start = time.perf_counter()
+    sha1, arrays = load_run(path, kind, sha1, cache_dir)
+    if kind == 'linearity':
+        result = analyze_linearity(arrays)
+    else:
+        result = analyze_saturation(arrays, target_rpm)
+    result = {'file': os.path.basename(path), 'kind': kind, **result,
+              'process_ms': (time.perf_counter() - start) * 1e3}
+    return path, sha1, result
+
+
+# --- Driver ---
+
+def scan(directory):
+    """Returns [(path, kind)] for every run file in directory, sorted by name."""
+    runs = []
+    for kind, pattern in PATTERNS.items():
+        runs += [(p, kind) for p in glob.glob(os.path.join(directory, pattern))]
+    return sorted(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reprocess a directory of RW4-12 test runs.")
+    parser.add_argument("directory", help="directory containing torque_linearity_*.csv / saturation_power_*.csv")
+    parser.add_argument("--output", default="fleet_report.csv", help="report CSV to write")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--cache-dir", help=f"parsed-data cache (default: <directory>/{CACHE_DIRNAME})")
+    parser.add_argument("--no-cache", action="store_true", help="parse every file and leave the cache untouched")
+    parser.add_argument("--target-rpm", type=float, default=TARGET_RPM, help="speed for time-to-target")
+    args = parser.parse_args()
+
+    runs = scan(args.directory)
+    if not runs:
+        print(f"No runs found in '{args.directory}'.")
+        sys.exit()
+
+    cache_dir = None if args.no_cache else (args.cache_dir or os.path.join(args.directory, CACHE_DIRNAME))
+    known = {}
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        known = load_index(cache_dir).get('files', {})
+
+    # Files whose mtime and size match the index reuse the stored hash
+    jobs, stats = [], {}
+    for path, kind in runs:
+        st = os.stat(path)
+        stats[path] = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size}
+        entry = known.get(os.path.abspath(path))
+        sha1 = entry['sha1'] if entry and entry['mtime_ns'] == st.st_mtime_ns and entry['size'] == st.st_size else None
+        jobs.append((path, kind, sha1))
+    changed = sum(1 for job in jobs if job[2] is None)
+    print(f"Processing {len(jobs)} runs ({changed} new or changed)...")
+
+    start = time.perf_counter()
+    rows = []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(process_file, path, kind, sha1, cache_dir, args.target_rpm)
+                   for path, kind, sha1 in jobs]
+        for future in futures:
+            try:
+                path, sha1, result = future.result()
+            except Exception as e:
+                print(f"Skipping a run that failed to process: {e}")
+                continue
+            rows.append(result)
+            known[os.path.abspath(path)] = {**stats[path], 'sha1': sha1}
+    elapsed = time.perf_counter() - start
+
+    if cache_dir:
+        save_index(cache_dir, known)
+
+    report = pd.DataFrame(rows)
+    report.to_csv(args.output, index=False)
+    print(f"Processed {len(rows)} runs in {elapsed:.2f} s. Report saved to '{args.output}'")
+
+    summary_cols = {
+        'linearity': ['file', 'gain_rad_s2_per_Nm', 'inertia_kg_m2', 'deadband_Nm', 'r_squared'],
+        'saturation': ['file', 'time_to_target_s', 'peak_speed_rpm', 'peak_power_W', 'energy_J'],
+    }
+    for kind, cols in summary_cols.items():
+        part = report[report['kind'] == kind] if len(report) else report
+        if len(part):
+            print(f"\n--- {kind} ({len(part)} runs) ---")
+            print(part[cols].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
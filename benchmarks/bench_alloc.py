@@ -0,0 +1,102 @@
+# benchmarks/bench_alloc.py
+"""
+Allocation check for the steady-state polling path.
+
+Polls read(EDACFile.SPEED) against the emulator (run in a child process so its
+allocations are not traced) and uses tracemalloc to report, per
+transaction:
+
+    peak_bytes      memory allocated and freed again within one read
+                    (tracemalloc peak above the level before the read)
+    retained        blocks still allocated after N reads, for two N
+
+Steady-state polling should allocate O(1): the per-read peak stays flat
+and the retained block count does not grow with N. Both the zero-copy
+receive path and the deframer path it bypasses are measured.
+
+Usage:
+    python benchmarks/bench_alloc.py
+    python benchmarks/bench_alloc.py --reads 5000
+"""
+import sys
+import os
+import argparse
+import statistics
+import subprocess
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rw_wheel import ReactionWheel, EDACFile
+
+
+def start_emulator():
+    """Starts the emulator in a child process; returns (process, port)."""
+    proc = subprocess.Popen([sys.executable, '-u', '-m', 'rw_wheel.emulator'],
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    if ' on ' not in line:
+        proc.kill()
+        raise RuntimeError(f"Emulator did not start: {line!r}")
+    return proc, line.split(' on ')[1].split()[0]
+
+
+def per_read_peaks(wheel, count):
+    """Bytes allocated within each of `count` reads, above the level before it."""
+    peaks = []
+    for _ in range(count):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        wheel.read(EDACFile.SPEED)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    return peaks
+
+
+def retained_blocks(wheel, count):
+    """Blocks still allocated after `count` reads."""
+    before = tracemalloc.take_snapshot()
+    for _ in range(count):
+        wheel.read(EDACFile.SPEED)
+    after = tracemalloc.take_snapshot()
+    return sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+
+
+def measure(wheel, reads):
+    for _ in range(200):    # warm up caches, RTT estimator and buffers
+        wheel.read(EDACFile.SPEED)
+    peaks = per_read_peaks(wheel, reads)
+    return {
+        'peak_bytes_p50': statistics.median(peaks),
+        'peak_bytes_max': max(peaks),
+        f'retained_{reads}': retained_blocks(wheel, reads),
+        f'retained_{4 * reads}': retained_blocks(wheel, 4 * reads),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-transaction allocations of the polling path.")
+    parser.add_argument("--reads", type=int, default=2000, help="reads per measurement")
+    args = parser.parse_args()
+
+    proc, port = start_emulator()
+    try:
+        wheel = ReactionWheel(port, 115200, 0x20, 0x11)
+        wheel.open()
+        tracemalloc.start()
+        results = {}
+        for name, zero_copy in (('zero-copy', True), ('deframer', False)):
+            wheel._zero_copy_rx = zero_copy
+            results[name] = measure(wheel, args.reads)
+        tracemalloc.stop()
+        wheel.close()
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    for name, result in results.items():
+        print(f"{name:10s}  " + "  ".join(f"{key}={value:g}" for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# benchmarks/bench_slip.py
+"""
+Microbenchmark for the SLIP codec.
+
+Compares the original per-byte encode/decode loops against the buffer-level
+codec in rw_wheel/slip.py for a typical 8-byte telemetry packet and a 4 KB
+file-transfer packet, and reports frames/s for each.
+
+Usage:
+    python benchmarks/bench_slip.py
+"""
+import sys
+import os
+import random
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rw_wheel.slip import FEND, FESC, TFEND, TFESC, slip_encode, slip_decode
+
+
+# --- Original per-byte implementation, kept here as the "before" baseline ---
+def legacy_slip_encode(data: bytes) -> bytes:
+    out = bytearray([FEND])
+    for byte in data:
+        if byte == FEND:
+            out.extend([FESC, TFEND])
+        elif byte == FESC:
+            out.extend([FESC, TFESC])
+        else:
+            out.append(byte)
+    out.append(FEND)
+    return bytes(out)
+
+def legacy_slip_decode(frame: bytes) -> bytes | None:
+    if not frame.startswith(FEND.to_bytes(1, 'little')) or not frame.endswith(FEND.to_bytes(1, 'little')):
+        return None
+    data = frame[1:-1]
+    decoded = bytearray()
+    i = 0
+    while i < len(data):
+        if data[i] == FESC:
+            i += 1
+            if data[i] == TFEND:
+                decoded.append(FEND)
+            elif data[i] == TFESC:
+                decoded.append(FESC)
+        else:
+            decoded.append(data[i])
+        i += 1
+    return bytes(decoded)
+
+
+def make_packets():
+    """Builds the benchmark inputs: (name, packet) pairs."""
+    rng = random.Random(1234)
+    # READ_FILE reply for SPEED: [DST][SRC][CTRL][FILE][float32][CRC16], no escapes
+    small = bytes([0x11, 0x20, 0xA7, 0x15, 0x00, 0x00, 0x48, 0x42])
+    # Same size, but with a FEND and a FESC in the body
+    small_esc = bytes([0x11, 0x20, 0xA7, 0x15, FEND, 0x00, FESC, 0x42])
+    # 4 KB of random data: on average 1 in 128 bytes needs escaping
+    large = bytes(rng.getrandbits(8) for _ in range(4096))
+    return [("8 B", small), ("8 B escaped", small_esc), ("4 KB", large)]
+
+
+def frames_per_second(func, arg, min_time=0.2):
+    """Returns calls/s for func(arg), auto-scaling the repeat count."""
+    timer = timeit.Timer(lambda: func(arg))
+    number, elapsed = timer.autorange()
+    while elapsed < min_time:
+        number *= 2
+        elapsed = timer.timeit(number)
+    return number / elapsed
+
+
+def main():
+    print(f"{'packet':<14}{'op':<8}{'before (fr/s)':>16}{'after (fr/s)':>16}{'speedup':>10}")
+    for name, packet in make_packets():
+        frame = legacy_slip_encode(packet)
+        assert slip_encode(packet) == frame
+        assert slip_decode(frame) == legacy_slip_decode(frame) == packet
+
+        for op, before, after, arg in (
+            ("encode", legacy_slip_encode, slip_encode, packet),
+            ("decode", legacy_slip_decode, slip_decode, frame),
+        ):
+            fps_before = frames_per_second(before, arg)
+            fps_after = frames_per_second(after, arg)
+            print(f"{name:<14}{op:<8}{fps_before:>16,.0f}{fps_after:>16,.0f}{fps_after / fps_before:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
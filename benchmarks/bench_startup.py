@@ -0,0 +1,86 @@
+# benchmarks/bench_startup.py
+"""
+Startup-time benchmark for rwctl.
+
+Times fresh interpreter runs (median of --runs) of:
+
+    rwctl --help            argument parsing only
+    rwctl ping              a full ping against the emulator
+    script imports          the import cost every old interactive script
+                            paid before touching the wheel: the whole
+                            rw_wheel package (NumPy included)
+    analysis imports        the same plus pandas and plotly, as the
+                            analysis scripts imported them
+
+and lists which heavy modules `rwctl ping` loaded (there should be none).
+The emulator runs in a child process started once.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 20
+"""
+import sys
+import os
+import argparse
+import statistics
+import subprocess
+import tempfile
+import time
+
+from bench_alloc import start_emulator
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RWCTL = os.path.join(ROOT, 'rwctl.py')
+
+HEAVY_MODULES = ('numpy', 'pandas', 'plotly', 'asyncio')
+SCRIPT_IMPORTS = ("import rw_wheel.driver, rw_wheel.poller, rw_wheel.telemetry, rw_wheel.recorder, "
+                  "rw_wheel.estimation, rw_wheel.async_driver, rw_wheel.bus, rw_wheel.client")
+ANALYSIS_IMPORTS = SCRIPT_IMPORTS + "; import numpy, pandas, plotly.graph_objects"
+
+
+def run_time(argv, cwd, runs) -> float:
+    """Median wall time in ms of `runs` fresh runs of argv (after one untimed warm-up)."""
+    times = []
+    for i in range(runs + 1):
+        start = time.perf_counter()
+        subprocess.run(argv, cwd=cwd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if i:
+            times.append((time.perf_counter() - start) * 1e3)
+    return statistics.median(times)
+
+
+def heavy_modules_loaded(port, cwd) -> list:
+    """Heavy modules present in sys.modules after an in-process `rwctl ping`."""
+    code = (f"import sys; sys.path.insert(0, {ROOT!r}); import rwctl; "
+            f"rc = rwctl.main(['ping', '--no-log', '--port', {port!r}]); "
+            f"print('LOADED', [m for m in {HEAVY_MODULES!r} if m in sys.modules])")
+    out = subprocess.run([sys.executable, '-c', code], cwd=cwd, check=True, capture_output=True, text=True).stdout
+    return [line for line in out.splitlines() if line.startswith('LOADED')][-1][len('LOADED '):]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time of rwctl vs. the old script imports.")
+    parser.add_argument("--runs", type=int, default=10, help="timed runs per case")
+    args = parser.parse_args()
+
+    proc, port = start_emulator()
+    try:
+        with tempfile.TemporaryDirectory() as cwd:
+            py = sys.executable
+            cases = {
+                'python (empty)': [py, '-c', 'pass'],
+                'rwctl --help': [py, RWCTL, '--help'],
+                'rwctl ping': [py, RWCTL, 'ping', '--no-log', '--port', port],
+                'script imports': [py, '-c', f"import sys; sys.path.insert(0, {ROOT!r}); {SCRIPT_IMPORTS}"],
+                'analysis imports': [py, '-c', f"import sys; sys.path.insert(0, {ROOT!r}); {ANALYSIS_IMPORTS}"],
+            }
+            for name, argv in cases.items():
+                print(f"{name:18s} {run_time(argv, cwd, args.runs):8.1f} ms")
+            print(f"heavy modules loaded by rwctl ping: {heavy_modules_loaded(port, cwd)}")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == "__main__":
+    main()
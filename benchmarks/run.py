@@ -0,0 +1,213 @@
+# benchmarks/run.py
+"""
+Protocol and driver benchmark suite.
+
+Runs against the software emulator by default (or any port given with
+--port, e.g. a real wheel or a loopback adapter running the emulator)
+and measures:
+
+    codec       _slip_encode / _slip_decode / _crc_func throughput
+    latency     end-to-end _send_and_receive round trip, p50/p95/p99
+    read_rate   maximum sustained read_speed() rate
+    sampling    rate actually reached by the analysis-script sampling
+                loop (three reads + sleep) vs. TelemetryPoller at 20 Hz
+
+Results are written as JSON together with machine information. In
+--compare mode every metric is checked against a stored baseline and
+the run fails if any metric regressed by more than --tolerance.
+
+Usage:
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --output baseline.json
+    python benchmarks/run.py --compare baseline.json --tolerance 0.15
+"""
+import sys
+import os
+import argparse
+import json
+import logging
+import platform
+import statistics
+import time
+from contextlib import nullcontext
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rw_wheel import ReactionWheel, TelemetryPoller, EDACFile, NSPCommand, WheelError, config
+from rw_wheel import _slip_encode, _slip_decode, _crc_func
+from rw_wheel.emulator import WheelEmulator
+
+SAMPLE_INTERVAL = 0.05   # the analysis scripts' 20 Hz target
+
+
+# --- Metric helpers ---
+
+def metric(value, unit, higher_is_better):
+    return {'value': value, 'unit': unit, 'higher_is_better': higher_is_better}
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return float('nan')
+    k = max(0, min(len(sorted_values) - 1, round(p / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+def rate(func, duration):
+    """Calls func() repeatedly for `duration` seconds; returns calls/s."""
+    count = 0
+    start = time.perf_counter()
+    end = start + duration
+    while time.perf_counter() < end:
+        func()
+        count += 1
+    return count / (time.perf_counter() - start)
+
+def machine_info():
+    return {
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+# --- Benchmarks ---
+
+def bench_codec(duration):
+    packet = bytes([0x11, 0x20, 0xA7, 0x15, 0x00, 0x00, 0x48, 0x42, 0x3A, 0x9C])
+    frame = _slip_encode(packet)
+    large = bytes(range(256)) * 16
+    large_frame = _slip_encode(large)
+    return {
+        'codec.slip_encode_small': metric(rate(lambda: _slip_encode(packet), duration), 'ops/s', True),
+        'codec.slip_decode_small': metric(rate(lambda: _slip_decode(frame), duration), 'ops/s', True),
+        'codec.crc_small': metric(rate(lambda: _crc_func(packet), duration), 'ops/s', True),
+        'codec.slip_encode_4k': metric(rate(lambda: _slip_encode(large), duration) * len(large) / 1e6, 'MB/s', True),
+        'codec.slip_decode_4k': metric(rate(lambda: _slip_decode(large_frame), duration) * len(large) / 1e6, 'MB/s', True),
+        'codec.crc_4k': metric(rate(lambda: _crc_func(large), duration) * len(large) / 1e6, 'MB/s', True),
+    }
+
+def bench_latency(wheel, count):
+    payload = EDACFile.SPEED.value.to_bytes(1, 'little')
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter_ns()
+        wheel._send_and_receive(NSPCommand.READ_FILE, payload)
+        samples.append((time.perf_counter_ns() - start) / 1e6)
+    samples.sort()
+    return {
+        'latency.p50': metric(percentile(samples, 50), 'ms', False),
+        'latency.p95': metric(percentile(samples, 95), 'ms', False),
+        'latency.p99': metric(percentile(samples, 99), 'ms', False),
+        'latency.mean': metric(statistics.fmean(samples), 'ms', False),
+    }
+
+def bench_read_rate(wheel, duration):
+    return {'read_rate.read_speed': metric(rate(wheel.read_speed, duration), 'reads/s', True)}
+
+def bench_sampling(wheel, duration):
+    """Achieved sample rate of the old script loop and of the poller, both targeting 20 Hz."""
+    samples = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        try:
+            wheel.read_speed()
+            wheel.read_vbus()
+            wheel.read_current()
+            samples += 1
+        except WheelError:
+            pass
+        time.sleep(SAMPLE_INTERVAL)
+    script_rate = samples / (time.perf_counter() - start)
+
+    channels = [EDACFile.SPEED, EDACFile.VBUS, EDACFile.MEAUSURED_CURRENT]
+    with TelemetryPoller(wheel, channels, rate_hz=1.0 / SAMPLE_INTERVAL) as poller:
+        time.sleep(duration)
+    rows = poller.drain()
+    poller_rate = (len(rows) - 1) / (rows['t'][-1] - rows['t'][0]) if len(rows) > 1 else 0.0
+
+    return {
+        'sampling.script_loop_hz': metric(script_rate, 'Hz', True),
+        'sampling.poller_hz': metric(poller_rate, 'Hz', True),
+    }
+
+
+def run_suite(args):
+    results = {}
+    print("Running codec benchmarks...", file=sys.stderr)
+    results.update(bench_codec(args.duration))
+
+    emulator = WheelEmulator(latency_s=args.latency) if args.port is None else nullcontext()
+    with emulator:
+        port = args.port or emulator.port
+        with ReactionWheel(port, config.BAUD_RATE, config.WHEEL_ADDRESS, config.HOST_ADDRESS) as wheel:
+            print("Running latency benchmark...", file=sys.stderr)
+            results.update(bench_latency(wheel, args.count))
+            print("Running read-rate benchmark...", file=sys.stderr)
+            results.update(bench_read_rate(wheel, args.duration))
+            print("Running sampling-loop benchmark...", file=sys.stderr)
+            results.update(bench_sampling(wheel, args.duration))
+
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'machine': machine_info(),
+        'target': args.port or f"emulator (latency {args.latency * 1000:.1f} ms)",
+        'metrics': results,
+    }
+
+
+def compare(current, baseline, tolerance):
+    """Prints a comparison table; returns the list of regressed metric names."""
+    regressions = []
+    print(f"{'metric':<28}{'baseline':>14}{'current':>14}{'change':>10}")
+    for name, cur in current['metrics'].items():
+        base = baseline['metrics'].get(name)
+        if base is None:
+            print(f"{name:<28}{'-':>14}{cur['value']:>14.4g}{'new':>10}")
+            continue
+        change = (cur['value'] - base['value']) / base['value'] if base['value'] else 0.0
+        worse = -change if cur['higher_is_better'] else change
+        flag = "  REGRESSION" if worse > tolerance else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:<28}{base['value']:>14.4g}{cur['value']:>14.4g}{change:>+9.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RW4-12 protocol and driver benchmarks.")
+    parser.add_argument("--port", help="serial port to benchmark against (default: start the emulator)")
+    parser.add_argument("--latency", type=float, default=0.0, help="emulator reply latency in seconds")
+    parser.add_argument("--duration", type=float, default=2.0, help="seconds per rate benchmark")
+    parser.add_argument("--count", type=int, default=500, help="round trips for the latency benchmark")
+    parser.add_argument("--output", help="write results JSON to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a baseline JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed regression fraction (default 0.10)")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    report = run_suite(args)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to '{args.output}'")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\nNo regressions.")
+    else:
+        for name, m in report['metrics'].items():
+            print(f"{name:<28}{m['value']:>14.4g} {m['unit']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,74 @@
 # logging_config.py
 
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 
 LOG_FILENAME = "wheel_test_log.txt"
 
-def setup_logging():
+_listener = None
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the writer thread.
+    The stock handler formats every record in the calling thread; here the
+    message and its arguments (e.g. a driver hex dump) are passed as they
+    are and only rendered by the handlers that accept them.
+    """
+
+    def prepare(self, record):
+        if record.exc_info or record.stack_info:
+            # Tracebacks are rendered now, while the frames are still intact
+            return super().prepare(record)
+        return record
+
+
+def setup_logging(debug: bool = False):
     """
     Configures the root logger to output to a file and the console.
+
+    Records are put on a queue and written by a background thread
+    (logging.handlers.QueueListener), so code on the sampling path never
+    waits on file or console I/O. The file gets INFO and above, or
+    everything with debug=True (including the driver's TX/RX hex dumps);
+    the console gets INFO and above. The writer is flushed at exit.
     """
- 
+    global _listener
+
     logger = logging.getLogger()
-    logger.setLevel(logging.DEBUG)  
+    file_level = logging.DEBUG if debug else logging.INFO
+    # The root level gates records before they are even created, so it is
+    # kept at the lowest handler level rather than at DEBUG.
+    logger.setLevel(min(file_level, logging.INFO))
+    if _listener is not None:
+        _listener.handlers[0].setLevel(file_level)
+        return _listener
 
     # --- Create a handler to write logs to a file ---
     file_handler = logging.FileHandler(LOG_FILENAME, mode='w')
-    file_handler.setLevel(logging.DEBUG)  # Log everything to the file
+    file_handler.setLevel(file_level)
 
     console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(logging.INFO)  
+    console_handler.setLevel(logging.INFO)
 
     formatter = logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
-    
+
     file_handler.setFormatter(formatter)
     console_handler.setFormatter(formatter)
 
     if not logger.handlers:
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
+        records = queue.SimpleQueue()
+        logger.addHandler(_DeferredQueueHandler(records))
+        _listener = logging.handlers.QueueListener(
+            records, file_handler, console_handler, respect_handler_level=True
+        )
+        _listener.start()
+        atexit.register(_listener.stop)
 
-    print(f"Logging configured. Detailed logs will be written to '{LOG_FILENAME}'")
\ No newline at end of file
+    logger.info(f"Logging configured. Detailed logs will be written to '{LOG_FILENAME}'")
+    return _listener
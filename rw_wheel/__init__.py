@@ -1,20 +1,66 @@
 """
 Reaction Wheel Driver Package.
 
+Names are imported from their submodules on first use, so importing the
+package (or just the driver) does not pull in NumPy, asyncio and the
+rest until a script actually needs them.
 """
+import importlib
 
-from .driver import (
-    ReactionWheel,
-    WheelError,
-    WheelCrcError,
-    WheelNackError,
-    NSPCommand,
-    WheelMode,
-    EDACFile,
-    
-    
-    _slip_encode,
-    _slip_decode,
-    _crc_func,
-    FEND
-)
\ No newline at end of file
+# public name -> submodule that defines it
+_EXPORTS = {
+    **dict.fromkeys([
+        'ReactionWheel',
+        'WheelError',
+        'WheelCrcError',
+        'WheelNackError',
+        'WheelTimeoutError',
+        'WheelDesyncError',
+        'WheelVerifyError',
+        'NSPCommand',
+        'WheelMode',
+        'EDACFile',
+        'TelemetrySnapshot',
+        'StampedValue',
+        'Channel',
+        'TELEMETRY_SCHEMA',
+        'register_channel',
+
+        '_slip_encode',
+        '_slip_decode',
+        '_crc_func',
+        'FEND',
+    ], 'driver'),
+    'TelemetryPoller': 'poller',
+    'decode_replies': 'telemetry',
+    'AdaptiveTimeouts': 'timeouts',
+    'RetryPolicy': 'timeouts',
+    'TelemetryRecorder': 'recorder',
+    'Recording': 'recorder',
+    'load_recording': 'recorder',
+    'OnlineLinearFit': 'estimation',
+    'TorqueResponseEstimator': 'estimation',
+    'AsyncReactionWheel': 'async_driver',
+    'WheelBus': 'bus',
+    'BusWheel': 'bus',
+    'WheelClient': 'client',
+    'LinkCapture': 'capture',
+    'ReplayResult': 'capture',
+    'read_capture': 'capture',
+    'replay': 'capture',
+}
+
+__all__ = [name for name in _EXPORTS if not name.startswith('_')]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,353 @@
+# rw_wheel/async_driver.py
+"""
+asyncio driver for the RW4-12 Reaction Wheel.
+
+AsyncReactionWheel offers the same high-level API as ReactionWheel, but
+every call is a coroutine and no call ever blocks the event loop. The
+serial port is opened non-blocking and registered with the loop's
+reader callback, so received bytes are deframed as they arrive. Frames
+are written without blocking; whatever the port does not take at once
+is queued and written from the loop's writer callback.
+
+Several coroutines may issue requests at the same time. Each request is
+queued with the command it sent (and the EDAC file, for READ_FILE), and
+each reply is handed to the oldest outstanding request it matches.
+Timeouts are per request and enforced with asyncio, not with the serial
+port timeout. They adapt to the measured round-trip time and failed
+requests are retried per command class, as in ReactionWheel (see
+timeouts.py).
+
+The loop's add_reader()/add_writer() need a selectable file descriptor, so this
+driver is POSIX-only (which covers the Raspberry Pi host).
+"""
+import asyncio
+import logging
+import math
+import os
+import struct
+import time
+from collections import deque
+
+import serial
+
+from .driver import (
+    _WheelProtocol, _check_reply, NSPCommand, WheelMode, EDACFile,
+    TelemetrySnapshot, StampedValue, WheelError, WheelCrcError, WheelTimeoutError,
+    APPLICATION_START_ADDRESS, NSP_MIN_PACKET_LEN, _crc_func, _DECODERS, telemetry_file,
+)
+from .slip import SlipDeframer
+from .timeouts import AdaptiveTimeouts, COMMAND_CLASSES, default_retry_policies
+
+log = logging.getLogger(__name__)
+
+
+class _PendingRequest:
+    __slots__ = ('command', 'file_addr', 'future', 'reply_ns')
+
+    def __init__(self, command: NSPCommand, file_addr: int | None, future: asyncio.Future):
+        self.command = command
+        self.file_addr = file_addr
+        self.future = future
+        self.reply_ns = None
+
+
+class AsyncReactionWheel(_WheelProtocol):
+    def __init__(self, port, baud, wheel_addr, host_addr, timeout: float | None = None,
+                 timeouts: AdaptiveTimeouts | None = None, retry_policies: dict | None = None):
+        """
+        timeout:         fixed reply timeout in seconds; None adapts it per command
+        timeouts:        reply timeout estimator, as for ReactionWheel
+        retry_policies:  RetryPolicy per command class, as for ReactionWheel
+        """
+        self.port = port
+        self.baud = baud
+        self.wheel_addr = wheel_addr
+        self.host_addr = host_addr
+        self.timeout = timeout
+        self.timeouts = timeouts or AdaptiveTimeouts()
+        self.retry_policies = default_retry_policies()
+        self.retry_policies.update(retry_policies or {})
+        self.ser = None
+        self._loop = None
+        self._deframer = SlipDeframer()
+        self._pending = deque()   # _PendingRequest, in the order they were sent
+        self._tx = bytearray()    # bytes queued until the port is writable
+
+    async def open(self):
+        """Opens the serial port in non-blocking mode and starts reading."""
+        if self.ser is None or not self.ser.is_open:
+            self.ser = serial.Serial(self.port, self.baud, timeout=0)
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(self.ser.fileno(), self._on_readable)
+        self._tx.clear()
+        self._build_frame_cache()
+        log.info(f"Serial port {self.port} opened (asyncio).")
+
+    async def close(self):
+        """Stops reading, fails any outstanding requests and closes the port."""
+        if self.ser and self.ser.is_open:
+            self._loop.remove_reader(self.ser.fileno())
+            if self._tx:
+                self._loop.remove_writer(self.ser.fileno())
+                self._tx.clear()
+            self.ser.close()
+            log.info(f"Serial port {self.port} closed.")
+        self._fail_pending(WheelError("Port closed with request outstanding."))
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        # Always try to command the wheel to a safe IDLE state on exit
+        try:
+            await self.set_idle()
+        except Exception as e:
+            log.warning(f"Could not command wheel to IDLE on exit: {e}")
+        await self.close()
+
+    # --- Transport ---
+
+    def _on_readable(self):
+        """Event-loop reader callback: deframe whatever bytes are available."""
+        try:
+            chunk = self.ser.read(self.ser.in_waiting or 1)
+        except serial.SerialException as e:
+            log.error(f"Serial read failed: {e}")
+            self._port_failed(e)
+            return
+        for packet in self._deframer.feed(chunk):
+            if len(packet) >= NSP_MIN_PACKET_LEN:
+                self._dispatch(packet)
+
+    def _write(self, frame: bytes):
+        """
+        Writes a frame without blocking. What the port does not take now
+        is queued behind any earlier frames and sent by _on_writable().
+        """
+        if not self._tx:
+            try:
+                n = os.write(self.ser.fileno(), frame)
+            except BlockingIOError:
+                n = 0
+            if n == len(frame):
+                return
+            frame = frame[n:]
+            self._loop.add_writer(self.ser.fileno(), self._on_writable)
+        self._tx += frame
+
+    def _on_writable(self):
+        """Event-loop writer callback: sends queued bytes until the queue is empty."""
+        try:
+            n = os.write(self.ser.fileno(), self._tx)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            log.error(f"Serial write failed: {e}")
+            self._port_failed(e)
+            return
+        del self._tx[:n]
+        if not self._tx:
+            self._loop.remove_writer(self.ser.fileno())
+
+    def _port_failed(self, error: Exception):
+        """
+        Stops watching a port that has failed, closes it and fails every
+        outstanding request with `error`, which is what ReactionWheel's
+        callers get from a blocking read or write. Later requests fail on
+        the closed port until it is reopened.
+        """
+        fd = self.ser.fileno()
+        self._loop.remove_reader(fd)
+        self._loop.remove_writer(fd)
+        self._tx.clear()
+        try:
+            self.ser.close()
+        except (serial.SerialException, OSError):
+            pass
+        self._fail_pending(error)
+
+    def _fail_pending(self, error: Exception):
+        while self._pending:
+            request = self._pending.popleft()
+            if not request.future.done():
+                request.future.set_exception(error)
+
+    def _dispatch(self, packet: bytes):
+        """Hands a received packet to the oldest request it answers."""
+        if not self._pending:
+            log.warning(f"Dropping unsolicited reply: {packet.hex(' ')}")
+            return
+
+        body, crc = packet[:-2], packet[-2:]
+        if _crc_func(body).to_bytes(2, 'little') != crc:
+            # The command byte of a corrupted reply can't be trusted, so
+            # the failure goes to the request that has waited longest.
+            request = self._pending.popleft()
+            if not request.future.done():
+                request.future.set_exception(WheelCrcError("CRC mismatch in reply."))
+            return
+
+        command = body[2] & 0b00011111
+        acked = body[2] & 0b00100000
+        for request in self._pending:
+            if request.command != command:
+                continue
+            if acked and request.file_addr is not None and (len(body) < 4 or body[3] != request.file_addr):
+                continue
+            self._pending.remove(request)
+            request.reply_ns = time.perf_counter_ns()
+            if not request.future.done():
+                request.future.set_result(packet)
+            return
+        log.warning(f"Dropping reply that matches no outstanding request: {packet.hex(' ')}")
+
+    async def _transact(self, frame: bytes, command: NSPCommand,
+                        file_addr: int | None = None, stamps: list | None = None) -> bytes:
+        """
+        Sends a pre-built frame and waits for its reply, retrying lost or
+        corrupted replies per the command class's RetryPolicy.
+        Returns the reply's data payload. If `stamps` is given, the
+        perf_counter_ns() send and reply instants are appended to it.
+        """
+        key = command.name
+        policy = self.retry_policies[COMMAND_CLASSES.get(key, 'write')]
+        tries = 0
+        while True:
+            if self.timeout is not None:
+                timeout = max(self.timeout, policy.min_timeout_s)
+            else:
+                timeout = self.timeouts.timeout(key, policy.min_timeout_s)
+            try:
+                return await self._attempt(frame, command, file_addr, timeout, tries == 0, stamps)
+            except (WheelTimeoutError, WheelCrcError) as e:
+                tries += 1
+                if tries > policy.retries:
+                    raise
+                log.warning(f"{key} failed ({e}); retry {tries}/{policy.retries}.")
+                delay = policy.delay(tries)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+    async def _attempt(self, frame: bytes, command: NSPCommand, file_addr: int | None,
+                       timeout: float, sample: bool, stamps: list | None) -> bytes:
+        """One request/reply exchange of _transact()."""
+        future = self._loop.create_future()
+        request = _PendingRequest(command, file_addr, future)
+        self._pending.append(request)
+        sent_ns = time.perf_counter_ns()
+        try:
+            self._write(frame)
+            packet = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.timeouts.timed_out(command.name)
+            raise WheelTimeoutError("Timeout: No valid SLIP frame received.") from None
+        finally:
+            if request in self._pending:
+                self._pending.remove(request)
+        reply = _check_reply(packet)
+        if sample:
+            self.timeouts.observe(command.name, (request.reply_ns - sent_ns) / 1e9)
+        if stamps is not None:
+            stamps += (sent_ns, request.reply_ns)
+        return reply
+
+    async def read(self, file, stamped: bool = False):
+        """
+        Reads one telemetry file from TELEMETRY_SCHEMA; see ReactionWheel.read().
+        """
+        file = telemetry_file(file)
+        stamps = [] if stamped else None
+        reply = await self._transact(self._read_frame(file), NSPCommand.READ_FILE, int(file), stamps=stamps)
+        value = _DECODERS[file].decode(reply)
+        return StampedValue(value, *stamps) if stamped else value
+
+    # --- High-Level API ---
+
+    async def initialize_application(self):
+        """
+        Sends the INIT command to transition the wheel from bootloader
+        to application mode. The 'init' retry policy gives the reply at
+        least 3 s.
+        """
+        log.info("Sending INIT command to start application firmware...")
+        frame = self._build_frame(NSPCommand.INIT, struct.pack('<I', APPLICATION_START_ADDRESS))
+        await self._transact(frame, NSPCommand.INIT)
+        log.info("INIT command successful. Wheel should now be in Application Mode.")
+
+    async def ping(self) -> str:
+        """Sends a PING command to the wheel."""
+        reply = await self._transact(self._ping_frame, NSPCommand.PING)
+        return reply.decode('ascii', errors='ignore')
+
+    async def read_many(self, files) -> TelemetrySnapshot:
+        """
+        Reads several EDAC files concurrently; see ReactionWheel.read_many().
+        """
+        files = [telemetry_file(f) for f in files]
+        if len(set(files)) != len(files):
+            raise ValueError("read_many() files must be unique")
+        readings = await asyncio.gather(*(self.read(f, stamped=True) for f in files))
+        first = min(readings, key=lambda r: r.reply_ns)
+        last = max(readings, key=lambda r: r.reply_ns)
+        return TelemetrySnapshot(
+            values={f: r.value for f, r in zip(files, readings)},
+            timestamp=time.time() - (time.perf_counter_ns() - first.reply_ns) / 1e9,
+            skew_s=(last.reply_ns - first.reply_ns) / 1e9,
+            sent_ns=min(r.sent_ns for r in readings),
+            reply_ns=last.reply_ns,
+        )
+
+    async def read_vbus(self, stamped: bool = False) -> float | StampedValue:
+        """Reads the bus voltage from the wheel's telemetry."""
+        return await self.read(EDACFile.VBUS, stamped)
+
+    async def read_vcc(self, stamped: bool = False) -> float | StampedValue:
+        """Reads the secondary 3.3 V rail voltage (VCC)."""
+        return await self.read(EDACFile.VCC, stamped)
+
+    async def read_speed(self, stamped: bool = False) -> float | StampedValue:
+        """Reads the current speed of the wheel in rad/s."""
+        return await self.read(EDACFile.SPEED, stamped)
+
+    async def read_momentum(self, stamped: bool = False) -> float | StampedValue:
+        """Reads the current momentum of the wheel in kg*m^2/s."""
+        return await self.read(EDACFile.MOMENTUM, stamped)
+
+    async def read_current(self, stamped: bool = False) -> float | StampedValue:
+        """Reads the measured motor coil current in Amps."""
+        return await self.read(EDACFile.MEAUSURED_CURRENT, stamped)
+
+    async def read_inertia(self, stamped: bool = False) -> float | StampedValue:
+        """Reads the configured rotor inertia from the wheel in kg·m²."""
+        return await self.read(EDACFile.INERTIA, stamped)
+
+    async def read_temperature(self, sensor_index: int, stamped: bool = False) -> float | StampedValue:
+        """
+        Reads one of the four NTC thermistor temperatures in °C.
+        sensor_index must be in 0..3 (TEMP0 through TEMP3).
+        """
+        if not 0 <= sensor_index <= 3:
+            raise ValueError("sensor_index must be between 0 and 3")
+        return await self.read(EDACFile(EDACFile.TEMP0 + sensor_index), stamped)
+
+    async def set_idle(self):
+        """Commands the wheel to the safe IDLE mode."""
+        log.info("Commanding wheel to IDLE mode...")
+        await self._transact(self._idle_frame, NSPCommand.WRITE_FILE)
+
+    async def set_speed_rpm(self, rpm: float):
+        """Commands the wheel to a specific speed in revolutions per minute."""
+        log.info(f"Commanding wheel to SPEED mode at {rpm:.1f} RPM...")
+        rad_s = rpm * (2.0 * math.pi / 60.0)
+        await self._transact(self._command_templates[WheelMode.SPEED].frame(rad_s), NSPCommand.WRITE_FILE)
+
+    async def set_torque(self, torque_nm: float):
+        """Commands the wheel to TORQUE mode at the given torque (N·m)."""
+        log.info(f"Commanding wheel to TORQUE mode at {torque_nm:.3f} N·m...")
+        await self._transact(self._command_templates[WheelMode.TORQUE].frame(torque_nm), NSPCommand.WRITE_FILE)
+
+    async def set_momentum(self, momentum_nms: float):
+        """Commands the wheel to MOMENTUM mode at the given angular momentum (N·m·s)."""
+        log.info(f"Commanding wheel to MOMENTUM mode at {momentum_nms:.3f} N·m·s...")
+        await self._transact(self._command_templates[WheelMode.MOMENTUM].frame(momentum_nms), NSPCommand.WRITE_FILE)
@@ -0,0 +1,302 @@
+# rw_wheel/bus.py
+"""
+Multi-wheel RS485 bus manager.
+
+NSP is addressed and RS485 is multidrop, so several wheels can share one
+serial port. A WheelBus owns that port and hands out one ReactionWheel
+handle per wheel address:
+
+    with WheelBus(config.SERIAL_PORT, config.BAUD_RATE, config.HOST_ADDRESS) as bus:
+        wheels = [bus.wheel(addr) for addr in (0x20, 0x21, 0x22, 0x23)]
+        speeds = [w.read_speed() for w in wheels]
+
+The handles share one SLIP deframer. Every received packet is routed to
+the handle whose address matches the packet's source byte. The port is
+half-duplex, so one transaction is on the wire at a time. When several
+threads are waiting, the bus grants it round-robin across wheel
+addresses, not first-come-first-served. That way a tight polling loop
+on one wheel cannot starve the others.
+"""
+import logging
+import threading
+import time
+from collections import deque
+
+import serial
+
+from .driver import ReactionWheel, SERIAL_READ_TIMEOUT_S
+from .slip import SlipDeframer
+
+log = logging.getLogger(__name__)
+
+
+class _CountingPort:
+    """Thin wrapper around serial.Serial that counts bytes in each direction."""
+
+    def __init__(self, ser):
+        self._ser = ser
+        self.tx_bytes = 0
+        self.rx_bytes = 0
+
+    @property
+    def is_open(self):
+        return self._ser.is_open
+
+    @property
+    def in_waiting(self):
+        return self._ser.in_waiting
+
+    @property
+    def timeout(self):
+        return self._ser.timeout
+
+    @timeout.setter
+    def timeout(self, value):
+        self._ser.timeout = value
+
+    def write(self, data):
+        self.tx_bytes += len(data)
+        return self._ser.write(data)
+
+    def read(self, size=1):
+        data = self._ser.read(size)
+        self.rx_bytes += len(data)
+        return data
+
+    def reset_input_buffer(self):
+        self._ser.reset_input_buffer()
+
+    def close(self):
+        self._ser.close()
+
+
+class _RoundRobinLock:
+    """
+    Reentrant lock that, when contended, is granted to waiters in
+    round-robin order of wheel address rather than arrival order.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._owner = None
+        self._depth = 0
+        self._waiting = {}      # addr -> deque of waiter tokens
+        self._last_addr = -1
+
+    def _next_waiter(self):
+        if not self._waiting:
+            return None
+        addrs = sorted(self._waiting)
+        for addr in addrs:
+            if addr > self._last_addr:
+                return self._waiting[addr][0]
+        return self._waiting[addrs[0]][0]
+
+    def acquire(self, addr: int):
+        me = threading.get_ident()
+        with self._cond:
+            if self._owner == me:
+                self._depth += 1
+                return
+            token = object()
+            self._waiting.setdefault(addr, deque()).append(token)
+            self._cond.wait_for(lambda: self._owner is None and self._next_waiter() is token)
+            queue = self._waiting[addr]
+            queue.popleft()
+            if not queue:
+                del self._waiting[addr]
+            self._owner = me
+            self._depth = 1
+            self._last_addr = addr
+
+    def release(self):
+        with self._cond:
+            self._depth -= 1
+            if self._depth == 0:
+                self._owner = None
+                self._cond.notify_all()
+
+
+class _BusSlot:
+    """Per-wheel context manager for the bus lock that also records timing."""
+
+    def __init__(self, bus, addr: int):
+        self._bus = bus
+        self._addr = addr
+        self._depth = 0
+        self.transactions = 0
+        self.busy_s = 0.0
+        self.wait_s = 0.0
+
+    def __enter__(self):
+        requested = time.monotonic()
+        self._bus._lock.acquire(self._addr)
+        self._depth += 1
+        if self._depth == 1:
+            self._acquired = time.monotonic()
+            self.wait_s += self._acquired - requested
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._depth -= 1
+        if self._depth == 0:
+            self.transactions += 1
+            self.busy_s += time.monotonic() - self._acquired
+        self._bus._lock.release()
+
+
+class BusWheel(ReactionWheel):
+    """
+    A ReactionWheel handle on a shared WheelBus. The bus owns the port,
+    so open() and close() only attach to and detach from it.
+    """
+    # Replies come through the shared deframer so they can be routed by address
+    _zero_copy_rx = False
+
+    def __init__(self, bus, wheel_addr: int):
+        super().__init__(bus.port, bus.baud, wheel_addr, bus.host_addr)
+        self.bus = bus
+        self._deframer = bus._deframer
+        self._lock = _BusSlot(bus, wheel_addr)
+
+    def open(self):
+        """Attaches to the bus's port."""
+        self.ser = self.bus._port
+        self._build_frame_cache()
+
+    def close(self):
+        """The bus owns the port; nothing to close per wheel."""
+        pass
+
+    def start_capture(self, path, metadata: dict | None = None):
+        """Captures the shared port, i.e. the traffic of every wheel on the bus."""
+        return self.bus.start_capture(path, metadata)
+
+    def stop_capture(self):
+        """Stops the bus capture."""
+        self.bus.stop_capture()
+
+    def _accept_packet(self, packet: bytes):
+        self.bus._route(packet)
+
+
+class WheelBus:
+    def __init__(self, port, baud, host_addr):
+        self.port = port
+        self.baud = baud
+        self.host_addr = host_addr
+        self._port = None
+        self._deframer = SlipDeframer()
+        self._lock = _RoundRobinLock()
+        self._wheels = {}
+        self._opened_at = None
+        self._capture = None
+        self.misrouted = 0   # packets from an address with no handle
+
+    def open(self):
+        """Opens the shared serial port and attaches every wheel handle."""
+        if self._port is None or not self._port.is_open:
+            ser = serial.Serial(self.port, self.baud, timeout=SERIAL_READ_TIMEOUT_S)
+            if self._capture is not None:
+                ser = self._capture.wrap(ser)
+            self._port = _CountingPort(ser)
+            self._opened_at = time.monotonic()
+        for wheel in self._wheels.values():
+            wheel.open()
+        log.info(f"RS485 bus on {self.port} opened.")
+
+    def close(self):
+        """Closes the shared serial port."""
+        if self._port and self._port.is_open:
+            self._port.close()
+            log.info(f"RS485 bus on {self.port} closed.")
+        self.stop_capture()
+
+    def start_capture(self, path, metadata: dict | None = None):
+        """
+        Starts a raw capture of all bus traffic (see capture.py and
+        ReactionWheel.start_capture). close() ends it. Start and stop it
+        while no transaction is in flight.
+        """
+        from .capture import LinkCapture
+
+        self.stop_capture()
+        capture = LinkCapture(path, {
+            'port': self.port, 'baud': self.baud, 'host_addr': self.host_addr,
+            'wheel_addrs': sorted(self._wheels), **(metadata or {}),
+        })
+        capture.open()
+        self._capture = capture
+        if self._port is not None and self._port.is_open:
+            self._port._ser = capture.wrap(self._port._ser)
+        return capture
+
+    def stop_capture(self):
+        """Stops the bus capture, if any, and closes its file."""
+        if self._capture is None:
+            return
+        capture, self._capture = self._capture, None
+        if self._port is not None and getattr(self._port._ser, 'capture', None) is capture:
+            self._port._ser = self._port._ser.wrapped
+        capture.close()
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # Command every wheel on the bus to a safe IDLE state before closing
+        for wheel in self._wheels.values():
+            try:
+                wheel.set_idle()
+            except Exception as e:
+                log.warning(f"Could not command wheel {wheel.wheel_addr:#04x} to IDLE on exit: {e}")
+        self.close()
+
+    def wheel(self, wheel_addr: int) -> BusWheel:
+        """Returns the handle for the wheel at wheel_addr, creating it on first use."""
+        wheel = self._wheels.get(wheel_addr)
+        if wheel is None:
+            wheel = BusWheel(self, wheel_addr)
+            self._wheels[wheel_addr] = wheel
+            if self._port is not None and self._port.is_open:
+                wheel.open()
+        return wheel
+
+    def _route(self, packet: bytes):
+        """Delivers a received packet to the handle named by its source address."""
+        wheel = self._wheels.get(packet[1])
+        if wheel is None or packet[0] != self.host_addr:
+            self.misrouted += 1
+            log.warning(f"Dropping packet from unknown address: {packet.hex(' ')}")
+            return
+        wheel._rx_packets.append(packet)
+
+    def stats(self) -> dict:
+        """
+        Returns bus utilization statistics: the fraction of wall time a
+        transaction held the bus, the fraction of line capacity used by
+        the bytes sent and received (10 bits per byte), and per-wheel
+        transaction counts, bus time and time spent waiting for the bus.
+        """
+        elapsed = time.monotonic() - self._opened_at if self._opened_at else 0.0
+        tx = self._port.tx_bytes if self._port else 0
+        rx = self._port.rx_bytes if self._port else 0
+        busy = sum(w._lock.busy_s for w in self._wheels.values())
+        return {
+            'elapsed_s': elapsed,
+            'busy_s': busy,
+            'utilization': busy / elapsed if elapsed else 0.0,
+            'tx_bytes': tx,
+            'rx_bytes': rx,
+            'line_utilization': (tx + rx) * 10 / self.baud / elapsed if elapsed else 0.0,
+            'misrouted': self.misrouted,
+            'wheels': {
+                addr: {
+                    'transactions': w._lock.transactions,
+                    'busy_s': w._lock.busy_s,
+                    'wait_s': w._lock.wait_s,
+                }
+                for addr, w in self._wheels.items()
+            },
+        }
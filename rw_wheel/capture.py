@@ -0,0 +1,420 @@
+# rw_wheel/capture.py
+"""
+Raw link capture and replay.
+
+A capture records every chunk of bytes written to and read from the
+wheel's serial port, with its perf_counter_ns() time (CLOCK_MONOTONIC on
+Linux, the clock of StampedValue and the poller), to a compact binary
+file:
+
+    with ReactionWheel(port, baud, wheel_addr, host_addr) as wheel:
+        wheel.start_capture("run.rwcap", metadata={'test': 'spin-up'})
+        ...
+
+replay() feeds a capture back through the driver's receive path (SLIP
+deframer, CRC and ACK check, READ_FILE decoders) and rebuilds the
+telemetry time series and the link error statistics, either as fast as
+possible or paced like the original run:
+
+    result = replay("run.rwcap")
+    speed = result.telemetry[EDACFile.SPEED]      # 't', 'reply_ns', 'wheel', 'value'
+    print(result.stats['crc_errors'], result.stats['commands']['READ_FILE'])
+
+    python -m rw_wheel.capture run.rwcap [--pace 1.0] [--csv speed.csv]
+
+File layout (little-endian):
+
+    header   magic, version and the length of a JSON block with the port
+             settings, addresses, start time and any user metadata
+    records  [u8 kind][i64 t_ns][u32 length][data], kind TX, RX or FLUSH
+             (input discarded with reset_input_buffer(); no data)
+
+Replay sees what was on the wire, so replies that the driver discarded
+(e.g. stale or late ones) are decoded too.
+"""
+import argparse
+import json
+import logging
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+from .driver import (
+    NSPCommand, TELEMETRY_SCHEMA, NSP_MIN_PACKET_LEN, WheelError, WheelCrcError, WheelNackError,
+    _DECODERS, _verify_reply, telemetry_file,
+)
+from .slip import SlipDeframer
+
+log = logging.getLogger(__name__)
+
+MAGIC = b'RWCAP\x00\x00\x01'
+VERSION = 1
+
+# magic, version, JSON block length
+_HEADER = struct.Struct('<8sHI')
+_RECORD = struct.Struct('<BqI')
+
+TX = 0
+RX = 1
+FLUSH = 2
+
+
+class CaptureError(Exception):
+    """Raised for malformed or incompatible capture files."""
+    pass
+
+
+# --- Writing ---
+
+class LinkCapture:
+    def __init__(self, path, metadata: dict | None = None, buffer_size: int = 1 << 16):
+        """
+        path:         file to create (overwritten if it exists)
+        metadata:     JSON-serializable dict stored in the header
+        buffer_size:  bytes buffered before a write to disk
+        """
+        self.path = path
+        self.metadata = dict(metadata or {})
+        self.buffer_size = buffer_size
+        self.records = 0
+        self.tx_bytes = 0
+        self.rx_bytes = 0
+        self._file = None
+        self._lock = threading.Lock()
+
+    def open(self):
+        self._file = open(self.path, 'wb', buffering=self.buffer_size)
+        info = json.dumps({
+            'started': time.time(),
+            'started_ns': time.perf_counter_ns(),
+            'metadata': self.metadata,
+        }).encode('utf-8')
+        self._file.write(_HEADER.pack(MAGIC, VERSION, len(info)) + info)
+        log.info(f"Capturing link traffic to '{self.path}'")
+
+    def close(self):
+        if self._file is None:
+            return
+        with self._lock:
+            self._file.close()
+            self._file = None
+        log.info(f"Capture '{self.path}' closed with {self.records} records "
+                 f"({self.tx_bytes} bytes TX, {self.rx_bytes} bytes RX).")
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def record(self, kind: int, data=b'', t_ns: int | None = None):
+        """Appends one chunk; t_ns defaults to now."""
+        if t_ns is None:
+            t_ns = time.perf_counter_ns()
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(_RECORD.pack(kind, t_ns, len(data)))
+            if data:
+                self._file.write(data)
+            self.records += 1
+            if kind == TX:
+                self.tx_bytes += len(data)
+            elif kind == RX:
+                self.rx_bytes += len(data)
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def wrap(self, ser) -> 'CapturingPort':
+        """Wraps a serial port so that its traffic is recorded here."""
+        return CapturingPort(ser, self)
+
+
+class CapturingPort:
+    """Serial port wrapper that records each chunk written and read."""
+
+    def __init__(self, ser, capture: LinkCapture):
+        self._ser = ser
+        self.capture = capture
+
+    @property
+    def wrapped(self):
+        return self._ser
+
+    @property
+    def is_open(self):
+        return self._ser.is_open
+
+    @property
+    def in_waiting(self):
+        return self._ser.in_waiting
+
+    @property
+    def timeout(self):
+        return self._ser.timeout
+
+    @timeout.setter
+    def timeout(self, value):
+        self._ser.timeout = value
+
+    def write(self, data):
+        self.capture.record(TX, data)
+        return self._ser.write(data)
+
+    def read(self, size=1):
+        data = self._ser.read(size)
+        if data:
+            self.capture.record(RX, data)
+        return data
+
+    def readinto(self, b):
+        n = self._ser.readinto(b)
+        if n:
+            self.capture.record(RX, b[:n])
+        return n
+
+    def reset_input_buffer(self):
+        self._ser.reset_input_buffer()
+        self.capture.record(FLUSH)
+
+    def close(self):
+        self._ser.close()
+
+
+# --- Reading ---
+
+def _read_header(f):
+    raw = f.read(_HEADER.size)
+    if len(raw) < _HEADER.size or raw[:8] != MAGIC:
+        raise CaptureError(f"'{f.name}' is not a link capture")
+    magic, version, info_len = _HEADER.unpack(raw)
+    if version != VERSION:
+        raise CaptureError(f"Unsupported capture version {version}")
+    return json.loads(f.read(info_len))
+
+
+def read_capture(path) -> tuple:
+    """
+    Returns (info, records) for a capture file; records is a list of
+    (kind, t_ns, data). A record cut short at the end (e.g. by a crash)
+    is dropped.
+    """
+    with open(path, 'rb') as f:
+        info = _read_header(f)
+        raw = f.read()
+    records = []
+    offset = 0
+    end = len(raw)
+    while offset + _RECORD.size <= end:
+        kind, t_ns, length = _RECORD.unpack_from(raw, offset)
+        offset += _RECORD.size
+        if offset + length > end:
+            log.warning(f"Capture '{path}' ends in a truncated record; ignoring it.")
+            break
+        records.append((kind, t_ns, raw[offset:offset + length]))
+        offset += length
+    return info, records
+
+
+# --- Replay ---
+
+class ReplayResult:
+    """
+    telemetry maps each schema file to a structured array of its READ_FILE
+    replies: 't' (seconds since the capture started), 'reply_ns'
+    (perf_counter_ns of the RX chunk), 'wheel' (source address) and
+    'value' (scaled, in the channel's dtype). stats holds the link
+    statistics (see replay()).
+    """
+
+    def __init__(self, info: dict, telemetry: dict, stats: dict):
+        self.info = info
+        self.telemetry = telemetry
+        self.stats = stats
+
+    def channel(self, file) -> np.ndarray:
+        """Time series for a channel by EDACFile, address or name."""
+        return self.telemetry[telemetry_file(file)]
+
+    def to_dataframe(self, file):
+        """One channel's time series as a pandas DataFrame."""
+        import pandas as pd
+
+        return pd.DataFrame(self.channel(file))
+
+
+def _command_name(control: int) -> str:
+    try:
+        return NSPCommand(control & 0b00011111).name
+    except ValueError:
+        return f"{control & 0b00011111:#04x}"
+
+
+def _percentile_ms(sorted_ns: list, p: float) -> float:
+    if not sorted_ns:
+        return float('nan')
+    return sorted_ns[min(len(sorted_ns) - 1, int(p / 100 * len(sorted_ns)))] / 1e6
+
+
+def replay(capture, pace: float | None = None, on_packet=None) -> ReplayResult:
+    """
+    Replays a capture (a path, or the (info, records) of read_capture()).
+
+    pace:       None replays as fast as possible; 1.0 at the recorded
+                pacing, 2.0 twice as fast and so on
+    on_packet:  called with (t_ns, packet) for every well-formed reply
+
+    stats has the byte, frame and reply counts, crc_errors, nacks, runts,
+    malformed frames and discarded bytes from the deframer, flushes, and
+    per command the requests, replies, unanswered requests and RTT
+    percentiles. A reply is paired with the latest outstanding request of
+    the same command (and, for READ_FILE, file), so a retry is timed from
+    when it was sent; the earlier requests it leaves behind count as
+    unanswered.
+    """
+    info, records = read_capture(capture) if isinstance(capture, (str, os.PathLike)) else capture
+    start_ns = info.get('started_ns', records[0][1] if records else 0)
+
+    tx_deframer = SlipDeframer()
+    rx_deframer = SlipDeframer()
+    pending = {}            # (command, file) -> request t_ns not yet answered
+    commands = {}
+    rtts = {}
+    series = {}             # file -> list of (t, reply_ns, wheel, value)
+    stats = {
+        'records': len(records), 'tx_bytes': 0, 'rx_bytes': 0, 'tx_frames': 0, 'rx_packets': 0,
+        'replies': 0, 'crc_errors': 0, 'nacks': 0, 'runts': 0, 'unmatched_replies': 0,
+        'flushes': 0, 'decode_errors': 0,
+    }
+
+    def command_stats(name):
+        entry = commands.get(name)
+        if entry is None:
+            entry = commands[name] = {'requests': 0, 'replies': 0, 'unanswered': 0}
+        return entry
+
+    wall_start = time.perf_counter()
+    first_ns = records[0][1] if records else 0
+    for kind, t_ns, data in records:
+        if pace:
+            delay = (t_ns - first_ns) / 1e9 / pace - (time.perf_counter() - wall_start)
+            if delay > 0:
+                time.sleep(delay)
+
+        if kind == FLUSH:
+            stats['flushes'] += 1
+            rx_deframer.reset()
+            continue
+
+        if kind == TX:
+            stats['tx_bytes'] += len(data)
+            for frame in tx_deframer.feed(data):
+                if len(frame) < NSP_MIN_PACKET_LEN:
+                    continue
+                stats['tx_frames'] += 1
+                name = _command_name(frame[2])
+                command_stats(name)['requests'] += 1
+                key = (name, frame[3] if name == 'READ_FILE' else None)
+                pending.setdefault(key, []).append(t_ns)
+            continue
+
+        stats['rx_bytes'] += len(data)
+        for packet in rx_deframer.feed(data):
+            if len(packet) < NSP_MIN_PACKET_LEN:
+                stats['runts'] += 1
+                continue
+            stats['rx_packets'] += 1
+            try:
+                _verify_reply(packet)
+            except WheelCrcError:
+                stats['crc_errors'] += 1
+                continue
+            except WheelNackError:
+                stats['nacks'] += 1
+                command_stats(_command_name(packet[2]))['replies'] += 1
+                continue
+            stats['replies'] += 1
+            name = _command_name(packet[2])
+            entry = command_stats(name)
+            entry['replies'] += 1
+
+            file = packet[3] if name == 'READ_FILE' and len(packet) > NSP_MIN_PACKET_LEN else None
+            waiting = pending.get((name, file))
+            if waiting:
+                rtts.setdefault(name, []).append(t_ns - waiting.pop())
+                entry['unanswered'] += len(waiting)
+                waiting.clear()
+            else:
+                stats['unmatched_replies'] += 1
+
+            if on_packet is not None:
+                on_packet(t_ns, packet)
+            if file is not None:
+                try:
+                    key = telemetry_file(file)
+                    value = _DECODERS[key].decode_from(packet)
+                except (ValueError, KeyError, WheelError):
+                    stats['decode_errors'] += 1
+                    continue
+                series.setdefault(key, []).append(((t_ns - start_ns) / 1e9, t_ns, packet[1], value))
+
+    for (name, _), waiting in pending.items():
+        command_stats(name)['unanswered'] += len(waiting)
+    for name, entry in commands.items():
+        samples = sorted(rtts.get(name, []))
+        entry['rtt_p50_ms'] = _percentile_ms(samples, 50)
+        entry['rtt_p99_ms'] = _percentile_ms(samples, 99)
+    stats['malformed_frames'] = rx_deframer.malformed
+    stats['discarded_bytes'] = rx_deframer.discarded_bytes
+    stats['duration_s'] = (records[-1][1] - first_ns) / 1e9 if records else 0.0
+    stats['replay_s'] = time.perf_counter() - wall_start
+    stats['commands'] = commands
+
+    telemetry = {}
+    for file, rows in series.items():
+        dtype = [('t', '<f8'), ('reply_ns', '<i8'), ('wheel', 'u1'), ('value', TELEMETRY_SCHEMA[file].dtype)]
+        telemetry[file] = np.array(rows, dtype=dtype)
+    return ReplayResult(info, telemetry, stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a raw link capture and summarize it.")
+    parser.add_argument("capture", nargs="+", help="capture file(s) (.rwcap)")
+    parser.add_argument("--pace", type=float, default=None,
+                        help="replay at this multiple of the recorded pacing (default: as fast as possible)")
+    parser.add_argument("--csv", help="write the telemetry of a single capture to this CSV file")
+    args = parser.parse_args()
+
+    for path in args.capture:
+        result = replay(path, pace=args.pace)
+        stats = dict(result.stats)
+        commands = stats.pop('commands')
+        print(f"{path}: {json.dumps(result.info.get('metadata', {}))}")
+        print("  " + ", ".join(f"{key}={value:.3f}" if isinstance(value, float) else f"{key}={value}"
+                               for key, value in stats.items()))
+        for name, entry in commands.items():
+            print(f"  {name:12s} " + ", ".join(f"{key}={value:.3f}" if isinstance(value, float) else f"{key}={value}"
+                                               for key, value in entry.items()))
+        for file, rows in result.telemetry.items():
+            print(f"  {TELEMETRY_SCHEMA[file].name:20s} {len(rows)} samples")
+
+    if args.csv:
+        if len(args.capture) != 1:
+            parser.error("--csv needs exactly one capture")
+        import pandas as pd
+
+        frames = [pd.DataFrame(rows).assign(channel=TELEMETRY_SCHEMA[file].name)
+                  for file, rows in result.telemetry.items()]
+        pd.concat(frames).sort_values('reply_ns').to_csv(args.csv, index=False)
+        print(f"Telemetry written to '{args.csv}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+# rw_wheel/client.py
+"""
+Client for the wheel session daemon (see daemon.py).
+
+WheelClient has the same API as ReactionWheel, but every call is a
+request to the daemon that owns the serial port, so any number of
+scripts can share one open, initialized wheel:
+
+    with WheelClient() as wheel:          # config.DAEMON_SOCKET by default
+        print(wheel.read_speed())
+        wheel.set_torque(0.01)
+
+Connecting is a Unix-socket connect, with no port setup or INIT wait.
+
+Wire format (all little-endian), one request and one reply per call:
+
+    request   [u32 body length][u16 request id][u8 op]     [body]
+    reply     [u32 body length][u16 request id][u8 status] [body]
+
+status 0 is success; otherwise the body is a UTF-8 message and the
+status names the exception (WheelTimeoutError, WheelNackError, ...),
+which the client raises again. Bodies are fixed structs per op, e.g.
+READ is [u8 file][u8 stamped] -> [f64 value][i64 sent_ns][i64 reply_ns].
+"""
+import json
+import logging
+import socket
+import struct
+import threading
+from enum import IntEnum
+
+from . import config
+from .driver import (
+    EDACFile, TelemetrySnapshot, StampedValue, TELEMETRY_SCHEMA, telemetry_file,
+    WheelError, WheelCrcError, WheelNackError, WheelTimeoutError, WheelDesyncError, WheelVerifyError,
+)
+
+log = logging.getLogger(__name__)
+
+HEADER = struct.Struct('<IHB')
+MAX_BODY = 1 << 24
+
+
+class SessionOp(IntEnum):
+    PING = 0x01
+    INIT = 0x02
+    READ = 0x03
+    READ_MANY = 0x04
+    SET_IDLE = 0x05
+    SET_SPEED_RPM = 0x06
+    SET_TORQUE = 0x07
+    SET_MOMENTUM = 0x08
+    PEEK = 0x09
+    MEMORY_CRC = 0x0A
+    STATS = 0x0B
+
+
+# Reply status codes; 0 is success
+STATUS_OK = 0
+ERROR_STATUS = {
+    WheelError: 1,
+    WheelCrcError: 2,
+    WheelNackError: 3,
+    WheelTimeoutError: 4,
+    WheelDesyncError: 5,
+    WheelVerifyError: 6,
+    ValueError: 7,
+}
+STATUS_ERRORS = {code: exc for exc, code in ERROR_STATUS.items()}
+
+# Op bodies
+READ_REQ = struct.Struct('<BB')             # file, stamped
+READ_REP = struct.Struct('<dqq')            # value, sent_ns, reply_ns
+READ_MANY_REP = struct.Struct('<ddqq')      # timestamp, skew_s, sent_ns, reply_ns; then n f64
+VALUE = struct.Struct('<d')
+PEEK_REQ = struct.Struct('<II')             # address, length
+CRC_REP = struct.Struct('<H')
+
+
+def error_status(exc: BaseException) -> int:
+    """Status code for an exception raised while serving a request."""
+    for cls in type(exc).__mro__:
+        if cls in ERROR_STATUS:
+            return ERROR_STATUS[cls]
+    return ERROR_STATUS[WheelError]
+
+
+def recv_exactly(sock, n: int) -> bytes:
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        k = sock.recv_into(view[got:])
+        if k == 0:
+            raise ConnectionError("Wheel session closed the connection.")
+        got += k
+    return bytes(buf)
+
+
+def _as_channel_type(file, value: float):
+    """Restores integer channels, which travel as f64."""
+    if TELEMETRY_SCHEMA[file].dtype.lstrip('<').startswith(('u', 'i')):
+        return int(value)
+    return value
+
+
+class WheelClient:
+    def __init__(self, path: str | None = None, timeout: float | None = 10.0,
+                 idle_on_exit: bool = False):
+        """
+        path:          the daemon's socket (default config.DAEMON_SOCKET)
+        timeout:       socket timeout in seconds for each call
+        idle_on_exit:  command IDLE when leaving a 'with' block. Off by default:
+                       the wheel is shared, and other clients may be using it.
+                       The daemon commands IDLE when it stops.
+        """
+        self.path = path or config.DAEMON_SOCKET
+        self.timeout = timeout
+        self.idle_on_exit = idle_on_exit
+        self._sock = None
+        self._opened = False
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def open(self):
+        """Connects to the daemon."""
+        with self._lock:
+            self._opened = True
+            if self._sock is None:
+                self._connect()
+
+    def close(self):
+        with self._lock:
+            self._opened = False
+            self._disconnect()
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.idle_on_exit:
+            try:
+                self.set_idle()
+            except Exception as e:
+                log.warning(f"Could not command wheel to IDLE on exit: {e}")
+        self.close()
+
+    # --- Transport ---
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        self._sock = sock
+        log.info(f"Connected to wheel session at '{self.path}'.")
+
+    def _disconnect(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def _call(self, op: SessionOp, body: bytes = b'') -> bytes:
+        """Sends one request and returns the reply body, raising the daemon's error if any."""
+        with self._lock:
+            if not self._opened:
+                raise WheelError("WheelClient is not connected")
+            if self._sock is None:
+                self._connect()
+            self._next_id = (self._next_id + 1) & 0xFFFF
+            req_id = self._next_id
+            # A call that fails part way leaves its reply (or part of it) in
+            # the stream, so the connection is dropped and the next call
+            # reconnects rather than reading a stale reply.
+            try:
+                self._sock.sendall(HEADER.pack(len(body), req_id, op) + body)
+                length, reply_id, status = HEADER.unpack(recv_exactly(self._sock, HEADER.size))
+                reply = recv_exactly(self._sock, length) if length else b''
+            except socket.timeout as e:
+                self._disconnect()
+                raise WheelTimeoutError(f"Wheel session did not answer {op.name} within {self.timeout} s") from e
+            except OSError:
+                self._disconnect()
+                raise
+            if reply_id != req_id:
+                self._disconnect()
+                raise WheelDesyncError(f"Session reply {reply_id} does not answer request {req_id}")
+        if status != STATUS_OK:
+            raise STATUS_ERRORS.get(status, WheelError)(reply.decode('utf-8', errors='replace'))
+        return reply
+
+    # --- ReactionWheel API ---
+
+    def initialize_application(self):
+        self._call(SessionOp.INIT)
+
+    def ping(self) -> str:
+        return self._call(SessionOp.PING).decode('ascii', errors='ignore')
+
+    def read(self, file, stamped: bool = False):
+        """Reads one telemetry file; see ReactionWheel.read()."""
+        file = telemetry_file(file)
+        value, sent_ns, reply_ns = READ_REP.unpack(self._call(SessionOp.READ, READ_REQ.pack(int(file), stamped)))
+        value = _as_channel_type(file, value)
+        return StampedValue(value, sent_ns, reply_ns) if stamped else value
+
+    def read_many(self, files) -> TelemetrySnapshot:
+        files = [telemetry_file(f) for f in files]
+        if len(set(files)) != len(files):
+            raise ValueError("read_many() files must be unique")
+        reply = self._call(SessionOp.READ_MANY, bytes([len(files), *map(int, files)]))
+        timestamp, skew_s, sent_ns, reply_ns = READ_MANY_REP.unpack_from(reply)
+        values = struct.unpack_from(f'<{len(files)}d', reply, READ_MANY_REP.size)
+        return TelemetrySnapshot(
+            values={f: _as_channel_type(f, v) for f, v in zip(files, values)},
+            timestamp=timestamp, skew_s=skew_s, sent_ns=sent_ns, reply_ns=reply_ns,
+        )
+
+    def read_vbus(self, stamped: bool = False):
+        return self.read(EDACFile.VBUS, stamped)
+
+    def read_speed(self, stamped: bool = False):
+        return self.read(EDACFile.SPEED, stamped)
+
+    def read_momentum(self, stamped: bool = False):
+        return self.read(EDACFile.MOMENTUM, stamped)
+
+    def read_current(self, stamped: bool = False):
+        return self.read(EDACFile.MEAUSURED_CURRENT, stamped)
+
+    def read_inertia(self, stamped: bool = False):
+        return self.read(EDACFile.INERTIA, stamped)
+
+    def read_vcc(self, stamped: bool = False):
+        return self.read(EDACFile.VCC, stamped)
+
+    def read_temperature(self, sensor_index: int, stamped: bool = False):
+        if not 0 <= sensor_index <= 3:
+            raise ValueError("sensor_index must be between 0 and 3")
+        return self.read(EDACFile(0x10 + sensor_index), stamped)
+
+    def set_idle(self):
+        self._call(SessionOp.SET_IDLE)
+
+    def set_speed_rpm(self, rpm: float):
+        self._call(SessionOp.SET_SPEED_RPM, VALUE.pack(rpm))
+
+    def set_torque(self, torque_nm: float):
+        self._call(SessionOp.SET_TORQUE, VALUE.pack(torque_nm))
+
+    def set_momentum(self, momentum_nms: float):
+        self._call(SessionOp.SET_MOMENTUM, VALUE.pack(momentum_nms))
+
+    def peek(self, address: int, length: int) -> bytes:
+        return self._call(SessionOp.PEEK, PEEK_REQ.pack(address, length))
+
+    def memory_crc(self, address: int, length: int) -> int:
+        return CRC_REP.unpack(self._call(SessionOp.MEMORY_CRC, PEEK_REQ.pack(address, length)))[0]
+
+    def stats(self) -> dict:
+        """The daemon's session stats: clients, requests, errors and per-command timeouts."""
+        return json.loads(self._call(SessionOp.STATS))
@@ -1,10 +1,16 @@
 # config.py
+import os
 
 # --- Serial Port Configuration ---
-SERIAL_PORT = "/dev/cu.usbserial-B00320NW"
+# RW_SERIAL_PORT overrides the port, e.g. to point the scripts at the emulator
+SERIAL_PORT = os.environ.get("RW_SERIAL_PORT", "/dev/cu.usbserial-B00320NW")
 BAUD_RATE = 115200
 
 # --- NSP Address Configuration ---
 WHEEL_ADDRESS = 0x20
 HOST_ADDRESS = 0x11
 
+
+# --- Session Daemon ---
+# Unix socket of the wheel session daemon (python -m rw_wheel.daemon)
+DAEMON_SOCKET = os.environ.get("RW_DAEMON_SOCKET", "/tmp/rw_wheel.sock")
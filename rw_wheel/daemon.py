@@ -0,0 +1,260 @@
+# rw_wheel/daemon.py
+"""
+Wheel session daemon.
+
+The daemon opens the serial port once, optionally sends INIT, and then
+serves any number of local client processes over a Unix domain socket.
+Scripts use client.WheelClient, which has the ReactionWheel API, so a
+telemetry logger and a test can run side by side on one warmed-up link
+instead of fighting over /dev/tty*:
+
+    python -m rw_wheel.daemon --init          # config.SERIAL_PORT, config.DAEMON_SOCKET
+    python -m rw_wheel.daemon --emulate       # against the software emulator
+
+Each client connection gets a thread. Requests from all of them go
+through the one ReactionWheel, whose lock serializes them on the wire;
+the wheel's adaptive timeouts and retries apply as usual. The request
+and reply format is described in client.py.
+
+perf_counter_ns() stamps in replies are CLOCK_MONOTONIC on Linux, the
+same clock in every process, so clients can compare them with their own.
+
+The wheel is commanded to IDLE when the daemon stops (SIGINT/SIGTERM),
+not when a client disconnects: other clients may still be using it. A
+client that moved the wheel can ask for IDLE on exit with
+WheelClient(idle_on_exit=True).
+"""
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+from . import config
+from .client import (
+    HEADER, MAX_BODY, SessionOp, STATUS_OK, READ_REQ, READ_REP, READ_MANY_REP, VALUE,
+    PEEK_REQ, CRC_REP, error_status, recv_exactly,
+)
+from .driver import ReactionWheel, telemetry_file
+
+log = logging.getLogger(__name__)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        daemon = self.server.daemon
+        sock = self.request
+        daemon._client_connected()
+        try:
+            while True:
+                try:
+                    length, req_id, op = HEADER.unpack(recv_exactly(sock, HEADER.size))
+                    if length > MAX_BODY:
+                        log.warning(f"Dropping client that sent a {length}-byte request.")
+                        return
+                    body = recv_exactly(sock, length) if length else b''
+                except (ConnectionError, OSError):
+                    return
+                status, reply = daemon.execute(op, body)
+                try:
+                    sock.sendall(HEADER.pack(len(reply), req_id, status) + reply)
+                except (ConnectionError, OSError):
+                    return
+        finally:
+            daemon._client_disconnected()
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class WheelDaemon:
+    def __init__(self, wheel: ReactionWheel, path: str | None = None):
+        """
+        wheel:  the ReactionWheel (or BusWheel) to serve; opened by start()
+        path:   socket path (default config.DAEMON_SOCKET)
+        """
+        self.wheel = wheel
+        self.path = path or config.DAEMON_SOCKET
+        self._server = None
+        self._thread = None
+        self._stats_lock = threading.Lock()
+        self.started = None
+        self.clients = 0
+        self.connections = 0
+        self.requests = 0
+        self.errors = 0
+
+    # --- Lifecycle ---
+
+    def start(self, init: bool = False):
+        """Opens the wheel, binds the socket and serves on a background thread."""
+        _claim_socket_path(self.path)
+        self.wheel.open()
+        if init:
+            self.wheel.initialize_application()
+        self._server = _Server(self.path, _Handler)
+        self._server.daemon = self
+        self.started = time.time()
+        self._thread = threading.Thread(target=self._server.serve_forever, name="WheelDaemon", daemon=True)
+        self._thread.start()
+        log.info(f"Wheel session for {self.wheel.port} serving on '{self.path}'")
+
+    def stop(self):
+        """Stops serving, commands the wheel to IDLE and closes the port."""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        try:
+            self.wheel.set_idle()
+        except Exception as e:
+            log.warning(f"Could not command wheel to IDLE on shutdown: {e}")
+        self.wheel.close()
+        log.info(f"Wheel session stopped after {self.requests} requests ({self.errors} errors).")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _client_connected(self):
+        with self._stats_lock:
+            self.clients += 1
+            self.connections += 1
+
+    def _client_disconnected(self):
+        with self._stats_lock:
+            self.clients -= 1
+
+    # --- Requests ---
+
+    def execute(self, op: int, body: bytes) -> tuple:
+        """Runs one request. Returns (status, reply body)."""
+        with self._stats_lock:
+            self.requests += 1
+        try:
+            return STATUS_OK, self._execute(SessionOp(op), body)
+        except (ValueError, struct.error, IndexError) as e:
+            # Malformed request: the client's fault, not the wheel's
+            status, message = error_status(ValueError()), str(e)
+        except Exception as e:
+            log.warning(f"Session request {op:#04x} failed: {e}")
+            status, message = error_status(e), str(e)
+        with self._stats_lock:
+            self.errors += 1
+        return status, message.encode('utf-8')
+
+    def _execute(self, op: SessionOp, body: bytes) -> bytes:
+        wheel = self.wheel
+        if op == SessionOp.READ:
+            file, _ = READ_REQ.unpack(body)
+            value, sent_ns, reply_ns = wheel.read(telemetry_file(file), stamped=True)
+            return READ_REP.pack(value, sent_ns, reply_ns)
+        if op == SessionOp.READ_MANY:
+            files = [telemetry_file(f) for f in body[1:1 + body[0]]]
+            snap = wheel.read_many(files)
+            return (READ_MANY_REP.pack(snap.timestamp, snap.skew_s, snap.sent_ns, snap.reply_ns)
+                    + struct.pack(f'<{len(files)}d', *(snap.values[f] for f in files)))
+        if op == SessionOp.SET_TORQUE:
+            wheel.set_torque(*VALUE.unpack(body))
+            return b''
+        if op == SessionOp.SET_SPEED_RPM:
+            wheel.set_speed_rpm(*VALUE.unpack(body))
+            return b''
+        if op == SessionOp.SET_MOMENTUM:
+            wheel.set_momentum(*VALUE.unpack(body))
+            return b''
+        if op == SessionOp.SET_IDLE:
+            wheel.set_idle()
+            return b''
+        if op == SessionOp.PING:
+            return wheel.ping().encode('ascii', errors='replace')
+        if op == SessionOp.INIT:
+            wheel.initialize_application()
+            return b''
+        if op == SessionOp.PEEK:
+            return wheel.peek(*PEEK_REQ.unpack(body))
+        if op == SessionOp.MEMORY_CRC:
+            return CRC_REP.pack(wheel.memory_crc(*PEEK_REQ.unpack(body)))
+        if op == SessionOp.STATS:
+            return json.dumps(self.stats()).encode('utf-8')
+        raise ValueError(f"Unsupported session op {op!r}")
+
+    def stats(self) -> dict:
+        return {
+            'port': self.wheel.port,
+            'uptime_s': time.time() - self.started if self.started else 0.0,
+            'clients': self.clients,
+            'connections': self.connections,
+            'requests': self.requests,
+            'errors': self.errors,
+            'timeouts': self.wheel.timeouts.stats(),
+        }
+
+
+def _claim_socket_path(path: str):
+    """Removes a stale socket file; refuses if a daemon is already listening there."""
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"A wheel session is already serving on '{path}'")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve one RW4-12 wheel session to local clients.")
+    parser.add_argument("--socket", default=config.DAEMON_SOCKET, help="Unix socket path")
+    parser.add_argument("--port", default=config.SERIAL_PORT, help="serial port of the wheel")
+    parser.add_argument("--baud", type=int, default=config.BAUD_RATE)
+    parser.add_argument("--wheel-addr", type=lambda s: int(s, 0), default=config.WHEEL_ADDRESS)
+    parser.add_argument("--host-addr", type=lambda s: int(s, 0), default=config.HOST_ADDRESS)
+    parser.add_argument("--init", action="store_true", help="send INIT once at startup")
+    parser.add_argument("--emulate", action="store_true", help="serve the software emulator instead of --port")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    emulator = None
+    port = args.port
+    if args.emulate:
+        from .emulator import WheelEmulator
+        emulator = WheelEmulator(wheel_addrs=(args.wheel_addr,))
+        emulator.start()
+        port = emulator.port
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    daemon = WheelDaemon(ReactionWheel(port, args.baud, args.wheel_addr, args.host_addr), args.socket)
+    daemon.start(init=args.init)
+    print(f"Wheel session serving {port} on {args.socket} (Ctrl-C to stop)")
+    try:
+        while not stop.wait(0.5):
+            pass
+    finally:
+        daemon.stop()
+        if emulator is not None:
+            emulator.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,27 +10,56 @@ high-level API for controlling the wheel.
 Author: River Dowdy
 Date: June 2025
 """
+import json
 import math
+import os
+import select
 import struct
 import serial
 import crcmod
 import time
 import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
 from enum import IntEnum
+from typing import NamedTuple
 
-# --- Protocol Constants (from E400281 Software ICD) ---
+from .slip import FEND, FESC, TFEND, TFESC, slip_encode, slip_decode, slip_decode_body, SlipDeframer
+from .instrumentation import Instrumentation
+from .timeouts import AdaptiveTimeouts, COMMAND_CLASSES, default_retry_policies
 
-# SLIP Framing Characters (ICD §4.1, Table 2)
-FEND = 0xC0  # Frame End
-FESC = 0xDB  # Frame Escape
-TFEND = 0xDC # Transposed Frame End
-TFESC = 0xDD # Transposed Frame Escape
+# --- Protocol Constants (from E400281 Software ICD) ---
 
 # CRC-16/CCITT-FALSE (ICD 5.7)
 # The C-code example in the datasheet implies a reflected (LSB-first)
 # algorithm. 'rev=True' in crcmod handles this.
 _crc_func = crcmod.mkCrcFun(0x11021, initCrc=0xFFFF, rev=True, xorOut=0x0000)
 
+# Application firmware entry point passed to INIT
+APPLICATION_START_ADDRESS = 0x20050000
+
+# Smallest valid packet: [DST][SRC][CTRL] + 2-byte CRC
+NSP_MIN_PACKET_LEN = 5
+
+# Largest data field requested in one PEEK. The request payload is a
+# 4-byte address and a 2-byte length; the reply carries the raw bytes.
+PEEK_MAX_LENGTH = 256
+
+# Largest data field written in one POKE. The request payload is a 4-byte
+# address followed by the data; the reply is an empty ACK.
+POKE_MAX_LENGTH = 256
+
+# Longest a single serial read blocks. Reply deadlines come from the
+# adaptive timeouts, so the port timeout only bounds how late a deadline
+# can be noticed; a read still returns as soon as bytes arrive.
+SERIAL_READ_TIMEOUT_S = 0.005
+
+# Per-connection receive buffer for single replies. It is allocated once
+# and filled with readinto(); it only has to hold one escaped reply frame
+# (a full PEEK reply is under 600 bytes even if every byte is escaped).
+RX_BUFFER_SIZE = 4096
+
 # NSP Commands (ICD 6.3, Table 5)
 class NSPCommand(IntEnum):
     PING = 0x00
@@ -69,6 +98,140 @@ class EDACFile(IntEnum):
      
     #add more later
 
+# --- EDAC Telemetry Schema ---
+
+class Channel(NamedTuple):
+    """How to decode and label one EDAC telemetry file."""
+    name: str            # column name used by the poller and recorder
+    fmt: str             # struct format of the raw value
+    units: str
+    scale: float = 1.0   # engineering value = raw * scale
+
+    @property
+    def dtype(self) -> str:
+        """NumPy dtype string for a column holding this channel."""
+        if self.scale != 1.0:
+            return '<f8'
+        return _NUMPY_TYPES[self.fmt]
+
+_NUMPY_TYPES = {'f': '<f4', 'd': '<f8', 'B': 'u1', 'b': 'i1', 'H': '<u2', 'h': '<i2', 'I': '<u4', 'i': '<i4'}
+
+# One row per readable file. READ_FILE replies are [FILE][value] with the
+# value in the given format; adding a channel is adding a row (or calling
+# register_channel() for an address that has no EDACFile member).
+TELEMETRY_SCHEMA = {
+    EDACFile.VBUS: Channel('vbus', 'f', 'V'),
+    EDACFile.VCC: Channel('vcc', 'f', 'V'),
+    EDACFile.MEAUSURED_CURRENT: Channel('meausured_current', 'f', 'A'),
+    EDACFile.TEMP0: Channel('temp0', 'f', '°C'),
+    EDACFile.TEMP1: Channel('temp1', 'f', '°C'),
+    EDACFile.TEMP2: Channel('temp2', 'f', '°C'),
+    EDACFile.TEMP3: Channel('temp3', 'f', '°C'),
+    EDACFile.SPEED: Channel('speed', 'f', 'rad/s'),
+    EDACFile.MOMENTUM: Channel('momentum', 'f', 'N·m·s'),
+    EDACFile.INERTIA: Channel('inertia', 'f', 'kg·m²'),
+    EDACFile.HALL_DIGITAL: Channel('hall_digital', 'I', ''),
+}
+
+class _Decoder:
+    """Precompiled READ_FILE reply decoder for one channel."""
+    __slots__ = ('file', 'channel', 'struct', 'scale')
+
+    def __init__(self, file: int, channel: Channel):
+        self.file = file
+        self.channel = channel
+        self.struct = struct.Struct('<B' + channel.fmt)
+        self.scale = channel.scale
+
+    def decode(self, reply: bytes):
+        """Decodes a [FILE][value] payload."""
+        return self.decode_from(reply, 0, 0)
+
+    def decode_from(self, buffer, offset: int = 3, trailer: int = 2):
+        """
+        Decodes the payload in place from a buffer holding more than it,
+        by default a whole reply packet ([DST][SRC][CTRL] before, CRC after).
+        """
+        if len(buffer) != offset + self.struct.size + trailer:
+            raise WheelError(f"Reply for file {self.file:#04x} has the wrong length: {len(buffer)} bytes.")
+        file_addr, value = self.struct.unpack_from(buffer, offset)
+        if file_addr != self.file:
+            raise WheelError(f"Wheel replied with wrong file! Expected {self.file}, got {file_addr}")
+        return value * self.scale if self.scale != 1.0 else value
+
+_DECODERS = {file: _Decoder(file, channel) for file, channel in TELEMETRY_SCHEMA.items()}
+
+def telemetry_file(file) -> int:
+    """
+    Normalizes a channel reference (EDACFile, address or channel name) to
+    its schema key: the EDACFile member where there is one, else the int.
+    """
+    if isinstance(file, str):
+        for key, channel in TELEMETRY_SCHEMA.items():
+            if channel.name == file:
+                return key
+        raise ValueError(f"No telemetry channel named '{file}'")
+    try:
+        key = EDACFile(file)
+    except ValueError:
+        key = int(file)
+    if key not in TELEMETRY_SCHEMA:
+        raise ValueError(f"EDAC file {int(key):#04x} is not in the telemetry schema")
+    return key
+
+def register_channel(file_addr: int, name: str, fmt: str = 'f', units: str = '', scale: float = 1.0):
+    """
+    Adds (or replaces) a readable telemetry file in the schema. fmt is a
+    single struct code with a numpy equivalent (one of _NUMPY_TYPES).
+    """
+    if fmt not in _NUMPY_TYPES:
+        raise ValueError(f"Unsupported channel format {fmt!r}; expected one of {''.join(_NUMPY_TYPES)}")
+    try:
+        key = EDACFile(file_addr)
+    except ValueError:
+        key = int(file_addr)
+    channel = Channel(name, fmt, units, scale)
+    TELEMETRY_SCHEMA[key] = channel
+    _DECODERS[key] = _Decoder(key, channel)
+    return key
+
+class StampedValue(NamedTuple):
+    """
+    A telemetry value with the time.perf_counter_ns() instants at which
+    its request was sent and its reply arrived. The wheel sampled the
+    value somewhere in between; mid_ns is the usual estimate.
+    """
+    value: float
+    sent_ns: int
+    reply_ns: int
+
+    @property
+    def mid_ns(self) -> int:
+        return (self.sent_ns + self.reply_ns) // 2
+
+@dataclass(frozen=True)
+class TelemetrySnapshot:
+    """
+    A set of EDAC file values read together by ReactionWheel.read_many().
+    timestamp is the host wall-clock time of the first reply; skew_s is
+    the time between the first and the last reply arriving. sent_ns and
+    reply_ns are time.perf_counter_ns() when the requests were written
+    and when the last reply arrived.
+    """
+    values: dict
+    timestamp: float
+    skew_s: float
+    sent_ns: int = 0
+    reply_ns: int = 0
+
+    @property
+    def mid_ns(self) -> int:
+        """Midpoint estimate of when the wheel sampled the values."""
+        return (self.sent_ns + self.reply_ns) // 2
+
+    def __getitem__(self, file) -> float:
+        return self.values[telemetry_file(file)]
+
 # --- Custom Exceptions for Error Handling ---
 class WheelError(Exception):
     """Base exception for all wheel-related errors."""
@@ -82,65 +245,226 @@ class WheelNackError(WheelError):
     """Raised when the wheel responds with a NACK (Negative Acknowledgement)."""
     pass
 
-# SLIP Encoding/Decoding Helper Functions
-def _slip_encode(data: bytes) -> bytes:
+class WheelTimeoutError(WheelError):
+    """Raised when no valid reply arrives before the transaction deadline."""
+    pass
 
-    #Note to self: Remove After Testing
-    # out = bytearray([FEND, FEND, FEND, FEND])
-    out = bytearray([FEND])
-    
-    for byte in data:
-        if byte == FEND:
-            out.extend([FESC, TFEND])
-        elif byte == FESC:
-            out.extend([FESC, TFESC])
-        else:
-            out.append(byte)
-    out.append(FEND)
-    return bytes(out)
+class WheelDesyncError(WheelError):
+    """Raised when a reply answers a different request, e.g. a late reply to an earlier one."""
+    pass
 
-def _slip_decode(frame: bytes) -> bytes | None:
-    if not frame.startswith(FEND.to_bytes(1, 'little')) or not frame.endswith(FEND.to_bytes(1, 'little')):
-        return None
-    
-    # Strip FEND bytes
-    data = frame[1:-1]
-    decoded = bytearray()
-    i = 0
-    while i < len(data):
-        if data[i] == FESC:
-            i += 1
-            if data[i] == TFEND:
-                decoded.append(FEND)
-            elif data[i] == TFESC:
-                decoded.append(FESC)
-        else:
-            decoded.append(data[i])
-        i += 1
-    return bytes(decoded)
+class WheelVerifyError(WheelError):
+    """Raised when the wheel's CRC of uploaded or dumped memory does not match the host's."""
+    pass
+
+# SLIP Encoding/Decoding Helper Functions
+# The codec lives in slip.py; these names are kept for existing callers.
+_slip_encode = slip_encode
+_slip_decode = slip_decode
 
 log = logging.getLogger(__name__)
 
+
+class _HexDump:
+    """
+    Log argument that renders bytes as hex only if the record is emitted,
+    e.g. log.debug("TX > %s", _HexDump(frame)). The bytes are copied, so
+    a reused receive buffer can be logged safely.
+    """
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = bytes(data)
+
+    def __str__(self):
+        return self.data.hex(' ')
+
+
+def _verify_reply(packet: bytes):
+    """
+    Validates a decoded reply packet's length, CRC and ACK bit without
+    copying or slicing it.
+    """
+    if len(packet) < NSP_MIN_PACKET_LEN:
+        raise WheelError(f"Reply packet is too short: {len(packet)} bytes.")
+
+    # Check CRC. The CRC is reflected with no final XOR, so running it over
+    # the body followed by its own little-endian CRC leaves a residue of 0.
+    if _crc_func(packet) != 0:
+        calculated_crc = _crc_func(packet[:-2]).to_bytes(2, 'little')
+        raise WheelCrcError(f"CRC mismatch! Got {packet[-2:].hex()}, expected {calculated_crc.hex()}")
+
+    # Check for NACK
+    # The ACK bit (Bit 5) in the control byte (3rd byte) must be 1.
+    if not (packet[2] & 0b00100000):
+        raise WheelNackError("Wheel responded with NACK (command failed).")
+
+def _check_reply(packet: bytes) -> bytes:
+    """
+    Validates a decoded reply packet's length, CRC and ACK bit.
+    Returns the data payload (everything between [DST][SRC][CTRL] and the CRC).
+    """
+    _verify_reply(packet)
+    return packet[3:-2]
+
+def _describe_frame(frame: bytes) -> str:
+    """
+    Names a request frame for instrumentation: the command, plus the EDAC
+    file for READ_FILE / WRITE_FILE (e.g. "READ_FILE:SPEED").
+    """
+    packet = _slip_decode(frame)
+    try:
+        name = NSPCommand(packet[2] & 0b00011111).name
+    except (TypeError, IndexError, ValueError):
+        return "UNKNOWN"
+    if name in ('READ_FILE', 'WRITE_FILE') and len(packet) > 5:
+        try:
+            return f"{name}:{EDACFile(packet[3]).name}"
+        except ValueError:
+            return f"{name}:{packet[3]:#04x}"
+    return name
+
+class _CommandTemplate:
+    """
+    Pre-built WRITE_FILE packet for a COMMAND_VALUE write in one mode.
+    Only the 4-byte float and the CRC change between calls, and the CRC
+    over the fixed header is computed once and continued from there.
+    """
+    _VALUE = struct.Struct('<f')
+    _VALUE_OFFSET = 5   # [DST][SRC][CTRL][FILE][MODE]
+
+    def __init__(self, wheel_addr: int, host_addr: int, mode: WheelMode):
+        control_byte = 0b10000000 | NSPCommand.WRITE_FILE.value
+        header = bytes([wheel_addr, host_addr, control_byte, EDACFile.COMMAND_VALUE, mode])
+        self._header_crc = _crc_func(header)
+        self._packet = bytearray(header + bytes(self._VALUE.size + 2))
+
+    def frame(self, value: float) -> bytes:
+        """Returns the SLIP-encoded frame commanding the given value."""
+        packet = self._packet
+        start = self._VALUE_OFFSET
+        end = start + self._VALUE.size
+        value_bytes = self._VALUE.pack(value)
+        packet[start:end] = value_bytes
+        crc = _crc_func(value_bytes, self._header_crc)
+        packet[end] = crc & 0xFF
+        packet[end + 1] = crc >> 8
+        return _slip_encode(packet)
+
+class _WheelProtocol:
+    """
+    Request framing shared by the synchronous and asyncio drivers.
+    Subclasses set wheel_addr and host_addr; no I/O happens here.
+    """
+
+    def _build_frame(self, command: NSPCommand, payload: bytes = b'') -> bytes:
+        """
+        Builds the NSP packet for a command and returns it SLIP-encoded.
+        """
+        return _slip_encode(self._build_packet(command, payload))
+
+    def _build_packet(self, command: NSPCommand, payload: bytes = b'') -> bytes:
+        """
+        Builds the NSP packet (header, payload and CRC) for a command.
+        """
+        # Control byte: Bit 7=Poll, Bit 5=ACK. In this case we always set Poll to get a reply.
+        control_byte = 0b10000000 | command.value
+
+        # Packet body for CRC calculation (ICD 5.7)
+        packet_body = struct.pack(
+            '<BB', self.wheel_addr, self.host_addr
+        ) + control_byte.to_bytes(1, 'little') + payload
+
+        crc = _crc_func(packet_body).to_bytes(2, 'little')
+        return packet_body + crc
+
+    def _build_frame_cache(self):
+        """
+        Pre-builds the request frames that never change for this
+        (wheel_addr, host_addr) pair, plus templates for the
+        parameterized command writes.
+        """
+        self._read_frames = {
+            file: self._build_frame(NSPCommand.READ_FILE, int(file).to_bytes(1, 'little'))
+            for file in TELEMETRY_SCHEMA
+        }
+        self._ping_frame = self._build_frame(NSPCommand.PING)
+        self._idle_frame = self._build_frame(
+            NSPCommand.WRITE_FILE,
+            struct.pack('<BBf', EDACFile.COMMAND_VALUE, WheelMode.IDLE, 0.0)
+        )
+        self._command_templates = {
+            mode: _CommandTemplate(self.wheel_addr, self.host_addr, mode)
+            for mode in WheelMode
+        }
+
+    def _read_frame(self, file) -> bytes:
+        """The cached READ_FILE frame for a schema key (built on first use)."""
+        frame = self._read_frames.get(file)
+        if frame is None:
+            frame = self._read_frames[file] = self._build_frame(
+                NSPCommand.READ_FILE, int(file).to_bytes(1, 'little'))
+        return frame
+
+
 # --- The Main Driver Class ---
-class ReactionWheel:
-    def __init__(self, port, baud, wheel_addr, host_addr):
+class ReactionWheel(_WheelProtocol):
+    # Whether single replies may bypass the deframer and packet queue
+    # (see _receive_into); off where received packets must be routed
+    _zero_copy_rx = True
+
+    def __init__(self, port, baud, wheel_addr, host_addr,
+                 timeouts: AdaptiveTimeouts | None = None, retry_policies: dict | None = None):
+        """
+        timeouts:        reply timeout estimator (see timeouts.py); one per wheel by default
+        retry_policies:  RetryPolicy per command class ('read', 'write', 'init');
+                         reads are retried by default, writes only if configured
+        """
         self.port = port
         self.baud = baud
         self.wheel_addr = wheel_addr
         self.host_addr = host_addr
+        self.timeouts = timeouts or AdaptiveTimeouts()
+        self.retry_policies = default_retry_policies()
+        self.retry_policies.update(retry_policies or {})
         self.ser = None
+        # Receive state persists across transactions so that bytes arriving
+        # after one reply (or ahead of the next) are not lost.
+        self._deframer = SlipDeframer()
+        self._rx_packets = deque()
+        self._rx_runts = 0      # runt frames dropped by _receive_packet()
+        # Single replies are read into this buffer and checked and decoded
+        # in place (see _receive_into)
+        self._rx_buf = bytearray(RX_BUFFER_SIZE)
+        self._rx_view = memoryview(self._rx_buf)
+        self._rx_fd = None
+        # Serializes transactions so a background poller and commanding
+        # code can share one wheel.
+        self._lock = threading.RLock()
+        # Per-transaction timing; None means disabled (see enable_instrumentation)
+        self._instrument = None
+        # Raw link capture; None means disabled (see start_capture)
+        self._capture = None
         
     def open(self):
         """Opens the serial port to communicate with the wheel."""
         if self.ser is None or not self.ser.is_open:
-            self.ser = serial.Serial(self.port, self.baud, timeout=1.0)
-        print(f"Serial port {self.port} opened successfully.")
+            self.ser = serial.Serial(self.port, self.baud, timeout=SERIAL_READ_TIMEOUT_S)
+            if self._capture is not None:
+                self.ser = self._capture.wrap(self.ser)
+        # pyserial's readinto() reads into a temporary and copies; on POSIX,
+        # bytes already waiting are read straight into the RX buffer instead.
+        # (A capturing port has no fd, so captured reads go through it.)
+        self._rx_fd = getattr(self.ser, 'fd', None) if hasattr(os, 'readv') else None
+        self._build_frame_cache()
+        log.info(f"Serial port {self.port} opened successfully.")
 
     def close(self):
-        """Closes the serial port."""
+        """Closes the serial port (and ends any link capture)."""
         if self.ser and self.ser.is_open:
             self.ser.close()
-            print(f"Serial port {self.port} closed.")
+            log.info(f"Serial port {self.port} closed.")
+        self.stop_capture()
 
     # Context manager methods for 'with' statement
     def __enter__(self):
@@ -150,246 +474,524 @@ class ReactionWheel:
     def __exit__(self, exc_type, exc_val, exc_tb):
         # Always try to command the wheel to a safe IDLE state on exit
         try:
-            print("Ensuring wheel is in safe IDLE state...")
+            log.info("Ensuring wheel is in safe IDLE state...")
             self.set_idle()
         except Exception as e:
-            print(f"Warning: Could not command wheel to IDLE on exit: {e}")
+            log.warning(f"Could not command wheel to IDLE on exit: {e}")
         self.close()
 
+    # --- Link capture ---
+
+    def start_capture(self, path, metadata: dict | None = None):
+        """
+        Starts recording every chunk written to and read from the port,
+        with its perf_counter_ns() time, to a capture file (see capture.py).
+        Can be called before or after open(); close() ends the capture.
+        Returns the LinkCapture.
+        """
+        from .capture import LinkCapture
+
+        with self._lock:
+            self.stop_capture()
+            capture = LinkCapture(path, {
+                'port': self.port, 'baud': self.baud,
+                'wheel_addr': self.wheel_addr, 'host_addr': self.host_addr,
+                **(metadata or {}),
+            })
+            capture.open()
+            self._capture = capture
+            if self.ser is not None and self.ser.is_open:
+                self.ser = capture.wrap(self.ser)
+                self._rx_fd = None
+        return capture
+
+    def stop_capture(self):
+        """Stops the link capture, if any, and closes its file."""
+        with self._lock:
+            if self._capture is None:
+                return
+            capture, self._capture = self._capture, None
+            if getattr(self.ser, 'capture', None) is capture:
+                self.ser = self.ser.wrapped
+                self._rx_fd = getattr(self.ser, 'fd', None) if hasattr(os, 'readv') else None
+            capture.close()
+
+    # --- Instrumentation ---
+
+    def enable_instrumentation(self, hooks=()) -> Instrumentation:
+        """
+        Starts timing every transaction phase by phase. Each hook is called
+        with a TransactionRecord after every transaction.
+        """
+        if self._instrument is None:
+            self._instrument = Instrumentation(hooks)
+        else:
+            self._instrument.hooks.extend(hooks)
+        return self._instrument
+
+    def disable_instrumentation(self):
+        """Stops timing transactions and discards the collected stats."""
+        self._instrument = None
+
+    def stats(self) -> dict:
+        """
+        Returns per-command / per-EDACFile latency histograms and outcome
+        counters (see instrumentation.Instrumentation.stats). Empty if
+        instrumentation is disabled.
+        """
+        return self._instrument.stats() if self._instrument is not None else {}
+
+    def _instrumented(self, key: str, phases: dict, exchange, *args):
+        """Runs exchange(*args, phases) and records its timing and outcome."""
+        outcome = 'error'
+        start = time.perf_counter_ns()
+        try:
+            result = exchange(*args, phases)
+            outcome = 'ok'
+            return result
+        except WheelTimeoutError:
+            outcome = 'timeout'
+            raise
+        except WheelCrcError:
+            outcome = 'crc_error'
+            raise
+        except WheelNackError:
+            outcome = 'nack'
+            raise
+        finally:
+            phases['total'] = time.perf_counter_ns() - start + phases.get('build', 0) + phases.get('encode', 0)
+            self._instrument.record(key, outcome, phases)
+
+    # --- Transactions ---
+
     def _send_and_receive(self, command: NSPCommand, payload: bytes = b''):
         """
-        Handles the full send-and-receive logic for a command.
-        1. Builds the NSP packet.
-        2. SLIP-encodes it.
-        3. Sends it.
-        4. Waits for the reply.
-        5. SLIP-decodes the reply.
-        6. Validates the reply's CRC and ACK bit.
-        7. Returns the reply's data payload.
+        Builds, sends and validates a one-off command.
+        Returns the reply's data payload.
         """
+        if self._instrument is None:
+            return self._transact(self._build_frame(command, payload), command)
 
-        # 1. Build the NSP Packet
-        # Control byte: Bit 7=Poll, Bit 5=ACK. In this case we always set Poll to get a reply.
-        control_byte = 0b10000000 | command.value
-        
-        # Packet body for CRC calculation (ICD 5.7)
-        packet_body = struct.pack(
-            '<BB', self.wheel_addr, self.host_addr
-        ) + control_byte.to_bytes(1, 'little') + payload
-        
-        crc = _crc_func(packet_body).to_bytes(2, 'little')
-        full_packet = packet_body + crc
-        
-        # 2. SLIP-encode and send
-        frame_to_send = _slip_encode(full_packet)
-        self.ser.write(frame_to_send)
+        t0 = time.perf_counter_ns()
+        packet = self._build_packet(command, payload)
+        t1 = time.perf_counter_ns()
+        frame = _slip_encode(packet)
+        t2 = time.perf_counter_ns()
+        return self._transact(frame, command, phases={'build': t1 - t0, 'encode': t2 - t1})
 
-        # Debug logging
-        log.debug(f"TX > Raw packet: {full_packet.hex(' ')}")
-        log.debug(f"TX > SLIP-encoded frame: {frame_to_send.hex(' ')}")
-        
-        # 3. Wait for and decode the reply
-        start_time = time.time()
-        frame_received = bytearray()
+    def _transact(self, frame_to_send: bytes, command: NSPCommand, file_addr: int | None = None,
+                  phases: dict | None = None, stamps: list | None = None,
+                  decoder: _Decoder | None = None):
+        """
+        Handles the full send-and-receive logic for a pre-built frame.
+        1. Sends the SLIP-encoded frame.
+        2. Waits for the reply, up to the command's adaptive timeout.
+        3. Validates the reply's CRC and ACK bit (and, for READ_FILE,
+           that it carries `file_addr`).
+        4. Returns the reply's data payload, or the value decoded from it
+           by `decoder`.
+        Timeouts, CRC errors and mismatched replies are retried per the
+        command class's RetryPolicy. If `stamps` is given, the
+        perf_counter_ns() send and reply instants are appended to it.
+        """
+        key = command.name
+        inst = self._instrument
+        if inst is None:
+            return self._with_retries(key, COMMAND_CLASSES.get(key, 'write'), lambda timeout, first: self._exchange(
+                frame_to_send, command, key, timeout, first, file_addr, stamps, decoder, None))
+
+        inst_key = inst.key_for(frame_to_send, _describe_frame)
+        return self._with_retries(key, COMMAND_CLASSES.get(key, 'write'), lambda timeout, first: self._instrumented(
+            inst_key, dict(phases or {}) if first else {}, self._exchange,
+            frame_to_send, command, key, timeout, first, file_addr, stamps, decoder))
+
+    def _with_retries(self, key: str, command_class: str, attempt):
+        """
+        Calls attempt(timeout, first_attempt) until it succeeds or the
+        class's retries are used up. NACKs are not retried: the wheel
+        received the request and refused it.
+        """
+        policy = self.retry_policies[command_class]
+        tries = 0
+        while True:
+            try:
+                return attempt(self.timeouts.timeout(key, policy.min_timeout_s), tries == 0)
+            except (WheelTimeoutError, WheelCrcError, WheelDesyncError) as e:
+                tries += 1
+                if tries > policy.retries:
+                    raise
+                log.warning(f"{key} failed ({e}); retry {tries}/{policy.retries}.")
+                delay = policy.delay(tries)
+                if delay > 0:
+                    time.sleep(delay)
+
+    def _exchange(self, frame_to_send: bytes, command: int, key: str, timeout: float, sample: bool,
+                  file_addr: int | None, stamps: list | None, decoder: _Decoder | None,
+                  phases: dict | None):
+        """
+        One request/reply exchange; fills `phases` with timings if given.
+        The round-trip time is fed to the adaptive timeouts if `sample`.
+
+        Uninstrumented exchanges with nothing else buffered receive the
+        reply into the connection's RX buffer and check and decode it
+        there, under the lock; only the payload (or decoded value) is
+        handed back.
+        """
+        with self._lock:
+            self._discard_stale_packets()
+            zero_copy = phases is None and self._zero_copy_rx and self._deframer.idle
+            sent_ns = time.perf_counter_ns()
+            if phases is None:
+                self.ser.write(frame_to_send)
+            else:
+                t0 = time.perf_counter_ns()
+                self.ser.write(frame_to_send)
+                phases['write'] = time.perf_counter_ns() - t0
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("TX > SLIP-encoded frame: %s", _HexDump(frame_to_send))
+
+            # Wait for and decode the reply
+            try:
+                if zero_copy:
+                    packet_received = self._receive_into(time.monotonic() + timeout)
+                else:
+                    packet_received = self._receive_packet(time.monotonic() + timeout, phases)
+            except WheelTimeoutError:
+                self.timeouts.timed_out(key)
+                self._flush_input()
+                raise
+            reply_ns = time.perf_counter_ns()
+
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("RX < Raw packet: %s", _HexDump(packet_received))
+
+            try:
+                if phases is None:
+                    _verify_reply(packet_received)
+                else:
+                    t0 = time.perf_counter_ns()
+                    try:
+                        _verify_reply(packet_received)
+                    finally:
+                        phases['check'] = time.perf_counter_ns() - t0
+            except WheelCrcError:
+                # Whatever follows a corrupted frame is suspect too
+                self._flush_input()
+                raise
+            except WheelNackError:
+                self._check_command(packet_received, command)
+                raise
+            self._check_command(packet_received, command)
+            if file_addr is not None and (len(packet_received) < 6 or packet_received[3] != file_addr):
+                self._flush_input()
+                raise WheelDesyncError(
+                    f"Reply is for file {packet_received[3:-2][:1].hex() or 'none'}, expected {file_addr:#04x}")
+            # The packet may still be a view of the RX buffer; decode or copy
+            # the payload before the lock lets the next transaction reuse it.
+            if decoder is not None:
+                reply = decoder.decode_from(packet_received)
+            else:
+                reply = bytes(packet_received[3:-2])
+
+        if sample:
+            self.timeouts.observe(key, (reply_ns - sent_ns) / 1e9)
+        if stamps is not None:
+            stamps += (sent_ns, reply_ns)
+        return reply
 
-        while time.time() - start_time < 1.0:      # 1‑s overall timeout
-            byte = self.ser.read(1)
-            if not byte:
+    def _check_command(self, packet, command: int):
+        """
+        Raises WheelDesyncError, after flushing input, if `packet` answers
+        a command other than `command`, e.g. a late reply to an earlier
+        request. Reads are retried; writes fail rather than take it as
+        their ACK.
+        """
+        if packet[2] & 0b00011111 != command:
+            self._flush_input()
+            raise WheelDesyncError(
+                f"Reply is to command {packet[2] & 0b00011111:#04x}, expected {NSPCommand(command).name}")
+
+    def _flush_input(self):
+        """Drops all buffered input: OS buffer, partial frame and queued packets."""
+        self.ser.reset_input_buffer()
+        self._deframer.reset()
+        self._rx_packets.clear()
+
+    def _discard_stale_packets(self):
+        """Drops complete frames left over from a previous transaction."""
+        if self._rx_packets:
+            log.warning(f"Discarding {len(self._rx_packets)} stale reply frame(s).")
+            self._rx_packets.clear()
+
+    def _receive_packet(self, deadline: float, phases: dict | None = None) -> bytes:
+        """
+        Returns the next decoded packet from the wheel.
+        Each read takes everything already buffered by the OS (or blocks
+        for the first byte) and hands the whole chunk to the deframer.
+        If `phases` is given, the wait for the first reply bytes and the
+        time spent deframing are added to it.
+        """
+        if phases is not None:
+            waiting_since = time.perf_counter_ns()
+        while not self._rx_packets:
+            if time.monotonic() >= deadline:
+                raise WheelTimeoutError("Timeout: No valid SLIP frame received.")
+            chunk = self.ser.read(self.ser.in_waiting or 1)
+            if chunk:
+                if phases is None:
+                    packets = self._deframer.feed(chunk)
+                else:
+                    t0 = time.perf_counter_ns()
+                    if 'first_byte' not in phases:
+                        phases['first_byte'] = t0 - waiting_since
+                    packets = self._deframer.feed(chunk)
+                    phases['deframe'] = phases.get('deframe', 0) + time.perf_counter_ns() - t0
+                for packet in packets:
+                    # Line noise between two FENDs can decode to a runt that
+                    # cannot even hold the header and CRC; it is not a reply.
+                    if len(packet) < NSP_MIN_PACKET_LEN:
+                        self._rx_runts += 1
+                        log.debug(f"RX < Ignoring {len(packet)}-byte runt frame.")
+                        continue
+                    self._accept_packet(packet)
+        return self._rx_packets.popleft()
+
+    def _accept_packet(self, packet: bytes):
+        """Queues a received packet as a reply for this wheel."""
+        self._rx_packets.append(packet)
+
+    def _receive_into(self, deadline: float) -> memoryview:
+        """
+        Zero-copy counterpart of _receive_packet() for a single reply.
+        Reads into the preallocated RX buffer (see open()) and finds
+        the frame in place. An unescaped reply (the usual case) is
+        returned as a memoryview of the buffer, valid until the next
+        transaction; one with escapes is decoded to bytes. Anything after
+        the reply is handed to the deframer for the next transaction.
+        """
+        buf = self._rx_buf
+        view = self._rx_view
+        n = 0           # bytes in buf
+        start = -1      # index of the FEND opening the current frame
+        while True:
+            if time.monotonic() >= deadline:
+                raise WheelTimeoutError("Timeout: No valid SLIP frame received.")
+            if n == RX_BUFFER_SIZE:
+                # No reply fits; drop it all rather than grow
+                log.debug(f"RX < Dropping {n} bytes that overflowed the receive buffer.")
+                n, start = 0, -1
+            waiting = self.ser.in_waiting
+            if self._rx_fd is not None:
+                if not waiting:
+                    # Wait for the first byte on the fd itself, like the
+                    # serial timeout, instead of a pyserial read that copies
+                    wait_s = min(SERIAL_READ_TIMEOUT_S, max(deadline - time.monotonic(), 0.0))
+                    select.select((self._rx_fd,), (), (), wait_s)
+                    continue
+                got = os.readv(self._rx_fd, (view[n:min(n + waiting, RX_BUFFER_SIZE)],))
+            else:
+                # Blocks up to SERIAL_READ_TIMEOUT_S for the first byte
+                got = self.ser.readinto(view[n:min(n + (waiting or 1), RX_BUFFER_SIZE)])
+            if not got:
                 continue
-            frame_received += byte
-            if byte[0] == FEND and len(frame_received) > 1:
-                # got a closing FEND and non‑empty body → candidate frame
-                packet_received = _slip_decode(frame_received)
-                if packet_received is not None:     # valid SLIP
+            if start < 0:
+                start = buf.find(FEND, n, n + got)
+                if start < 0:
+                    # Tail of a frame we never saw start
+                    continue
+            n += got
+
+            while True:
+                end = buf.find(FEND, start + 1, n)
+                if end < 0:
                     break
-                frame_received = bytearray()        # else keep hunting
-        else:
-            raise WheelError("Timeout: No valid SLIP frame received.")
-        
-        # Log the received frame
-        log.debug(f"RX < Received frame: {frame_received.hex(' ')}")
-        
-        packet_received = _slip_decode(frame_received)
-        # Check and log the received packet
-        if packet_received:
-            log.debug(f"RX < Raw packet: {packet_received.hex(' ')}")
-        else:
-            log.warning("Received an invalid SLIP frame.") # Use log.warning
-            raise WheelError("Received an invalid SLIP frame.")
+                body = view[start + 1:end]
+                if buf.find(FESC, start + 1, end) >= 0:
+                    body = slip_decode_body(body)
+                # Line noise between two FENDs can decode to a runt that
+                # cannot even hold the header and CRC; it is not a reply.
+                if body is not None and len(body) >= NSP_MIN_PACKET_LEN:
+                    if end + 1 < n:
+                        for packet in self._deframer.feed(view[end:n]):
+                            if len(packet) >= NSP_MIN_PACKET_LEN:
+                                self._accept_packet(packet)
+                    return body
+                # The closing FEND may also open the next frame
+                start = end
 
-        # --- 4. Validate the reply ---
-        # Separate the received packet into its body and CRC 
-        if len(packet_received) < 5:
-            raise WheelError(f"Reply packet is too short: {len(packet_received)} bytes.")
-        
-        received_body = packet_received[:-2]
-        received_crc = packet_received[-2:]
-        
-        # Check CRC
-        calculated_crc = _crc_func(received_body).to_bytes(2, 'little')
-        if received_crc != calculated_crc:
-            raise WheelCrcError(f"CRC mismatch! Got {received_crc.hex()}, expected {calculated_crc.hex()}")
-        
-        # Check for NACK
-        # The ACK bit (Bit 5) in the control byte (3rd byte) must be 1.
-        reply_control_byte = received_body[2]
-        if not (reply_control_byte & 0b00100000):
-            raise WheelNackError("Wheel responded with NACK (command failed).")
-            
-        # 5. Return the data payload
-        return received_body[3:] # Everything after [DST][SRC][CTRL]
+    # --- High-Level API ---
 
+    def read_many(self, files) -> TelemetrySnapshot:
+        """
+        Reads several EDAC files in one pipelined exchange.
+        All READ_FILE requests are written back to back, then the replies
+        are matched to their request by the file address they carry, so
+        N channels cost roughly one round trip instead of N.
+        """
+        files = [telemetry_file(f) for f in files]
+        if len(set(files)) != len(files):
+            raise ValueError("read_many() files must be unique")
 
-    # --- High-Level API ---
+        if self._instrument is None:
+            return self._with_retries('READ_MANY', 'read', lambda timeout, first: self._exchange_many(
+                files, timeout, first, None))
+        return self._with_retries('READ_MANY', 'read', lambda timeout, first: self._instrumented(
+            'READ_MANY', {}, self._exchange_many, files, timeout, first))
+
+    def _exchange_many(self, files: list, timeout: float, sample: bool,
+                       phases: dict | None) -> TelemetrySnapshot:
+        """The pipelined exchange behind read_many()."""
+        values = {}
+        first_reply = last_reply = None
+        timestamp = None
+        with self._lock:
+            self._discard_stale_packets()
+            request = b''.join(self._read_frame(f) for f in files)
+            sent_ns = time.perf_counter_ns()
+            if phases is None:
+                self.ser.write(request)
+            else:
+                t0 = time.perf_counter_ns()
+                self.ser.write(request)
+                phases['write'] = time.perf_counter_ns() - t0
+            deadline = time.monotonic() + timeout
+
+            try:
+                while len(values) < len(files):
+                    packet = self._receive_packet(deadline, phases)
+                    last_reply = time.perf_counter_ns()
+                    if first_reply is None:
+                        first_reply = last_reply
+                        timestamp = time.time()
+
+                    if phases is None:
+                        reply = _check_reply(packet)
+                    else:
+                        t0 = time.perf_counter_ns()
+                        reply = _check_reply(packet)
+                        phases['check'] = phases.get('check', 0) + time.perf_counter_ns() - t0
+                    file_addr = reply[0] if reply else None
+                    if file_addr not in files or file_addr in values:
+                        log.warning("Ignoring unexpected reply %s in read_many().", _HexDump(reply))
+                        continue
+                    values[file_addr] = _DECODERS[file_addr].decode(reply)
+            except WheelTimeoutError:
+                self.timeouts.timed_out('READ_MANY')
+                self._flush_input()
+                raise
+            except WheelCrcError:
+                self._flush_input()
+                raise
+
+        if sample:
+            self.timeouts.observe('READ_MANY', (last_reply - sent_ns) / 1e9)
+
+        return TelemetrySnapshot(
+            values={f: values[f] for f in files},
+            timestamp=timestamp,
+            skew_s=(last_reply - first_reply) / 1e9,
+            sent_ns=sent_ns,
+            reply_ns=last_reply,
+        )
+
+    def read(self, file, stamped: bool = False):
+        """
+        Reads one telemetry file from TELEMETRY_SCHEMA (by EDACFile, address
+        or channel name) and returns its scaled value, or a StampedValue if
+        `stamped`.
+        """
+        file = telemetry_file(file)
+        stamps = [] if stamped else None
+        value = self._transact(self._read_frame(file), NSPCommand.READ_FILE, int(file), stamps=stamps,
+                               decoder=_DECODERS[file])
+        return StampedValue(value, *stamps) if stamped else value
 
     def initialize_application(self):
         """
         Sends the INIT command to transition the wheel from bootloader
-        to application mode..
+        to application mode. The 'init' retry policy gives the reply at
+        least 3 s.
         """
         log.info("Sending INIT command to start application firmware...")
         
-        start_address = 0x20050000
-        payload = struct.pack('<I', start_address) # '<I' is 4-byte unsigned int, little-endian
-        
-        original_timeout = self.ser.timeout
-        self.ser.timeout = 3.0 # Give it 3 seconds to reply
-        
-        try:
-            self._send_and_receive(NSPCommand.INIT, payload)
-            log.info("INIT command successful. Wheel should now be in Application Mode.")
-        finally:
-            #restore the original timeout
-            self.ser.timeout = original_timeout
+        payload = struct.pack('<I', APPLICATION_START_ADDRESS) # '<I' is 4-byte unsigned int, little-endian
+        self._send_and_receive(NSPCommand.INIT, payload)
+        log.info("INIT command successful. Wheel should now be in Application Mode.")
 
     def ping(self) -> str:
         """
         Sends a PING command to the wheel.
         """
-        print("Pinging the wheel...")
-        reply_payload = self._send_and_receive(NSPCommand.PING)
+        log.debug("Pinging the wheel...")
+        reply_payload = self._transact(self._ping_frame, NSPCommand.PING)
         return reply_payload.decode('ascii', errors='ignore')
 
-    def read_vbus(self) -> float:
+    def read_vbus(self, stamped: bool = False) -> float | StampedValue:
         """Reads the bus voltage from the wheel's telemetry."""
-        print("Reading bus voltage (VBUS)...")
-        payload = EDACFile.VBUS.value.to_bytes(1, 'little')
-        
-        reply = self._send_and_receive(NSPCommand.READ_FILE, payload)
-        
-        file_addr, value = struct.unpack('<Bf', reply)
-        if file_addr != EDACFile.VBUS:
-            raise WheelError(f"Wheel replied with wrong file! Expected {EDACFile.VBUS}, got {file_addr}")
-        return value
+        log.debug("Reading bus voltage (VBUS)...")
+        return self.read(EDACFile.VBUS, stamped)
     
-    def read_speed(self) -> float:
+    def read_speed(self, stamped: bool = False) -> float | StampedValue:
         """Reads the current speed of the wheel in rad/s."""
-        print("Reading wheel speed...")
-        payload = EDACFile.SPEED.value.to_bytes(1, 'little')
-        
-        reply = self._send_and_receive(NSPCommand.READ_FILE, payload)
-        
-        file_addr, value = struct.unpack('<Bf', reply)
-        if file_addr != EDACFile.SPEED:
-            raise WheelError(f"Wheel replied with wrong file! Expected {EDACFile.SPEED}, got {file_addr}")
-        return value
+        log.debug("Reading wheel speed...")
+        return self.read(EDACFile.SPEED, stamped)
     
-    def read_momentum(self) -> float:
+    def read_momentum(self, stamped: bool = False) -> float | StampedValue:
         """Reads the current momentum of the wheel in kg*m^2/s."""
-        print("Reading wheel momentum...")
-        payload = EDACFile.MOMENTUM.value.to_bytes(1, 'little')
-        
-        reply = self._send_and_receive(NSPCommand.READ_FILE, payload)
-        
-        file_addr, value = struct.unpack('<Bf', reply)
-        if file_addr != EDACFile.MOMENTUM:
-            raise WheelError(f"Wheel replied with wrong file! Expected {EDACFile.MOMENTUM}, got {file_addr}")
-        return value
+        log.debug("Reading wheel momentum...")
+        return self.read(EDACFile.MOMENTUM, stamped)
     
-    def read_current(self) -> float:
+    def read_current(self, stamped: bool = False) -> float | StampedValue:
         """Reads the measured motor coil current in Amps."""
-        print("Reading measured current...")
-        payload = EDACFile.MEAUSURED_CURRENT.value.to_bytes(1, 'little')
-        reply = self._send_and_receive(NSPCommand.READ_FILE, payload)
-        file_addr, value = struct.unpack('<Bf', reply)
-        if file_addr != EDACFile.MEAUSURED_CURRENT:
-            raise WheelError(f"Wheel replied with wrong file! Expected {EDACFile.MEAUSURED_CURRENT}, got {file_addr}")
-        return value
-
-    def read_inertia(self) -> float:
+        log.debug("Reading measured current...")
+        return self.read(EDACFile.MEAUSURED_CURRENT, stamped)
+
+    def read_inertia(self, stamped: bool = False) -> float | StampedValue:
         """Reads the configured rotor inertia from the wheel in kg·m²."""
-        print("Reading configured rotor inertia...")
-        payload = EDACFile.INERTIA.value.to_bytes(1, 'little')
-        
-        reply = self._send_and_receive(NSPCommand.READ_FILE, payload)
-        
-        file_addr, value = struct.unpack('<Bf', reply)
-        if file_addr != EDACFile.INERTIA:
-            raise WheelError(f"Wheel replied with wrong file! Expected {EDACFile.INERTIA}, got {file_addr}")
-        return value
+        log.debug("Reading configured rotor inertia...")
+        return self.read(EDACFile.INERTIA, stamped)
 
     def set_idle(self):
         """Commands the wheel to the safe IDLE mode."""
-        print("Commanding wheel to IDLE mode...")
-        payload = struct.pack(
-            '<BBf', EDACFile.COMMAND_VALUE, WheelMode.IDLE, 0.0
-        )
-        self._send_and_receive(NSPCommand.WRITE_FILE, payload)
-        print("Wheel is now in IDLE mode.")
+        log.info("Commanding wheel to IDLE mode...")
+        self._transact(self._idle_frame, NSPCommand.WRITE_FILE)
+        log.info("Wheel is now in IDLE mode.")
         
     def set_speed_rpm(self, rpm: float):
         """Commands the wheel to a specific speed in revolutions per minute."""
-        print(f"Commanding wheel to SPEED mode at {rpm:.1f} RPM...")
+        log.info(f"Commanding wheel to SPEED mode at {rpm:.1f} RPM...")
         # Convert RPM to rad/s for the wheel's firmware
         rad_s = rpm * (2.0 * math.pi / 60.0)
         
-        payload = struct.pack(
-            '<BBf', EDACFile.COMMAND_VALUE, WheelMode.SPEED, rad_s
-        )
-        self._send_and_receive(NSPCommand.WRITE_FILE, payload)
-        print("SPEED command sent successfully.")
+        self._transact(self._command_templates[WheelMode.SPEED].frame(rad_s), NSPCommand.WRITE_FILE)
+        log.info("SPEED command sent successfully.")
 
     def set_torque(self, torque_nm: float):
         """
         Commands the wheel to TORQUE mode at the given torque (N·m).
         """
-        print(f"Commanding wheel to TORQUE mode at {torque_nm:.3f} N·m...")
-        payload = struct.pack(
-            '<BBf',
-            EDACFile.COMMAND_VALUE,      # file 0 = command value
-            WheelMode.TORQUE,            # TORQUE mode = 0x12
-            torque_nm                    # desired torque
-        )
-        self._send_and_receive(NSPCommand.WRITE_FILE, payload)
-        print("TORQUE command sent successfully.")
+        log.info(f"Commanding wheel to TORQUE mode at {torque_nm:.3f} N·m...")
+        # file 0 = command value, TORQUE mode = 0x12
+        self._transact(self._command_templates[WheelMode.TORQUE].frame(torque_nm), NSPCommand.WRITE_FILE)
+        log.info("TORQUE command sent successfully.")
 
     def set_momentum(self, momentum_nms: float):
         """
         Commands the wheel to MOMENTUM mode at the given angular momentum (N·m·s).
         """
-        print(f"Commanding wheel to MOMENTUM mode at {momentum_nms:.3f} N·m·s...")
-        payload = struct.pack(
-            '<BBf',
-            EDACFile.COMMAND_VALUE,
-            WheelMode.MOMENTUM,          # MOMENTUM mode = 0x11
-            momentum_nms
-        )
-        self._send_and_receive(NSPCommand.WRITE_FILE, payload)
-        print("MOMENTUM command sent successfully.")
+        log.info(f"Commanding wheel to MOMENTUM mode at {momentum_nms:.3f} N·m·s...")
+        # MOMENTUM mode = 0x11
+        self._transact(self._command_templates[WheelMode.MOMENTUM].frame(momentum_nms), NSPCommand.WRITE_FILE)
+        log.info("MOMENTUM command sent successfully.")
 
-    def read_vcc(self) -> float:
+    def read_vcc(self, stamped: bool = False) -> float | StampedValue:
         """
         Reads the secondary 3.3 V rail voltage (VCC).
         """
-        print("Reading 3.3 V rail voltage (VCC)...")
-        payload = EDACFile.VCC.value.to_bytes(1, 'little')
-        reply = self._send_and_receive(NSPCommand.READ_FILE, payload)
-        file_addr, value = struct.unpack('<Bf', reply)
-        if file_addr != EDACFile.VCC:
-            raise WheelError(f"Wheel replied with wrong file! Expected {EDACFile.VCC}, got {file_addr}")
-        return value
+        log.debug("Reading 3.3 V rail voltage (VCC)...")
+        return self.read(EDACFile.VCC, stamped)
 
-    def read_temperature(self, sensor_index: int) -> float:
+    def read_temperature(self, sensor_index: int, stamped: bool = False) -> float | StampedValue:
         """
         Reads one of the four NTC thermistor temperatures in °C.
         sensor_index must be in 0..3 (TEMP0 through TEMP3).
@@ -398,12 +1000,317 @@ class ReactionWheel:
             raise ValueError("sensor_index must be between 0 and 3")
         # EDACFile values for TEMP0..TEMP3 are 0x10..0x13
         temp_file = EDACFile(0x10 + sensor_index)
-        print(f"Reading temperature TEMP{sensor_index}...")
-        payload = temp_file.value.to_bytes(1, 'little')
-        reply = self._send_and_receive(NSPCommand.READ_FILE, payload)
-        file_addr, value = struct.unpack('<Bf', reply)
-        if file_addr != temp_file:
-            raise WheelError(f"Wheel replied with wrong file! Expected {temp_file}, got {file_addr}")
-        return value
-
-    
\ No newline at end of file
+        log.debug(f"Reading temperature TEMP{sensor_index}...")
+        return self.read(temp_file, stamped)
+
+    
+    # --- Memory Access ---
+
+    def peek(self, address: int, length: int) -> bytes:
+        """
+        Reads `length` bytes of wheel memory starting at `address`,
+        split into PEEK requests of at most PEEK_MAX_LENGTH bytes.
+        """
+        buf = bytearray(length)
+        # A single PEEK has nothing to mismatch; longer reads are checked
+        self.dump_memory(address, length, out=memoryview(buf), verify=length > PEEK_MAX_LENGTH)
+        return bytes(buf)
+
+    def dump_memory(self, start: int, length: int, path=None, out=None,
+                    chunk_size: int = None, window: int = 4, retries: int = 3,
+                    progress=None, verify: bool = True) -> dict:
+        """
+        Dumps `length` bytes of wheel memory from `start` into the file at
+        `path` or into the writable buffer `out`.
+
+        Up to `window` PEEK requests are kept in flight, and chunks whose
+        replies are lost or corrupted are retried (see _pipelined), up to
+        `retries` times each. When writing to a file, completed chunks are
+        recorded in '<path>.resume'; running the same dump again skips them.
+        With `verify`, the dump is checked against the wheel's CRC of the
+        range once complete; on a mismatch WheelVerifyError is raised and
+        the resume file is removed so the next run starts over. The resume
+        file is also removed once a dump completes (and verifies).
+        progress, if given, is called with (bytes_done, length) as chunks land.
+
+        Returns {'bytes', 'chunks', 'resumed_chunks', 'retries', 'elapsed_s',
+        'bytes_per_s', 'crc'}; 'crc' is None without verify.
+        """
+        if (path is None) == (out is None):
+            raise ValueError("dump_memory() needs exactly one of path or out")
+        chunk_size = chunk_size or PEEK_MAX_LENGTH
+        if not 0 < chunk_size <= PEEK_MAX_LENGTH:
+            raise ValueError(f"chunk_size must be between 1 and {PEEK_MAX_LENGTH}")
+        chunks = [
+            (i, start + offset, min(chunk_size, length - offset))
+            for i, offset in enumerate(range(0, length, chunk_size))
+        ]
+
+        done = bytearray(len(chunks))
+        f = None
+        resume_path = None
+        if path is not None:
+            resume_path = f"{path}.resume"
+            done = _load_resume(resume_path, start, length, chunk_size, len(chunks))
+            if not os.path.exists(path):
+                done = bytearray(len(chunks))
+            f = open(path, 'r+b' if any(done) else 'w+b')
+            f.truncate(length)
+        resumed = sum(done)
+        todo = [c for c in chunks if not done[c[0]]]
+        state = {'bytes': sum(c[2] for c in chunks if done[c[0]]), 'saved': time.monotonic()}
+
+        def sink(chunk, data):
+            index, address, n = chunk
+            offset = address - start
+            if f is None:
+                out[offset:offset + n] = data
+            else:
+                f.seek(offset)
+                f.write(data)
+                done[index] = 1
+                # Checkpoint about once a second so a restart redoes little
+                if time.monotonic() - state['saved'] >= 1.0:
+                    f.flush()
+                    _save_resume(resume_path, start, length, chunk_size, done)
+                    state['saved'] = time.monotonic()
+            state['bytes'] += n
+            if progress is not None:
+                progress(state['bytes'], length)
+
+        t0 = time.monotonic()
+        crc = None
+        try:
+            retried = self._pipelined(NSPCommand.PEEK, todo, _peek_payload, lambda c: c[2],
+                                      sink, window, retries)
+            if verify:
+                if f is None:
+                    crc = _crc_func(out[:length])
+                else:
+                    f.flush()
+                    f.seek(0)
+                    crc = _crc_func(b'')
+                    while block := f.read(1 << 20):
+                        crc = _crc_func(block, crc)
+                wheel_crc = self.memory_crc(start, length)
+                if wheel_crc != crc:
+                    done[:] = bytes(len(done))
+                    raise WheelVerifyError(
+                        f"CRC of {length} bytes dumped from {start:#010x} is {crc:#06x}, "
+                        f"but the wheel reports {wheel_crc:#06x}")
+        finally:
+            if f is not None:
+                f.close()
+                if all(done) or not any(done):
+                    if os.path.exists(resume_path):
+                        os.remove(resume_path)
+                else:
+                    _save_resume(resume_path, start, length, chunk_size, done)
+        elapsed = time.monotonic() - t0
+        fetched = sum(c[2] for c in todo)
+        # peek() comes through here for every read, so only file dumps
+        # report at INFO
+        level = logging.INFO if path is not None else logging.DEBUG
+        if log.isEnabledFor(level):
+            log.log(level, f"Dumped {length} bytes from {start:#010x} in {elapsed:.2f} s "
+                           f"({len(todo)} chunks, {resumed} resumed, {retried} retries)")
+        return {
+            'bytes': length,
+            'chunks': len(chunks),
+            'resumed_chunks': resumed,
+            'retries': retried,
+            'elapsed_s': elapsed,
+            'bytes_per_s': fetched / elapsed if elapsed > 0 else 0.0,
+            'crc': crc,
+        }
+
+    def upload(self, address: int, data, chunk_size: int = None, window: int = 4,
+               retries: int = 3, verify: bool = True, progress=None) -> dict:
+        """
+        Writes `data` (e.g. a firmware or configuration image) to wheel
+        memory at `address` with POKEs of up to POKE_MAX_LENGTH bytes.
+
+        Up to `window` POKEs are kept in flight; a segment whose reply fails
+        its CRC or is NACKed is resent on its own, up to `retries` times.
+        With `verify`, the wheel's CRC of the written range is compared with
+        the image's, and WheelVerifyError is raised on a mismatch.
+        progress, if given, is called with (bytes_done, length).
+
+        Returns {'bytes', 'chunks', 'retries', 'elapsed_s', 'bytes_per_s', 'crc'}.
+        """
+        data = memoryview(data).cast('B')
+        length = len(data)
+        chunk_size = chunk_size or POKE_MAX_LENGTH
+        if not 0 < chunk_size <= POKE_MAX_LENGTH:
+            raise ValueError(f"chunk_size must be between 1 and {POKE_MAX_LENGTH}")
+        chunks = [
+            (i, address + offset, min(chunk_size, length - offset))
+            for i, offset in enumerate(range(0, length, chunk_size))
+        ]
+        state = {'bytes': 0}
+
+        def payload(chunk):
+            offset = chunk[1] - address
+            return struct.pack('<I', chunk[1]) + data[offset:offset + chunk[2]]
+
+        def sink(chunk, reply):
+            state['bytes'] += chunk[2]
+            if progress is not None:
+                progress(state['bytes'], length)
+
+        t0 = time.monotonic()
+        retried = self._pipelined(NSPCommand.POKE, chunks, payload, lambda c: 0,
+                                  sink, window, retries)
+        elapsed = time.monotonic() - t0
+
+        crc = _crc_func(data)
+        if verify:
+            wheel_crc = self.memory_crc(address, length)
+            if wheel_crc != crc:
+                raise WheelVerifyError(
+                    f"CRC of {length} bytes at {address:#010x} is {wheel_crc:#06x}, expected {crc:#06x}")
+        log.info(f"Uploaded {length} bytes to {address:#010x} in {elapsed:.2f} s "
+                 f"({len(chunks)} chunks, {retried} retries{', verified' if verify else ''})")
+        return {
+            'bytes': length,
+            'chunks': len(chunks),
+            'retries': retried,
+            'elapsed_s': elapsed,
+            'bytes_per_s': length / elapsed if elapsed > 0 else 0.0,
+            'crc': crc,
+        }
+
+    def memory_crc(self, address: int, length: int) -> int:
+        """
+        Asks the wheel for the NSP CRC-16 of `length` bytes of its memory
+        from `address` (CRC command; payload address and length as u32).
+        """
+        reply = self._send_and_receive(NSPCommand.CRC, struct.pack('<II', address, length))
+        if len(reply) != 2:
+            raise WheelError(f"CRC reply has {len(reply)} bytes, expected 2")
+        return int.from_bytes(reply, 'little')
+
+    def _pipelined(self, command: NSPCommand, chunks: list, payload, reply_len, sink,
+                   window: int, retries: int) -> int:
+        """
+        Issues `command` for (index, address, length) chunks with up to
+        `window` in flight and calls sink(chunk, data) for each reply.
+        payload(chunk) builds the request data and reply_len(chunk) is the
+        expected reply length. Replies carry no address, so they are matched
+        to requests in order. A NACK keeps that order and only its chunk is
+        retried. Anything that may have lost, merged or split a frame (a
+        timeout, a bad CRC, a malformed or runt frame, a reply of the wrong
+        length) means the order can't be trusted any more: the link is
+        resynchronized and every chunk in flight is retried. Returns the
+        number of retries.
+        """
+        pending = deque(chunks)
+        in_flight = deque()     # (chunk, perf_counter_ns() when sent)
+        attempts = {}
+        retried = 0
+        key = command.name
+
+        def retry(chunk, error):
+            nonlocal retried
+            attempts[chunk[0]] = attempts.get(chunk[0], 0) + 1
+            if attempts[chunk[0]] > retries:
+                raise WheelError(f"{command.name} at {chunk[1]:#010x} failed after {retries} retries: {error}")
+            retried += 1
+            pending.appendleft(chunk)
+
+        def resend_all(error):
+            self._resync()
+            while in_flight:
+                retry(in_flight.pop()[0], error)
+
+        def frame_errors():
+            return self._deframer.malformed, self._deframer.discarded_bytes, self._rx_runts
+
+        with self._lock:
+            self._discard_stale_packets()
+            try:
+                while pending or in_flight:
+                    while pending and len(in_flight) < window:
+                        chunk = pending.popleft()
+                        self.ser.write(self._build_frame(command, payload(chunk)))
+                        in_flight.append((chunk, time.perf_counter_ns()))
+
+                    errors = frame_errors()
+                    try:
+                        packet = self._receive_packet(time.monotonic() + self.timeouts.timeout(key))
+                    except WheelTimeoutError as e:
+                        log.warning(f"{key} reply timed out; resending {len(in_flight)} chunk(s).")
+                        self.timeouts.timed_out(key)
+                        resend_all(e)
+                        continue
+                    if frame_errors() != errors:
+                        log.warning(f"{key} replies lost framing; resending {len(in_flight)} chunk(s).")
+                        resend_all("malformed frame")
+                        continue
+
+                    chunk, sent_ns = in_flight[0]
+                    try:
+                        data = _check_reply(packet)
+                    except WheelNackError as e:
+                        in_flight.popleft()
+                        log.warning(f"{command.name} at {chunk[1]:#010x} failed ({e}); retrying.")
+                        retry(chunk, e)
+                        continue
+                    except WheelCrcError as e:
+                        log.warning(f"{command.name} reply failed its CRC; resending {len(in_flight)} chunk(s).")
+                        resend_all(e)
+                        continue
+                    if len(data) != reply_len(chunk):
+                        log.warning(f"{command.name} reply of {len(data)} bytes for a {chunk[2]}-byte chunk; resynchronizing.")
+                        resend_all("reply length mismatch")
+                        continue
+                    in_flight.popleft()
+                    # With a window in flight this includes queueing, which
+                    # is what the wait for the next reply has to cover
+                    if chunk[0] not in attempts:
+                        self.timeouts.observe(key, (time.perf_counter_ns() - sent_ns) / 1e9)
+                    sink(chunk, data)
+            except BaseException:
+                # Don't leave replies to abandoned requests for the next transaction
+                if in_flight:
+                    self._resync()
+                raise
+        return retried
+
+    def _resync(self, quiet_s: float = 0.05):
+        """Discards everything received until the line has been quiet for quiet_s."""
+        deadline = time.monotonic() + 1.0
+        quiet_since = time.monotonic()
+        while time.monotonic() < deadline and time.monotonic() - quiet_since < quiet_s:
+            if self.ser.in_waiting:
+                self.ser.read(self.ser.in_waiting)
+                quiet_since = time.monotonic()
+            else:
+                time.sleep(0.005)
+        self._deframer.reset()
+        self._rx_packets.clear()
+
+
+def _peek_payload(chunk) -> bytes:
+    return struct.pack('<IH', chunk[1], chunk[2])
+
+
+def _load_resume(resume_path: str, start: int, length: int, chunk_size: int, count: int) -> bytearray:
+    """Completed-chunk flags from a resume file, or all zeros if it doesn't match this dump."""
+    try:
+        with open(resume_path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return bytearray(count)
+    if (state.get('start'), state.get('length'), state.get('chunk_size')) != (start, length, chunk_size):
+        log.warning(f"Ignoring '{resume_path}': it belongs to a different dump.")
+        return bytearray(count)
+    done = bytearray.fromhex(state['done'])
+    return done if len(done) == count else bytearray(count)
+
+
+def _save_resume(resume_path: str, start: int, length: int, chunk_size: int, done: bytearray):
+    tmp = f"{resume_path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump({'start': start, 'length': length, 'chunk_size': chunk_size, 'done': done.hex()}, f)
+    os.replace(tmp, resume_path)
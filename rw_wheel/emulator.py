@@ -0,0 +1,324 @@
+# rw_wheel/emulator.py
+"""
+Software emulator for the RW4-12 NSP interface.
+
+WheelEmulator opens a pseudo-terminal and answers on its slave end with
+the same SLIP + CRC-16 NSP dialect that driver.py speaks, so a
+ReactionWheel can be pointed at it without modification:
+
+    with WheelEmulator() as emu:
+        with ReactionWheel(emu.port, 115200, 0x20, 0x11) as wheel:
+            print(wheel.ping())
+
+or, from a shell (prints the port to use, e.g. via RW_SERIAL_PORT):
+
+    python -m rw_wheel.emulator --latency 0.002 --crc-error-rate 0.01
+
+Supported commands are PING, INIT, PEEK, POKE, CRC, and READ_FILE and
+WRITE_FILE for the EDACFile table. Memory is a deterministic
+pseudo-random image overlaid with whatever has been POKEd, so dumps can
+be checked against EmulatedWheel.peek() and uploads against
+EmulatedWheel.memory(). Anything else (unknown command, unknown file,
+malformed payload) is answered with a NACK. Packets with a bad CRC, or addressed to
+another wheel, are ignored, as on a shared bus.
+
+A simple rigid-rotor model backs the telemetry: TORQUE mode integrates
+speed from the commanded torque, SPEED and MOMENTUM modes slew towards
+the setpoint at the torque limit, and current follows mechanical power.
+
+Fault injection:
+    latency_s       delay before each reply is written
+    noise_rate      probability that each reply byte is replaced by a random byte
+    crc_error_rate  probability that a reply is sent with a corrupted CRC
+"""
+import argparse
+import logging
+import math
+import os
+import random
+import select
+import struct
+import threading
+import time
+import tty
+
+from .driver import (NSPCommand, WheelMode, EDACFile, PEEK_MAX_LENGTH, POKE_MAX_LENGTH,
+                     TELEMETRY_SCHEMA, _crc_func)
+from .slip import SlipDeframer, slip_encode
+
+log = logging.getLogger(__name__)
+
+ACK_BIT = 0b00100000
+COMMAND_MASK = 0b00011111
+
+
+class EmulatedWheel:
+    """State and rotor model for one emulated wheel."""
+
+    INERTIA = 0.025          # kg·m²
+    MAX_TORQUE = 0.2         # N·m
+    MAX_SPEED = 5252.0 * 2.0 * math.pi / 60.0   # rad/s
+    VBUS = 28.0              # V
+    VCC = 3.3                # V
+    IDLE_CURRENT = 0.08      # A
+
+    def __init__(self, addr: int, identity: str):
+        self.addr = addr
+        self.identity = identity
+        self.application = False
+        self.mode = WheelMode.IDLE
+        self.command = 0.0
+        self.speed = 0.0
+        self.torque = 0.0
+        self.temperature = 25.0
+        self.poked = {}          # address -> byte written by POKE
+        self._last_update = time.monotonic()
+
+    def update(self):
+        """Advances the rotor model to the current time."""
+        now = time.monotonic()
+        dt = now - self._last_update
+        self._last_update = now
+
+        if self.mode == WheelMode.TORQUE:
+            torque = self.command
+        elif self.mode in (WheelMode.SPEED, WheelMode.MOMENTUM):
+            target = self.command if self.mode == WheelMode.SPEED else self.command / self.INERTIA
+            needed = (target - self.speed) * self.INERTIA / dt if dt > 0 else 0.0
+            torque = max(-self.MAX_TORQUE, min(self.MAX_TORQUE, needed))
+        else:
+            torque = 0.0
+        torque = max(-self.MAX_TORQUE, min(self.MAX_TORQUE, torque))
+
+        self.speed += torque / self.INERTIA * dt
+        self.speed = max(-self.MAX_SPEED, min(self.MAX_SPEED, self.speed))
+        self.torque = torque
+
+    def read(self, file: EDACFile) -> bytes:
+        """Returns the READ_FILE reply payload (after the file byte)."""
+        self.update()
+        if file == EDACFile.COMMAND_VALUE:
+            return struct.pack('<Bf', self.mode, self.command)
+        if file == EDACFile.VBUS:
+            value = self.VBUS
+        elif file == EDACFile.VCC:
+            value = self.VCC
+        elif file == EDACFile.MEAUSURED_CURRENT:
+            value = self.IDLE_CURRENT + abs(self.torque * self.speed) / self.VBUS
+        elif file in (EDACFile.TEMP0, EDACFile.TEMP1, EDACFile.TEMP2, EDACFile.TEMP3):
+            value = self.temperature + 0.5 * (file - EDACFile.TEMP0)
+        elif file == EDACFile.SPEED:
+            value = self.speed
+        elif file == EDACFile.MOMENTUM:
+            value = self.speed * self.INERTIA
+        elif file == EDACFile.INERTIA:
+            value = self.INERTIA
+        elif file == EDACFile.HALL_DIGITAL:
+            value = int(self._last_update * 1000) % 6
+        else:
+            raise KeyError(file)
+        # Raw value in the file's wire format (the schema's inverse scale)
+        channel = TELEMETRY_SCHEMA[file]
+        if channel.scale != 1.0:
+            value = round(value / channel.scale) if channel.fmt in 'bBhHiI' else value / channel.scale
+        return struct.pack('<' + channel.fmt, value)
+
+    def memory(self, address: int, length: int) -> bytes:
+        """Returns `length` bytes of emulated memory from `address`."""
+        if address + length > 1 << 32:
+            raise ValueError("Memory access out of range")
+        poked = self.poked
+        return bytes(
+            poked[a] if a in poked else ((a * 2654435761) >> 11) & 0xFF
+            for a in range(address, address + length)
+        )
+
+    def peek(self, address: int, length: int) -> bytes:
+        """Returns the PEEK reply for `length` bytes from `address`."""
+        if length > PEEK_MAX_LENGTH:
+            raise ValueError("PEEK too long")
+        return self.memory(address, length)
+
+    def poke(self, address: int, data: bytes):
+        """Writes a POKE payload's data to memory at `address`."""
+        if len(data) > POKE_MAX_LENGTH or address + len(data) > 1 << 32:
+            raise ValueError("POKE out of range")
+        for offset, byte in enumerate(data):
+            self.poked[address + offset] = byte
+
+    def write(self, file: EDACFile, data: bytes):
+        """Applies a WRITE_FILE payload (after the file byte)."""
+        if file != EDACFile.COMMAND_VALUE:
+            raise KeyError(file)
+        mode, value = struct.unpack('<Bf', data)
+        self.update()
+        self.mode = WheelMode(mode)
+        self.command = value
+
+
+class WheelEmulator:
+    def __init__(self, wheel_addrs=(0x20,), latency_s: float = 0.0, noise_rate: float = 0.0,
+                 crc_error_rate: float = 0.0, seed: int | None = None,
+                 identity: str = "RW4-12 EMULATOR"):
+        self.wheels = {addr: EmulatedWheel(addr, identity) for addr in wheel_addrs}
+        self.latency_s = latency_s
+        self.noise_rate = noise_rate
+        self.crc_error_rate = crc_error_rate
+        self._rng = random.Random(seed)
+        self._deframer = SlipDeframer()
+        self._master = None
+        self._slave = None
+        self._thread = None
+        self._stop = threading.Event()
+        self.port = None
+        self.requests = 0
+        self.replies = 0
+        self.nacks = 0
+        self.ignored = 0
+
+    # --- Lifecycle ---
+
+    def start(self):
+        """Opens the pty and starts answering on a background thread."""
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._master)
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="WheelEmulator", daemon=True)
+        self._thread.start()
+        log.info(f"Wheel emulator listening on {self.port}")
+
+    def stop(self):
+        """Stops the emulator and closes the pty."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                os.close(fd)
+        self._master = self._slave = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    # --- Serving ---
+
+    def _run(self):
+        while not self._stop.is_set():
+            ready, _, _ = select.select([self._master], [], [], 0.1)
+            if not ready:
+                continue
+            try:
+                data = os.read(self._master, 4096)
+            except OSError:
+                break
+            for packet in self._deframer.feed(data):
+                reply = self._handle(packet)
+                if reply is not None:
+                    self._send(reply)
+
+    def _handle(self, packet: bytes) -> bytes | None:
+        """Returns the reply packet (without CRC) for a request, or None."""
+        if len(packet) < 5:
+            self.ignored += 1
+            return None
+        body, crc = packet[:-2], packet[-2:]
+        if _crc_func(body).to_bytes(2, 'little') != crc:
+            self.ignored += 1
+            return None
+        dst, src, ctrl = body[0], body[1], body[2]
+        wheel = self.wheels.get(dst)
+        if wheel is None:
+            self.ignored += 1
+            return None
+
+        self.requests += 1
+        command = ctrl & COMMAND_MASK
+        payload = body[3:]
+        header = bytes([src, dst])
+        try:
+            data = self._execute(wheel, NSPCommand(command), payload)
+        except (ValueError, KeyError, IndexError, struct.error):
+            # Malformed requests are refused; they must not stop the server
+            self.nacks += 1
+            return header + bytes([command])
+        return header + bytes([ACK_BIT | command]) + data
+
+    def _execute(self, wheel: EmulatedWheel, command: NSPCommand, payload: bytes) -> bytes:
+        """Runs one command. Raises ValueError/KeyError/IndexError/struct.error to NACK."""
+        if command == NSPCommand.PING:
+            return wheel.identity.encode('ascii')
+        if command == NSPCommand.INIT:
+            struct.unpack('<I', payload)
+            wheel.application = True
+            return b''
+        if command == NSPCommand.PEEK:
+            address, length = struct.unpack('<IH', payload)
+            return wheel.peek(address, length)
+        if command == NSPCommand.POKE:
+            address, = struct.unpack_from('<I', payload)
+            wheel.poke(address, payload[4:])
+            return b''
+        if command == NSPCommand.CRC:
+            address, length = struct.unpack('<II', payload)
+            return _crc_func(wheel.memory(address, length)).to_bytes(2, 'little')
+        if command == NSPCommand.READ_FILE:
+            if len(payload) != 1:
+                raise ValueError("READ_FILE takes one file byte")
+            file = EDACFile(payload[0])
+            return bytes([file]) + wheel.read(file)
+        if command == NSPCommand.WRITE_FILE:
+            if not payload:
+                raise ValueError("WRITE_FILE needs a file byte")
+            file = EDACFile(payload[0])
+            wheel.write(file, payload[1:])
+            return b''
+        raise ValueError(f"Unsupported command {command!r}")
+
+    def _send(self, body: bytes):
+        crc = _crc_func(body)
+        if self.crc_error_rate and self._rng.random() < self.crc_error_rate:
+            crc ^= 1 << self._rng.randrange(16)
+        frame = bytearray(slip_encode(body + crc.to_bytes(2, 'little')))
+        if self.noise_rate:
+            for i in range(len(frame)):
+                if self._rng.random() < self.noise_rate:
+                    frame[i] = self._rng.randrange(256)
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        os.write(self._master, frame)
+        self.replies += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emulate an RW4-12 wheel on a pseudo-terminal.")
+    parser.add_argument("--addr", type=lambda s: int(s, 0), action="append",
+                        help="wheel NSP address (repeat for several wheels on one bus; default 0x20)")
+    parser.add_argument("--latency", type=float, default=0.0, help="reply latency in seconds")
+    parser.add_argument("--noise-rate", type=float, default=0.0, help="per-byte corruption probability")
+    parser.add_argument("--crc-error-rate", type=float, default=0.0, help="per-reply CRC corruption probability")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for fault injection")
+    args = parser.parse_args()
+
+    emu = WheelEmulator(
+        wheel_addrs=args.addr or [0x20], latency_s=args.latency, noise_rate=args.noise_rate,
+        crc_error_rate=args.crc_error_rate, seed=args.seed,
+    )
+    with emu:
+        print(f"Wheel emulator running on {emu.port} (Ctrl-C to stop)")
+        try:
+            while True:
+                time.sleep(1.0)
+        except KeyboardInterrupt:
+            pass
+    print(f"Served {emu.requests} requests ({emu.nacks} NACKs, {emu.ignored} ignored).")
+
+
+if __name__ == "__main__":
+    main()
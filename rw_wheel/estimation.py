@@ -0,0 +1,183 @@
+# rw_wheel/estimation.py
+"""
+Streaming estimators for wheel characterization.
+
+OnlineLinearFit keeps a least-squares line through (t, y) samples,
+updated in O(1) per sample: recursive least squares with no forgetting,
+done with centered (Welford-style) running sums so that absolute
+perf_counter timestamps do not cost precision. Fitting speed against
+time gives the acceleration directly. Differentiating the speed samples
+first amplifies their noise; the fit averages it out.
+
+TorqueResponseEstimator folds one fitted acceleration per torque step
+into a running estimate of the torque-to-acceleration gain (1/inertia
+for an ideal wheel) and the deadband below which the wheel does not
+move, so a sweep reports results while it is still running.
+"""
+import math
+from typing import NamedTuple
+
+import numpy as np
+
+
+class LinearFitResult(NamedTuple):
+    slope: float
+    intercept: float       # value of the line at t = 0
+    slope_stderr: float    # standard error of the slope
+    residual_std: float    # standard deviation of the residuals
+    n: int
+
+
+class OnlineLinearFit:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self._mean_t = 0.0
+        self._mean_y = 0.0
+        self._stt = 0.0    # sum of (t - mean_t)^2
+        self._sty = 0.0    # sum of (t - mean_t)(y - mean_y)
+        self._syy = 0.0    # sum of (y - mean_y)^2
+
+    def update(self, t: float, y: float):
+        """Adds one sample."""
+        t, y = float(t), float(y)
+        self.n += 1
+        dt = t - self._mean_t
+        dy = y - self._mean_y
+        self._mean_t += dt / self.n
+        self._mean_y += dy / self.n
+        self._stt += dt * (t - self._mean_t)
+        self._sty += dt * (y - self._mean_y)
+        self._syy += dy * (y - self._mean_y)
+
+    def update_many(self, t, y):
+        """Adds a batch of samples (e.g. a poller drain) with NumPy."""
+        t = np.asarray(t, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        m = len(t)
+        if m == 0:
+            return
+        mean_t = float(t.mean())
+        mean_y = float(y.mean())
+        ct = t - mean_t
+        cy = y - mean_y
+        stt, sty, syy = float(ct @ ct), float(ct @ cy), float(cy @ cy)
+
+        # Merge the batch statistics into the running ones (Chan et al.)
+        n = self.n + m
+        dt = mean_t - self._mean_t
+        dy = mean_y - self._mean_y
+        w = self.n * m / n
+        self._stt += stt + dt * dt * w
+        self._sty += sty + dt * dy * w
+        self._syy += syy + dy * dy * w
+        self._mean_t += dt * m / n
+        self._mean_y += dy * m / n
+        self.n = n
+
+    @property
+    def slope(self) -> float:
+        return self._sty / self._stt if self._stt > 0 else math.nan
+
+    def result(self) -> LinearFitResult:
+        """The current fit. Fields are NaN until there are enough samples."""
+        if self.n < 2 or self._stt <= 0:
+            return LinearFitResult(math.nan, math.nan, math.nan, math.nan, self.n)
+        slope = self._sty / self._stt
+        intercept = self._mean_y - slope * self._mean_t
+        if self.n < 3:
+            return LinearFitResult(slope, intercept, math.nan, math.nan, self.n)
+        sse = max(self._syy - slope * self._sty, 0.0)
+        residual_var = sse / (self.n - 2)
+        return LinearFitResult(
+            slope, intercept,
+            math.sqrt(residual_var / self._stt),
+            math.sqrt(residual_var),
+            self.n,
+        )
+
+
+class TorqueResponseEstimate(NamedTuple):
+    gain: float               # acceleration per unit torque, rad/s² per N·m
+    gain_stderr: float
+    deadband: float           # torque below which the wheel does not respond, N·m
+    inertia: float            # 1 / gain, kg·m²
+    moving_steps: int         # steps used for the gain and deadband fit
+    stalled_steps: int        # steps whose acceleration was not significant
+
+
+class TorqueResponseEstimator:
+    """
+    Models the response to a torque step as
+
+        accel = gain * (|torque| - deadband) * sign(torque)   for |torque| > deadband
+        accel = 0                                              otherwise
+
+    Steps whose acceleration is significant (larger than min_accel and
+    than `sigma` standard errors of its fit) are fitted as |accel| against
+    |torque|, which makes the deadband the line's zero crossing. The other
+    steps count as stalled.
+    """
+
+    def __init__(self, min_accel: float = 0.05, sigma: float = 3.0):
+        self.min_accel = min_accel
+        self.sigma = sigma
+        self.steps = []             # (torque, accel, accel_stderr, moving)
+        self._fit = OnlineLinearFit()
+        self.max_stalled_torque = 0.0
+        self.min_moving_torque = math.inf
+
+    def add_step(self, torque: float, accel: float, accel_stderr: float = 0.0) -> bool:
+        """Adds one step's commanded torque and fitted acceleration. Returns True if it moved."""
+        torque, accel = float(torque), float(accel)
+        stderr = accel_stderr if math.isfinite(accel_stderr) else 0.0
+        moving = (
+            torque != 0.0
+            and math.isfinite(accel)
+            and abs(accel) > max(self.min_accel, self.sigma * stderr)
+            and math.copysign(1.0, accel) == math.copysign(1.0, torque)
+        )
+        self.steps.append((torque, accel, accel_stderr, moving))
+        if moving:
+            self._fit.update(abs(torque), abs(accel))
+            self.min_moving_torque = min(self.min_moving_torque, abs(torque))
+        else:
+            self.max_stalled_torque = max(self.max_stalled_torque, abs(torque))
+        return moving
+
+    def add_fit(self, torque: float, fit: OnlineLinearFit) -> bool:
+        """Adds a step from the speed-vs-time fit taken while it was applied."""
+        r = fit.result()
+        return self.add_step(torque, r.slope, r.slope_stderr)
+
+    def estimate(self) -> TorqueResponseEstimate:
+        moving = sum(1 for s in self.steps if s[3])
+        stalled = len(self.steps) - moving
+        r = self._fit.result()
+        if moving and not math.isfinite(r.slope):
+            # A single torque magnitude (one step, or e.g. a ±0.2 N·m square
+            # wave) can't place the deadband: assume none and fit through
+            # the origin, gain = Σty / Σt²
+            t = np.array([abs(s[0]) for s in self.steps if s[3]])
+            y = np.array([abs(s[1]) for s in self.steps if s[3]])
+            stt = float(t @ t)
+            gain, deadband = float(t @ y) / stt, 0.0
+            if moving > 1:
+                residuals = y - gain * t
+                gain_stderr = math.sqrt(float(residuals @ residuals) / (moving - 1) / stt)
+            else:
+                gain_stderr = math.nan
+        elif math.isfinite(r.slope) and r.slope > 0:
+            gain, gain_stderr = r.slope, r.slope_stderr
+            deadband = -r.intercept / r.slope
+        else:
+            gain, gain_stderr, deadband = math.nan, math.nan, math.nan
+
+        # The deadband can't be below a torque that failed to move the wheel,
+        # nor above one that did
+        if math.isfinite(deadband):
+            deadband = min(max(deadband, self.max_stalled_torque, 0.0), self.min_moving_torque)
+        inertia = 1.0 / gain if math.isfinite(gain) and gain else math.nan
+        return TorqueResponseEstimate(gain, gain_stderr, deadband, inertia, moving, stalled)
@@ -0,0 +1,169 @@
+# rw_wheel/instrumentation.py
+"""
+Per-transaction instrumentation for the wheel driver.
+
+When enabled on a ReactionWheel (wheel.enable_instrumentation()), every
+transaction is timed phase by phase and folded into histograms keyed by
+command (and EDAC file, for file reads and writes):
+
+    build       building the NSP packet and CRC (one-off commands only)
+    encode      SLIP-encoding it (one-off commands only)
+    write       ser.write() of the request
+    first_byte  from the end of the write to the first reply bytes
+    deframe     time spent in the SLIP deframer
+    check       CRC and ACK validation of the reply
+    total       the whole transaction, including waiting for the bus
+
+Outcome counters (timeouts, CRC errors, NACKs, other errors) are kept
+per key. Hooks are called with a TransactionRecord after each
+transaction, e.g. to export to a time-series database. When
+instrumentation is disabled the driver skips all of this.
+"""
+import logging
+from typing import NamedTuple
+
+log = logging.getLogger(__name__)
+
+PHASES = ('build', 'encode', 'write', 'first_byte', 'deframe', 'check', 'total')
+OUTCOMES = ('ok', 'timeout', 'crc_error', 'nack', 'error')
+
+
+class TransactionRecord(NamedTuple):
+    key: str          # e.g. "PING", "READ_FILE:SPEED", "READ_MANY"
+    outcome: str      # one of OUTCOMES
+    phases_ns: dict   # phase name -> duration in nanoseconds
+
+
+class LatencyHistogram:
+    """
+    Histogram of durations in nanoseconds with log-linear buckets: each
+    power of two is split into 8 equal sub-buckets, so percentiles are
+    accurate to within 12.5% while adding a value stays O(1).
+    """
+    SUB_BITS = 3
+    BUCKETS = 320   # covers up to 2**40 ns, about 18 minutes
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+
+    @classmethod
+    def _bucket(cls, ns: int) -> int:
+        shift = ns.bit_length() - cls.SUB_BITS - 1
+        if shift <= 0:
+            return ns
+        return min((shift << cls.SUB_BITS) + (ns >> shift), cls.BUCKETS - 1)
+
+    @classmethod
+    def _upper_edge(cls, bucket: int) -> int:
+        shift = (bucket >> cls.SUB_BITS) - 1
+        if shift <= 0:
+            return bucket + 1
+        mantissa = (bucket & ((1 << cls.SUB_BITS) - 1)) | (1 << cls.SUB_BITS)
+        return (mantissa + 1) << shift
+
+    def add(self, ns: int):
+        self.counts[self._bucket(ns)] += 1
+        self.count += 1
+        self.total_ns += ns
+        if self.min_ns is None or ns < self.min_ns:
+            self.min_ns = ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentile(self, p: float) -> int:
+        """Upper edge of the bucket holding the p-th percentile, in ns."""
+        if self.count == 0:
+            return 0
+        rank = p / 100.0 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(self._upper_edge(i), self.max_ns)
+        return self.max_ns
+
+    def summary(self) -> dict:
+        """Count, mean, min, max and p50/p95/p99 in microseconds."""
+        if self.count == 0:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'mean_us': self.total_ns / self.count / 1e3,
+            'min_us': self.min_ns / 1e3,
+            'p50_us': self.percentile(50) / 1e3,
+            'p95_us': self.percentile(95) / 1e3,
+            'p99_us': self.percentile(99) / 1e3,
+            'max_us': self.max_ns / 1e3,
+        }
+
+
+class _KeyStats:
+    def __init__(self):
+        self.outcomes = dict.fromkeys(OUTCOMES, 0)
+        self.phases = {}
+
+    def add(self, outcome: str, phases_ns: dict):
+        self.outcomes[outcome] += 1
+        for phase, ns in phases_ns.items():
+            hist = self.phases.get(phase)
+            if hist is None:
+                hist = self.phases[phase] = LatencyHistogram()
+            hist.add(ns)
+
+
+class Instrumentation:
+    def __init__(self, hooks=()):
+        self.hooks = list(hooks)
+        self._stats = {}
+        self._keys = {}   # request frame -> key, filled on first use
+
+    # Parameterized writes produce a new frame per value; stop caching
+    # keys past this many distinct frames so long runs don't grow memory.
+    MAX_CACHED_KEYS = 1024
+
+    def key_for(self, frame: bytes, describe) -> str:
+        """Returns the stats key for a request frame, caching describe(frame)."""
+        key = self._keys.get(frame)
+        if key is None:
+            key = describe(frame)
+            if len(self._keys) < self.MAX_CACHED_KEYS:
+                self._keys[frame] = key
+        return key
+
+    def record(self, key: str, outcome: str, phases_ns: dict):
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = _KeyStats()
+        stats.add(outcome, phases_ns)
+        if self.hooks:
+            record = TransactionRecord(key, outcome, phases_ns)
+            for hook in self.hooks:
+                try:
+                    hook(record)
+                except Exception as e:
+                    log.warning(f"Instrumentation hook {hook!r} failed: {e}")
+
+    def reset(self):
+        """Clears all histograms and counters."""
+        self._stats.clear()
+
+    def stats(self) -> dict:
+        """
+        Returns {key: {'transactions', 'timeouts', 'crc_errors', 'nacks',
+        'errors', 'phases': {phase: histogram summary}}}.
+        """
+        out = {}
+        for key, s in self._stats.items():
+            out[key] = {
+                'transactions': sum(s.outcomes.values()),
+                'timeouts': s.outcomes['timeout'],
+                'crc_errors': s.outcomes['crc_error'],
+                'nacks': s.outcomes['nack'],
+                'errors': s.outcomes['error'],
+                'phases': {p: s.phases[p].summary() for p in PHASES if p in s.phases},
+            }
+        return out
@@ -0,0 +1,150 @@
+# rw_wheel/plotting.py
+"""
+Plotting helpers for long telemetry runs.
+
+A multi-hour run at 20 Hz or more is hundreds of thousands of points per
+trace. As SVG go.Scatter traces that makes HTML files browsers cannot
+open. The helpers here reduce every trace to a point budget before it
+goes into the figure and build WebGL (go.Scattergl) traces:
+
+    fig.add_trace(scattergl(t, speed, name='Speed'), row=1, col=1)
+    fig.add_trace(recording_scattergl("run.rwrec", 'speed', name='Speed'))
+
+Two shape-preserving downsamplers are available:
+
+    minmax  keeps the minimum and maximum of each bucket, so spikes and
+            the signal envelope survive; fully vectorized
+    lttb    Largest-Triangle-Three-Buckets, keeps the visually most
+            significant point per bucket; better for smooth traces
+
+recording_scattergl() reads a TelemetryRecorder file in chunks, so the
+raw data never has to be loaded (or inlined into the HTML) in full.
+plotly is imported on first use.
+"""
+import math
+
+import numpy as np
+
+from .recorder import Recording, load_recording
+
+DEFAULT_MAX_POINTS = 5000
+DEFAULT_CHUNK_ROWS = 1 << 20
+
+
+# --- Downsampling ---
+
+def _minmax_by_size(y: np.ndarray, size: int) -> np.ndarray:
+    """Indices of the min and max of each `size`-long bucket of y, in order."""
+    n = len(y)
+    full = n // size * size
+    blocks = y[:full].reshape(-1, size)
+    offsets = np.arange(0, full, size)
+    lo = blocks.argmin(axis=1) + offsets
+    hi = blocks.argmax(axis=1) + offsets
+    if full < n:
+        tail = y[full:]
+        lo = np.append(lo, full + tail.argmin())
+        hi = np.append(hi, full + tail.argmax())
+    return np.unique(np.concatenate([lo, hi]))
+
+
+def minmax_indices(y, max_points: int) -> np.ndarray:
+    """Indices of a min/max-bucket downsample of y to at most about max_points points."""
+    y = np.asarray(y)
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    size = math.ceil(n / max(max_points // 2 - 1, 1))
+    idx = _minmax_by_size(y, size)
+    return np.unique(np.concatenate([[0], idx, [n - 1]]))
+
+
+def lttb_indices(x, y, max_points: int) -> np.ndarray:
+    """Indices of a Largest-Triangle-Three-Buckets downsample to max_points points."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n <= max_points or max_points < 3:
+        return np.arange(n)
+
+    # First and last points are kept; the rest is split into max_points - 2 buckets
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    out = np.empty(max_points, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            nxt = slice(edges[i + 1], edges[i + 2])
+            avg_x, avg_y = x[nxt].mean(), y[nxt].mean()
+        else:
+            avg_x, avg_y = x[n - 1], y[n - 1]
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def downsample(x, y, max_points: int = DEFAULT_MAX_POINTS, method: str = 'minmax'):
+    """Returns (x, y) reduced to about max_points points with the given method."""
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if method == 'minmax':
+        idx = minmax_indices(y, max_points)
+    elif method == 'lttb':
+        idx = lttb_indices(x, y, max_points)
+    else:
+        raise ValueError(f"Unknown downsampling method '{method}'")
+    return x[idx], y[idx]
+
+
+# --- Traces ---
+
+def scattergl(x, y, max_points: int = DEFAULT_MAX_POINTS, method: str = 'minmax', **kwargs):
+    """A go.Scattergl trace of (x, y) downsampled to max_points. kwargs go to Scattergl."""
+    import plotly.graph_objects as go
+
+    x, y = downsample(x, y, max_points, method)
+    kwargs.setdefault('mode', 'lines')
+    return go.Scattergl(x=x, y=y, **kwargs)
+
+
+def recording_scattergl(recording, y, x: str = 't', max_points: int = DEFAULT_MAX_POINTS,
+                        chunk_rows: int = DEFAULT_CHUNK_ROWS, **kwargs):
+    """
+    A min/max-downsampled go.Scattergl trace read from a recording in
+    chunks of about chunk_rows rows.
+
+    recording:  a Recording or the path of a TelemetryRecorder file
+    y:          a column name, or a function mapping a chunk of rows to
+                the y values (e.g. lambda r: r['vbus'] * r['meausured_current'])
+    x:          the column to use for x
+    """
+    import plotly.graph_objects as go
+
+    if not isinstance(recording, Recording):
+        recording = load_recording(recording)
+    rows = recording.rows
+    values = y if callable(y) else (lambda r: r[y])
+    n = len(rows)
+
+    if n <= max_points:
+        xs, ys = np.asarray(rows[x]), np.asarray(values(rows))
+    else:
+        # Buckets never straddle a chunk, so each chunk reduces independently
+        size = math.ceil(n / max(max_points // 2 - 1, 1))
+        step = max(chunk_rows // size, 1) * size
+        xs, ys = [], []
+        for start in range(0, n, step):
+            part = rows[start:start + step]
+            yv = np.asarray(values(part))
+            idx = _minmax_by_size(yv, size)
+            xs.append(np.asarray(part[x][idx]))
+            ys.append(yv[idx])
+        xs, ys = np.concatenate(xs), np.concatenate(ys)
+
+    kwargs.setdefault('mode', 'lines')
+    return go.Scattergl(x=xs, y=ys, **kwargs)
@@ -0,0 +1,205 @@
+# rw_wheel/poller.py
+"""
+Background telemetry poller for the RW4-12.
+
+A TelemetryPoller samples a set of EDAC files from a ReactionWheel on its
+own thread, at a fixed rate, into a preallocated NumPy ring buffer.
+Commanding code can keep calling set_torque() / set_speed_rpm() on the
+same wheel while it runs; the wheel serializes the transactions.
+
+Each row carries the perf_counter_ns() instants at which the requests
+were sent and the last reply arrived ('sent_ns', 'reply_ns'). Its 't'
+column is the midpoint of the two, in seconds since start(). That is the
+best host-side estimate of when the wheel took the sample, and it does
+not move with I/O jitter the way a timestamp taken before the reads does.
+
+The ring buffer is stored twice over (a "mirrored" ring), so the most
+recent N <= capacity rows are always one contiguous slice and latest(),
+window() and drain() can return views instead of copies. A view stays
+valid until the poller laps it, i.e. for `capacity` more samples; copy
+it if you need to keep it longer.
+"""
+import logging
+import threading
+import time
+
+import numpy as np
+
+from .driver import EDACFile, WheelError, TELEMETRY_SCHEMA, telemetry_file
+
+log = logging.getLogger(__name__)
+
+
+class TelemetryPoller:
+    def __init__(self, wheel, channels=(EDACFile.SPEED,), rate_hz: float = 20.0,
+                 capacity: int = 65536):
+        """
+        wheel:     an open ReactionWheel
+        channels:  the telemetry channels (EDACFile, address or schema name) to sample on every tick
+        rate_hz:   target sampling rate
+        capacity:  number of samples kept in the ring buffer
+        """
+        if rate_hz <= 0:
+            raise ValueError("rate_hz must be positive")
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+
+        self.wheel = wheel
+        self.channels = [telemetry_file(c) for c in channels]
+        self.period = 1.0 / rate_hz
+        self.capacity = capacity
+
+        # One row per sample: reply-anchored timestamps plus one column per channel
+        self.dtype = np.dtype(
+            [('t', 'f8'), ('sent_ns', 'i8'), ('reply_ns', 'i8')]
+            + [(TELEMETRY_SCHEMA[c].name, TELEMETRY_SCHEMA[c].dtype) for c in self.channels]
+        )
+        self._buf = np.zeros(2 * capacity, dtype=self.dtype)
+        self._head = 0      # total samples written
+        self._drained = 0   # value of _head at the last drain()
+        self._cond = threading.Condition()
+
+        self.errors = 0           # failed samples
+        self.error = None         # exception that stopped the sampling thread, if any
+        self.missed_deadlines = 0 # ticks skipped because a sample overran
+        self.overruns = 0         # samples lapped before drain() saw them
+        self.start_time = None    # wall-clock time of start()
+        self.start_ns = None      # perf_counter_ns() at start()
+        self._thread = None
+        self._stop = threading.Event()
+
+    # --- Lifecycle ---
+
+    def start(self):
+        """Starts sampling on a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self.error = None
+        self.start_time = time.time()
+        self.start_ns = time.perf_counter_ns()
+        self._thread = threading.Thread(target=self._run, name="TelemetryPoller", daemon=True)
+        self._thread.start()
+        log.info(f"Telemetry poller started: {list(self.dtype.names[3:])} at {1.0 / self.period:.1f} Hz")
+
+    def stop(self):
+        """Stops sampling and waits for the thread to exit."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            log.info(f"Telemetry poller stopped after {self._head} samples ({self.errors} errors).")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def elapsed(self) -> float:
+        """Seconds since start(), on the same clock as the 't' column."""
+        return (time.perf_counter_ns() - self.start_ns) / 1e9
+
+    # --- Sampling thread ---
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                snapshot = self.wheel.read_many(self.channels)
+            except WheelError as e:
+                self.errors += 1
+                log.warning(f"Poller sample failed: {e}")
+            except Exception as e:
+                # e.g. the serial adapter went away; wait() and drain() re-raise it
+                self.errors += 1
+                log.error(f"Poller stopped by an unexpected error: {e!r}")
+                with self._cond:
+                    self.error = e
+                    self._cond.notify_all()
+                return
+            else:
+                self._append(
+                    (snapshot.mid_ns - self.start_ns) / 1e9,
+                    snapshot.sent_ns,
+                    snapshot.reply_ns,
+                    [snapshot.values[c] for c in self.channels],
+                )
+
+            # Schedule on absolute deadlines so I/O time does not stretch the period
+            next_tick += self.period
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                skipped = int(-delay // self.period) + 1
+                self.missed_deadlines += skipped
+                next_tick += skipped * self.period
+                delay = next_tick - time.monotonic()
+            self._stop.wait(max(delay, 0.0))
+
+    def _append(self, t: float, sent_ns: int, reply_ns: int, values):
+        cap = self.capacity
+        i = self._head % cap
+        row = (t, sent_ns, reply_ns, *values)
+        self._buf[i] = row
+        self._buf[i + cap] = row
+        with self._cond:
+            self._head += 1
+            self._cond.notify_all()
+
+    # --- Consumer views ---
+
+    def __len__(self) -> int:
+        """Number of samples currently held (at most capacity)."""
+        return min(self._head, self.capacity)
+
+    def _last(self, n: int) -> np.ndarray:
+        """View of the last n samples, oldest first."""
+        cap = self.capacity
+        end = self._head % cap + cap
+        return self._buf[end - n:end]
+
+    def latest(self):
+        """Returns the most recent sample as a structured row, or None."""
+        with self._cond:
+            if self._head == 0:
+                return None
+            return self._last(1)[0]
+
+    def window(self, seconds: float) -> np.ndarray:
+        """View of the samples taken in the last `seconds` seconds."""
+        with self._cond:
+            rows = self._last(len(self))
+        if len(rows) == 0:
+            return rows
+        start = np.searchsorted(rows['t'], rows['t'][-1] - seconds, side='left')
+        return rows[start:]
+
+    def drain(self) -> np.ndarray:
+        """
+        View of every sample taken since the previous drain().
+        If more than `capacity` samples arrived in between, the oldest are
+        lost and counted in `overruns`. Once the samples taken before an
+        unexpected error have been drained, re-raises that error.
+        """
+        with self._cond:
+            pending = self._head - self._drained
+            if pending == 0 and self.error is not None:
+                raise self.error
+            if pending > self.capacity:
+                self.overruns += pending - self.capacity
+                pending = self.capacity
+            self._drained = self._head
+            return self._last(pending)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """
+        Blocks until a new sample arrives. Returns False on timeout; raises
+        the error that stopped the sampling thread, if any.
+        """
+        with self._cond:
+            head = self._head
+            arrived = self._cond.wait_for(lambda: self._head != head or self.error is not None, timeout)
+            if self._head == head and self.error is not None:
+                raise self.error
+            return arrived
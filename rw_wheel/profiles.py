@@ -0,0 +1,315 @@
+# rw_wheel/profiles.py
+"""
+Deadline-scheduled motion profiles.
+
+A profile is a declarative list of segments that compiles to
+time-stamped setpoints:
+
+    profile = Profile(
+        Ramp(WheelMode.SPEED, 0.0, 1000.0, duration=10.0, rate_hz=5.0),
+        Hold(WheelMode.SPEED, 1000.0, duration=5.0),
+        Trapezoid(WheelMode.SPEED, 1000.0, 0.0, ramp_time=10.0),
+    )
+    report = ProfileRunner(wheel, profile).run()
+    print(report.summary())
+
+Sweep(WheelMode.TORQUE, np.linspace(-0.2, 0.2, 21), dwell=3.0, settle=2.0)
+steps through a list of values, optionally dropping to IDLE between
+them.
+
+ProfileRunner issues each setpoint at an absolute deadline on the
+perf_counter clock, the same clock as the driver's sent/reply stamps.
+A slow round trip therefore delays one setpoint instead of every later
+one. The time.sleep() loops in the test scripts drifted that way. The
+runner records how late each setpoint went out (jitter) and skips a
+setpoint if the next one is already due. Skipped setpoints are counted
+as missed deadlines.
+
+Setpoint values use the units of the matching ReactionWheel method:
+RPM for SPEED, N·m for TORQUE, N·m·s for MOMENTUM; IDLE ignores it.
+"""
+import logging
+import math
+import threading
+import time
+from typing import NamedTuple
+
+from .driver import WheelMode, WheelError
+from .instrumentation import LatencyHistogram
+
+log = logging.getLogger(__name__)
+
+
+class Setpoint(NamedTuple):
+    t: float            # seconds from the start of the profile
+    mode: WheelMode
+    value: float
+    label: str
+
+
+def _concat(segments, offset: float = 0.0, label: str | None = None):
+    """
+    Setpoints of consecutive segments. A segment's final setpoint is
+    dropped when the next segment starts at the same instant, since the
+    next one's first setpoint supersedes it.
+    """
+    out = []
+    for seg in segments:
+        points = seg.setpoints(offset)
+        if out and points and math.isclose(out[-1].t, points[0].t, abs_tol=1e-9):
+            out.pop()
+        if label is not None:
+            points = [p._replace(label=label) if not p.label else p for p in points]
+        out.extend(points)
+        offset += seg.duration
+    return out
+
+
+# --- Segments ---
+
+class Hold:
+    """One setpoint, held for `duration` seconds."""
+
+    def __init__(self, mode: WheelMode, value: float = 0.0, duration: float = 0.0, label: str = ''):
+        self.mode = WheelMode(mode)
+        self.value = value
+        self.duration = duration
+        self.label = label
+
+    def setpoints(self, offset: float = 0.0) -> list:
+        return [Setpoint(offset, self.mode, self.value, self.label)]
+
+
+class TorqueStep(Hold):
+    """A TORQUE-mode hold."""
+
+    def __init__(self, torque_nm: float, duration: float, label: str = ''):
+        super().__init__(WheelMode.TORQUE, torque_nm, duration, label)
+
+
+class Ramp:
+    """A linear ramp from `start` to `end` over `duration` seconds, updated at rate_hz."""
+
+    def __init__(self, mode: WheelMode, start: float, end: float, duration: float,
+                 rate_hz: float = 10.0, label: str = ''):
+        if duration < 0 or rate_hz <= 0:
+            raise ValueError("duration must be >= 0 and rate_hz positive")
+        self.mode = WheelMode(mode)
+        self.start = start
+        self.end = end
+        self.duration = duration
+        self.rate_hz = rate_hz
+        self.label = label
+
+    def setpoints(self, offset: float = 0.0) -> list:
+        if self.duration <= 0:
+            # A step: a start and an end setpoint at the same instant would
+            # leave the first one always late
+            return [Setpoint(offset, self.mode, self.end, self.label)]
+        n = max(1, round(self.duration * self.rate_hz))
+        return [
+            Setpoint(offset + self.duration * k / n, self.mode,
+                     self.start + (self.end - self.start) * k / n, self.label)
+            for k in range(n + 1)
+        ]
+
+
+class Trapezoid:
+    """
+    Ramp from `start` to `peak` in ramp_time, hold for hold_time, then ramp
+    to `end` (default: back to `start`) in ramp_down_time (default: ramp_time).
+    """
+
+    def __init__(self, mode: WheelMode, start: float, peak: float, ramp_time: float,
+                 hold_time: float = 0.0, end: float | None = None,
+                 ramp_down_time: float | None = None, rate_hz: float = 10.0, label: str = ''):
+        end = start if end is None else end
+        down = ramp_time if ramp_down_time is None else ramp_down_time
+        self.label = label
+        self.segments = [Ramp(mode, start, peak, ramp_time, rate_hz)]
+        if hold_time > 0:
+            self.segments.append(Hold(mode, peak, hold_time))
+        self.segments.append(Ramp(mode, peak, end, down, rate_hz))
+        self.duration = sum(s.duration for s in self.segments)
+
+    def setpoints(self, offset: float = 0.0) -> list:
+        return _concat(self.segments, offset, self.label)
+
+
+class Sweep:
+    """
+    Steps through `values`, holding each for `dwell` seconds. With settle > 0
+    each step is preceded by settle seconds in settle_mode (IDLE by default).
+    """
+
+    def __init__(self, mode: WheelMode, values, dwell: float, settle: float = 0.0,
+                 settle_mode: WheelMode = WheelMode.IDLE, settle_value: float = 0.0, label: str = ''):
+        self.mode = WheelMode(mode)
+        self.values = [float(v) for v in values]
+        self.dwell = dwell
+        self.settle = settle
+        self.settle_mode = WheelMode(settle_mode)
+        self.settle_value = settle_value
+        self.label = label or f"{self.mode.name.lower()} sweep"
+        self.duration = len(self.values) * (settle + dwell)
+
+    def setpoints(self, offset: float = 0.0) -> list:
+        out = []
+        for i, value in enumerate(self.values):
+            t = offset + i * (self.settle + self.dwell)
+            label = f"{self.label} {i + 1}/{len(self.values)}"
+            if self.settle > 0:
+                out.append(Setpoint(t, self.settle_mode, self.settle_value, f"{label} settle"))
+            out.append(Setpoint(t + self.settle, self.mode, value, label))
+        return out
+
+
+class Profile:
+    """A sequence of segments run back to back."""
+
+    def __init__(self, *segments):
+        self.segments = list(segments)
+        self.duration = sum(s.duration for s in self.segments)
+
+    def setpoints(self, offset: float = 0.0) -> list:
+        return _concat(self.segments, offset)
+
+
+# --- Running ---
+
+class TickRecord(NamedTuple):
+    setpoint: Setpoint
+    deadline_ns: int      # perf_counter_ns() at which the setpoint was due
+    issued_ns: int        # when the command was written (0 if skipped)
+    done_ns: int          # when the wheel acknowledged it (0 if skipped or failed)
+    missed: bool          # skipped because the next setpoint was already due
+    error: str | None
+
+    @property
+    def jitter_ns(self) -> int:
+        return self.issued_ns - self.deadline_ns if self.issued_ns else 0
+
+
+class ProfileReport:
+    def __init__(self, start_ns: int):
+        self.start_ns = start_ns
+        self.ticks = []
+        self.jitter = LatencyHistogram()
+        self.missed_deadlines = 0
+        self.errors = 0
+        self.aborted = False
+
+    def add(self, tick: TickRecord):
+        self.ticks.append(tick)
+        if tick.missed:
+            self.missed_deadlines += 1
+        elif tick.error is not None:
+            self.errors += 1
+        if tick.issued_ns:
+            self.jitter.add(max(tick.jitter_ns, 0))
+
+    def summary(self) -> dict:
+        """Tick counts, missed deadlines, errors and the jitter histogram summary (µs)."""
+        return {
+            'setpoints': len(self.ticks),
+            'issued': sum(1 for t in self.ticks if t.issued_ns),
+            'missed_deadlines': self.missed_deadlines,
+            'errors': self.errors,
+            'aborted': self.aborted,
+            'jitter': self.jitter.summary(),
+        }
+
+
+class ProfileRunner:
+    # Sleep until this close to a deadline, then spin, for sub-millisecond release
+    SPIN_NS = 500_000
+
+    def __init__(self, wheel, profile, on_setpoint=None, idle_on_error: bool = True):
+        """
+        wheel:          an open ReactionWheel or BusWheel
+        profile:        a Profile or any segment
+        on_setpoint:    optional callback(TickRecord) after each setpoint
+        idle_on_error:  command IDLE if the run is aborted or interrupted
+        """
+        self.wheel = wheel
+        self.profile = profile
+        self.on_setpoint = on_setpoint
+        self.idle_on_error = idle_on_error
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Aborts a run in progress (from another thread)."""
+        self._stop.set()
+
+    def _issue(self, sp: Setpoint):
+        if sp.mode == WheelMode.IDLE:
+            self.wheel.set_idle()
+        elif sp.mode == WheelMode.SPEED:
+            self.wheel.set_speed_rpm(sp.value)
+        elif sp.mode == WheelMode.TORQUE:
+            self.wheel.set_torque(sp.value)
+        elif sp.mode == WheelMode.MOMENTUM:
+            self.wheel.set_momentum(sp.value)
+        else:
+            raise ValueError(f"Unsupported mode {sp.mode!r}")
+
+    def _sleep_until(self, deadline_ns: int) -> bool:
+        """Waits for deadline_ns. Returns False if stop() was called."""
+        while True:
+            remaining = deadline_ns - time.perf_counter_ns()
+            if remaining <= 0:
+                return True
+            if remaining > self.SPIN_NS:
+                if self._stop.wait((remaining - self.SPIN_NS) / 1e9):
+                    return False
+            elif self._stop.is_set():
+                return False
+
+    def run(self) -> ProfileReport:
+        """Runs the profile to completion and returns the timing report."""
+        points = self.profile.setpoints()
+        self._stop.clear()
+        start_ns = time.perf_counter_ns()
+        report = ProfileReport(start_ns)
+        log.info(f"Running profile: {len(points)} setpoints over {self.profile.duration:.1f} s")
+
+        try:
+            for i, sp in enumerate(points):
+                deadline = start_ns + round(sp.t * 1e9)
+                if not self._sleep_until(deadline):
+                    report.aborted = True
+                    break
+
+                # Skip a stale setpoint if the next one is already due
+                if i + 1 < len(points) and time.perf_counter_ns() >= start_ns + round(points[i + 1].t * 1e9):
+                    tick = TickRecord(sp, deadline, 0, 0, True, None)
+                else:
+                    issued = time.perf_counter_ns()
+                    try:
+                        self._issue(sp)
+                    except WheelError as e:
+                        log.warning(f"Setpoint {sp} failed: {e}")
+                        tick = TickRecord(sp, deadline, issued, 0, False, str(e))
+                    else:
+                        tick = TickRecord(sp, deadline, issued, time.perf_counter_ns(), False, None)
+                report.add(tick)
+                if self.on_setpoint is not None:
+                    self.on_setpoint(tick)
+
+            # Hold the last setpoint until the profile's end
+            if not report.aborted and not self._sleep_until(start_ns + round(self.profile.duration * 1e9)):
+                report.aborted = True
+        except BaseException:
+            report.aborted = True
+            raise
+        finally:
+            if report.aborted and self.idle_on_error:
+                try:
+                    self.wheel.set_idle()
+                except Exception as e:
+                    log.warning(f"Could not command wheel to IDLE after aborted profile: {e}")
+            s = report.summary()
+            log.info(f"Profile finished: {s['issued']}/{s['setpoints']} setpoints issued, "
+                     f"{s['missed_deadlines']} missed, {s['errors']} errors, "
+                     f"p99 jitter {s['jitter'].get('p99_us', 0.0):.0f} µs")
+        return report
@@ -0,0 +1,286 @@
+# rw_wheel/recorder.py
+"""
+Columnar, memory-mapped telemetry recorder.
+
+A TelemetryRecorder appends fixed-width rows to a binary file as a test
+runs, instead of keeping them in Python lists until the end:
+
+    with TelemetryRecorder("run.rwrec", CHANNELS) as rec:
+        with TelemetryPoller(wheel, CHANNELS) as poller:
+            ...
+            rec.append(poller.drain(), phase='spin-up')
+    df = load_recording("run.rwrec").to_dataframe()
+
+File layout:
+
+    header   HEADER_SIZE bytes: magic, version, row count, row size and a
+             JSON block with the row dtype, the phase names and any
+             user metadata
+    rows     a packed NumPy structured array: t, sent_ns, reply_ns,
+             phase (an index into the phase names), then one column per
+             channel, typed as in the telemetry schema
+
+The row area is preallocated and mapped into memory. It doubles in size
+when it fills up. The row count in the header is rewritten on every
+flush(), so after a crash the file still opens with every row up to the
+last flush. load_recording() maps the rows back without parsing anything.
+"""
+import json
+import logging
+import os
+import struct
+import time
+
+import numpy as np
+
+from .driver import EDACFile, TELEMETRY_SCHEMA, telemetry_file
+
+log = logging.getLogger(__name__)
+
+MAGIC = b'RWREC\x00\x00\x01'
+VERSION = 1
+HEADER_SIZE = 4096
+
+# magic, version, row size, row count; the JSON block follows
+_HEADER = struct.Struct('<8sHHQI')
+_ROW_COUNT_OFFSET = 12
+
+BASE_FIELDS = [('t', '<f8'), ('sent_ns', '<i8'), ('reply_ns', '<i8'), ('phase', '<u2')]
+
+
+class RecorderError(Exception):
+    """Raised for malformed or incompatible recording files."""
+    pass
+
+
+def _channel_column(channel) -> tuple:
+    """(name, dtype) of the column for a schema channel or a plain column name."""
+    if not isinstance(channel, str):
+        schema = TELEMETRY_SCHEMA[telemetry_file(channel)]
+        return schema.name, schema.dtype
+    return channel, '<f4'
+
+
+def _read_header(f):
+    raw = f.read(HEADER_SIZE)
+    if len(raw) < _HEADER.size or raw[:8] != MAGIC:
+        raise RecorderError(f"'{f.name}' is not a telemetry recording")
+    magic, version, row_size, count, info_len = _HEADER.unpack_from(raw)
+    if version != VERSION:
+        raise RecorderError(f"Unsupported recording version {version}")
+    info = json.loads(raw[_HEADER.size:_HEADER.size + info_len])
+    dtype = np.dtype([tuple(field) for field in info['dtype']])
+    if dtype.itemsize != row_size:
+        raise RecorderError("Row size in header does not match the dtype")
+    return dtype, count, info
+
+
+class Recording:
+    """
+    A recording opened for analysis. `rows` is a read-only structured
+    array backed directly by the file.
+    """
+
+    def __init__(self, rows: np.ndarray, phases: list, metadata: dict):
+        self.rows = rows
+        self.phases = phases
+        self.metadata = metadata
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def channels(self) -> list:
+        return [name for name in self.rows.dtype.names if name not in dict(BASE_FIELDS)]
+
+    def phase(self, name: str) -> np.ndarray:
+        """Rows recorded under the given phase name."""
+        if name not in self.phases:
+            return self.rows[:0]
+        return self.rows[self.rows['phase'] == self.phases.index(name)]
+
+    def to_dataframe(self):
+        """Returns the rows as a pandas DataFrame with 'phase' as a categorical."""
+        import pandas as pd
+
+        df = pd.DataFrame({name: self.rows[name] for name in self.rows.dtype.names})
+        df['phase'] = pd.Categorical.from_codes(df['phase'].astype('int32'), categories=self.phases)
+        return df
+
+    def to_csv(self, path, **kwargs):
+        self.to_dataframe().to_csv(path, index=False, **kwargs)
+
+    def to_parquet(self, path, **kwargs):
+        """Writes a Parquet file. Needs pyarrow or fastparquet installed."""
+        self.to_dataframe().to_parquet(path, index=False, **kwargs)
+
+
+def load_recording(path) -> Recording:
+    """Opens a recording written by TelemetryRecorder as a read-only view."""
+    with open(path, 'rb') as f:
+        dtype, count, info = _read_header(f)
+    if count:
+        rows = np.memmap(path, dtype=dtype, mode='r', offset=HEADER_SIZE, shape=(count,))
+    else:
+        rows = np.zeros(0, dtype=dtype)
+    return Recording(rows, info['phases'], info.get('metadata', {}))
+
+
+class TelemetryRecorder:
+    def __init__(self, path, channels=(EDACFile.SPEED,), capacity: int = 4096,
+                 flush_interval: float = 1.0, metadata: dict | None = None):
+        """
+        path:            file to create (overwritten if it exists)
+        channels:        schema channels (EDACFile or address) or plain column names
+        capacity:        rows preallocated up front; the file doubles when full
+        flush_interval:  seconds between automatic flushes in append()
+        metadata:        JSON-serializable dict stored in the header
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.path = path
+        columns = [_channel_column(c) for c in channels]
+        self.channel_names = [name for name, _ in columns]
+        self.dtype = np.dtype(BASE_FIELDS + columns)
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.metadata = dict(metadata or {})
+        self.phases = []
+        self._count = 0
+        self._flushed_count = 0
+        self._last_flush = 0.0
+        self._file = None
+        self._rows = None
+
+    # --- Lifecycle ---
+
+    def open(self):
+        """Creates the file, writes the header and maps the row area."""
+        self._file = open(self.path, 'w+b')
+        self._file.truncate(HEADER_SIZE + self.capacity * self.dtype.itemsize)
+        self._write_header()
+        self._map()
+        self._last_flush = time.monotonic()
+        log.info(f"Recording {self.channel_names} to '{self.path}'")
+
+    def close(self):
+        """Flushes, trims the unused preallocation and closes the file."""
+        if self._file is None:
+            return
+        self.flush()
+        self._rows = None
+        self._file.truncate(HEADER_SIZE + self._count * self.dtype.itemsize)
+        self._file.close()
+        self._file = None
+        log.info(f"Recording '{self.path}' closed with {self._count} rows.")
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    # --- Writing ---
+
+    def phase_code(self, phase: str) -> int:
+        """Returns the code for a phase name, registering it on first use."""
+        try:
+            return self.phases.index(phase)
+        except ValueError:
+            self.phases.append(phase)
+            self._write_header()
+            return len(self.phases) - 1
+
+    def append(self, rows: np.ndarray, phase: str = ''):
+        """
+        Appends structured rows, e.g. from TelemetryPoller.drain(). Fields
+        are matched by name; any the rows lack are left zero.
+        """
+        n = len(rows)
+        if n == 0:
+            return
+        self._reserve(n)
+        dest = self._rows[self._count:self._count + n]
+        dest[...] = 0
+        for name in self.dtype.names:
+            if name != 'phase' and name in rows.dtype.names:
+                dest[name] = rows[name]
+        dest['phase'] = self.phase_code(phase)
+        self._count += n
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def append_row(self, t: float, values, phase: str = '', sent_ns: int = 0, reply_ns: int = 0):
+        """Appends a single row; values are in channel order."""
+        self._reserve(1)
+        self._rows[self._count] = (t, sent_ns, reply_ns, self.phase_code(phase), *values)
+        self._count += 1
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Writes mapped rows to disk, then publishes the new row count."""
+        if self._rows is None:
+            return
+        self._rows.flush()
+        if self._count != self._flushed_count:
+            self._file.seek(_ROW_COUNT_OFFSET)
+            self._file.write(struct.pack('<Q', self._count))
+            self._file.flush()
+            self._flushed_count = self._count
+        self._last_flush = time.monotonic()
+
+    # --- Reading back ---
+
+    @property
+    def rows(self) -> np.ndarray:
+        """View of the rows recorded so far."""
+        return self._rows[:self._count]
+
+    def view(self) -> Recording:
+        """The rows recorded so far, with the same export helpers as load_recording()."""
+        return Recording(self.rows, list(self.phases), dict(self.metadata))
+
+    def to_dataframe(self):
+        return self.view().to_dataframe()
+
+    def to_csv(self, path, **kwargs):
+        self.view().to_csv(path, **kwargs)
+
+    def to_parquet(self, path, **kwargs):
+        self.view().to_parquet(path, **kwargs)
+
+    # --- Internals ---
+
+    def _write_header(self):
+        info = json.dumps({
+            'dtype': self.dtype.descr,
+            'phases': self.phases,
+            'metadata': self.metadata,
+        }).encode('utf-8')
+        if _HEADER.size + len(info) > HEADER_SIZE:
+            raise RecorderError("Recording header is full (too many phases or too much metadata)")
+        header = _HEADER.pack(MAGIC, VERSION, self.dtype.itemsize, self._flushed_count, len(info)) + info
+        self._file.seek(0)
+        self._file.write(header.ljust(HEADER_SIZE, b'\x00'))
+        self._file.flush()
+
+    def _map(self):
+        self._rows = np.memmap(self._file, dtype=self.dtype, mode='r+',
+                               offset=HEADER_SIZE, shape=(self.capacity,))
+
+    def _reserve(self, n: int):
+        if self._rows is None:
+            raise RecorderError("Recorder is not open")
+        if self._count + n <= self.capacity:
+            return
+        self._rows.flush()
+        while self._count + n > self.capacity:
+            self.capacity *= 2
+        self._file.truncate(HEADER_SIZE + self.capacity * self.dtype.itemsize)
+        self._map()
+        log.debug(f"Recording '{self.path}' grown to {self.capacity} rows")
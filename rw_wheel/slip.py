@@ -0,0 +1,140 @@
+# rw_wheel/slip.py
+"""
+SLIP framing codec for the NSP link (ICD §4.1).
+
+Encoding and decoding work on whole buffers with bytes.replace() passes
+instead of a per-byte Python loop. Packets that contain no special
+characters (the common case for short telemetry frames) take a fast path
+that is a single concatenation.
+
+The output is byte-for-byte identical to the original per-byte
+implementation. The decoder is stricter: a frame containing an escape
+that is not followed by TFEND/TFESC, a dangling escape at the end, or an
+unescaped FEND in the body is rejected instead of being silently skipped.
+"""
+
+# SLIP Framing Characters (ICD §4.1, Table 2)
+FEND = 0xC0  # Frame End
+FESC = 0xDB  # Frame Escape
+TFEND = 0xDC # Transposed Frame End
+TFESC = 0xDD # Transposed Frame Escape
+
+_FEND_B = bytes([FEND])
+_FESC_B = bytes([FESC])
+_ESC_FEND = bytes([FESC, TFEND])
+_ESC_FESC = bytes([FESC, TFESC])
+
+
+def slip_encode(data: bytes) -> bytes:
+    """
+    Wraps a packet in FEND delimiters, escaping FEND/FESC in the body.
+    """
+    if FEND not in data and FESC not in data:
+        return _FEND_B + bytes(data) + _FEND_B
+    # FESC must be escaped first so the escapes we insert for FEND
+    # are not escaped a second time.
+    body = bytes(data).replace(_FESC_B, _ESC_FESC).replace(_FEND_B, _ESC_FEND)
+    return _FEND_B + body + _FEND_B
+
+
+def slip_decode_body(data: bytes) -> bytes | None:
+    """
+    Un-escapes a SLIP body (the bytes between two FENDs).
+    Returns None if the body is malformed.
+    """
+    if FESC not in data:
+        if FEND in data:
+            return None
+        return bytes(data)
+
+    data = bytes(data)
+    if FEND in data:
+        return None
+    # Every FESC must start a valid two-byte escape. TFEND/TFESC are never
+    # FESC, so these matches cannot overlap and each FESC is counted at most
+    # once; the counts only balance when no escape is malformed.
+    if data.count(_FESC_B) != data.count(_ESC_FEND) + data.count(_ESC_FESC):
+        return None
+    return data.replace(_ESC_FEND, _FEND_B).replace(_ESC_FESC, _FESC_B)
+
+
+def slip_decode(frame: bytes) -> bytes | None:
+    """
+    Decodes a complete FEND-delimited frame.
+    Returns None if the frame is not delimited or is malformed.
+    """
+    if not frame or frame[0] != FEND or frame[-1] != FEND:
+        return None
+    return slip_decode_body(frame[1:-1])
+
+
+class SlipDeframer:
+    """
+    Incremental SLIP deframer for a byte stream.
+
+    Feed it whatever chunk a serial read returned; it returns the decoded
+    packets completed by that chunk and keeps any partial frame buffered
+    for the next call. Garbage is skipped by searching for the next FEND
+    rather than by inspecting bytes one at a time. Back-to-back FENDs and
+    frames sharing a single FEND delimiter are both accepted.
+    """
+
+    def __init__(self, max_frame_len: int = 16384):
+        self.max_frame_len = max_frame_len
+        self._buf = bytearray()
+        self.frames = 0           # well-formed frames returned
+        self.malformed = 0        # delimited frames that failed to decode
+        self.discarded_bytes = 0  # bytes dropped while resynchronizing
+
+    def __len__(self) -> int:
+        """Number of bytes currently buffered (partial frame)."""
+        return len(self._buf)
+
+    @property
+    def idle(self) -> bool:
+        """True if no partial frame is buffered (at most the FEND that closed the last one)."""
+        return len(self._buf) <= 1
+
+    def reset(self):
+        """Drops any buffered partial frame."""
+        self.discarded_bytes += len(self._buf)
+        self._buf.clear()
+
+    def feed(self, data: bytes) -> list[bytes]:
+        """
+        Adds a chunk of received bytes.
+        Returns the list of decoded packets completed by this chunk.
+        """
+        buf = self._buf
+        buf += data
+        packets = []
+
+        start = buf.find(FEND)
+        if start < 0:
+            # No delimiter at all: nothing here can belong to a frame we can see
+            self.discarded_bytes += len(buf)
+            buf.clear()
+            return packets
+        # Bytes before the first FEND are the tail of a frame we never saw start
+        self.discarded_bytes += start
+
+        while True:
+            end = buf.find(FEND, start + 1)
+            if end < 0:
+                break
+            if end > start + 1:
+                packet = slip_decode_body(buf[start + 1:end])
+                if packet is None:
+                    self.malformed += 1
+                else:
+                    self.frames += 1
+                    packets.append(packet)
+            # The closing FEND may also open the next frame
+            start = end
+
+        # Keep from the last FEND onwards; everything before it is consumed
+        del buf[:start]
+        if len(buf) > self.max_frame_len:
+            self.discarded_bytes += len(buf)
+            buf.clear()
+        return packets
@@ -0,0 +1,101 @@
+# rw_wheel/telemetry.py
+"""
+Vectorized bulk decoding of recorded READ_FILE replies.
+
+The driver decodes one reply at a time with the precompiled decoders in
+driver.TELEMETRY_SCHEMA. For replies that were recorded raw, e.g. a
+capture of a long run, decode_replies() does the same work on NumPy
+arrays: replies of equal length are stacked into one uint8 matrix, the
+CRC-16 is computed for all rows at once (one table lookup per byte
+column), and the value bytes are reinterpreted in place as the
+channel's type.
+
+    values, rejected = decode_replies(packets)
+    speed = values[EDACFile.SPEED]['value']
+
+packets are SLIP-decoded reply packets ([DST][SRC][CTRL][FILE][value][CRC]).
+deframe_stream() turns a raw byte stream from the link into packets.
+"""
+import numpy as np
+
+from .driver import NSPCommand, TELEMETRY_SCHEMA, _NUMPY_TYPES
+from .slip import SlipDeframer
+
+_HEADER_LEN = 4     # [DST][SRC][CTRL][FILE]
+_CRC_LEN = 2
+
+
+def _crc_table() -> np.ndarray:
+    """Lookup table for the NSP CRC-16 (reflected 0x1021, i.e. 0x8408)."""
+    table = np.arange(256, dtype=np.uint16)
+    for _ in range(8):
+        table = np.where(table & 1, (table >> 1) ^ 0x8408, table >> 1).astype(np.uint16)
+    return table
+
+_CRC_TABLE = _crc_table()
+
+
+def crc16_rows(rows: np.ndarray, init: int = 0xFFFF) -> np.ndarray:
+    """NSP CRC-16 of every row of a 2-D uint8 array, one value per row."""
+    crc = np.full(len(rows), init, dtype=np.uint16)
+    for col in rows.T:
+        crc = (crc >> 8) ^ _CRC_TABLE[(crc ^ col) & 0xFF]
+    return crc
+
+
+def deframe_stream(data: bytes) -> list:
+    """Splits a raw SLIP byte stream into decoded packets."""
+    return SlipDeframer().feed(data)
+
+
+def decode_replies(packets, verify_crc: bool = True):
+    """
+    Decodes a sequence of READ_FILE reply packets.
+
+    Returns (values, rejected). values maps each schema file to a
+    structured array with 'index' (position in packets) and 'value' (in
+    the channel's dtype, scaled). rejected holds the indices of packets
+    that failed the CRC, were NACKs or other commands, or are for files
+    not in the schema.
+    """
+    packets = list(packets)
+    lengths = np.fromiter((len(p) for p in packets), dtype=np.int64, count=len(packets))
+    parts = {}
+    rejected = [np.flatnonzero(lengths < _HEADER_LEN + _CRC_LEN)]
+
+    for length in np.unique(lengths[lengths >= _HEADER_LEN + _CRC_LEN]):
+        index = np.flatnonzero(lengths == length)
+        rows = np.frombuffer(b''.join([packets[i] for i in index]), dtype=np.uint8).reshape(-1, length)
+
+        ok = (rows[:, 2] & 0x1F == NSPCommand.READ_FILE) & (rows[:, 2] & 0x20 != 0)
+        if verify_crc:
+            received = rows[:, -2].astype(np.uint16) | (rows[:, -1].astype(np.uint16) << 8)
+            ok &= crc16_rows(rows[:, :-_CRC_LEN]) == received
+
+        files = rows[:, 3]
+        handled = np.zeros(len(rows), dtype=bool)
+        for file, channel in TELEMETRY_SCHEMA.items():
+            raw = np.dtype(_NUMPY_TYPES[channel.fmt])
+            if raw.itemsize != length - _HEADER_LEN - _CRC_LEN:
+                continue
+            mask = ok & (files == int(file))
+            if not mask.any():
+                continue
+            handled |= mask
+            value_bytes = np.ascontiguousarray(rows[mask, _HEADER_LEN:-_CRC_LEN])
+            value = value_bytes.view(raw).ravel()
+            if channel.scale != 1.0:
+                value = value * channel.scale
+            parts.setdefault(file, []).append((index[mask], value.astype(channel.dtype, copy=False)))
+        rejected.append(index[~handled])
+
+    values = {}
+    for file, chunks in parts.items():
+        idx = np.concatenate([c[0] for c in chunks])
+        val = np.concatenate([c[1] for c in chunks])
+        order = np.argsort(idx, kind='stable')
+        out = np.empty(len(idx), dtype=[('index', '<i8'), ('value', TELEMETRY_SCHEMA[file].dtype)])
+        out['index'] = idx[order]
+        out['value'] = val[order]
+        values[file] = out
+    return values, np.sort(np.concatenate(rejected))
@@ -0,0 +1,142 @@
+# rw_wheel/timeouts.py
+"""
+Adaptive reply timeouts and retry policies for the wheel drivers.
+
+Each command's round-trip time is tracked with the TCP retransmission
+timer estimator (RFC 6298): a smoothed RTT and its mean deviation,
+updated after every clean reply,
+
+    rttvar  = 3/4 rttvar + 1/4 |srtt - rtt|
+    srtt    = 7/8 srtt + 1/8 rtt
+    timeout = srtt + 4 rttvar    (clamped to [min_timeout_s, max_timeout_s])
+
+A lost reply at 20 Hz then costs a few milliseconds instead of the old
+fixed 1 s. Until a command has been sampled its timeout is
+initial_timeout_s. Each consecutive timeout doubles it (backoff, as in
+TCP), and the next clean reply resets that. Replies to retried requests
+are not sampled (Karn's algorithm), since it is unknown which attempt
+they answer.
+
+Retries follow a RetryPolicy per command class:
+
+    read    PING, PEEK, CRC, READ_FILE: no side effects, retried by default
+    write   WRITE_FILE, POKE, DIAGNOSTIC: not retried unless configured,
+            e.g. wheel.retry_policies['write'] = RetryPolicy(retries=2)
+    init    INIT: not retried, with a 3 s timeout floor for the switch
+            from bootloader to application
+"""
+import math
+from typing import NamedTuple
+
+
+class RetryPolicy(NamedTuple):
+    retries: int = 0               # attempts after the first
+    backoff_s: float = 0.0         # pause before the first retry
+    backoff_factor: float = 2.0    # growth of the pause per retry
+    max_backoff_s: float = 0.5
+    min_timeout_s: float = 0.0     # per-class floor on the reply timeout
+
+    def delay(self, attempt: int) -> float:
+        """Pause before retry number `attempt` (1-based)."""
+        return min(self.backoff_s * self.backoff_factor ** (attempt - 1), self.max_backoff_s)
+
+
+# NSPCommand name -> class; anything not listed is treated as a write
+COMMAND_CLASSES = {
+    'PING': 'read',
+    'PEEK': 'read',
+    'CRC': 'read',
+    'READ_FILE': 'read',
+    'WRITE_FILE': 'write',
+    'POKE': 'write',
+    'DIAGNOSTIC': 'write',
+    'INIT': 'init',
+}
+
+
+def default_retry_policies() -> dict:
+    return {
+        'read': RetryPolicy(retries=2, backoff_s=0.005),
+        'write': RetryPolicy(retries=0),
+        'init': RetryPolicy(retries=0, min_timeout_s=3.0),
+    }
+
+
+class RttEstimator:
+    """Smoothed round-trip time and deviation for one command (RFC 6298)."""
+
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+    K = 4
+
+    def __init__(self):
+        self.srtt = None
+        self.rttvar = None
+        self.samples = 0
+        self.backoff = 1        # doubled on each consecutive timeout
+
+    def update(self, rtt_s: float):
+        if self.srtt is None:
+            self.srtt = rtt_s
+            self.rttvar = rtt_s / 2
+        else:
+            self.rttvar = (1 - self.BETA) * self.rttvar + self.BETA * abs(self.srtt - rtt_s)
+            self.srtt = (1 - self.ALPHA) * self.srtt + self.ALPHA * rtt_s
+        self.samples += 1
+        self.backoff = 1
+
+
+class AdaptiveTimeouts:
+    def __init__(self, initial_timeout_s: float = 1.0, min_timeout_s: float = 0.02,
+                 max_timeout_s: float = 2.0, max_backoff: int = 8):
+        """
+        initial_timeout_s:  timeout for a command with no RTT samples yet
+        min_timeout_s:      floor, for OS scheduling and serial latency jitter
+        max_timeout_s:      ceiling, including backoff
+        max_backoff:        cap on the timeout multiplier after repeated timeouts
+        """
+        self.initial_timeout_s = initial_timeout_s
+        self.min_timeout_s = min_timeout_s
+        self.max_timeout_s = max_timeout_s
+        self.max_backoff = max_backoff
+        self._estimators = {}
+
+    def _get(self, key: str) -> RttEstimator:
+        est = self._estimators.get(key)
+        if est is None:
+            est = self._estimators[key] = RttEstimator()
+        return est
+
+    def timeout(self, key: str, floor_s: float = 0.0) -> float:
+        """Reply timeout in seconds for the command named `key`."""
+        est = self._get(key)
+        if est.srtt is None:
+            base = self.initial_timeout_s
+        else:
+            base = max(est.srtt + RttEstimator.K * est.rttvar, self.min_timeout_s)
+        return max(min(base * est.backoff, self.max_timeout_s), floor_s)
+
+    def observe(self, key: str, rtt_s: float):
+        """Folds in the round-trip time of a clean, first-attempt reply."""
+        self._get(key).update(rtt_s)
+
+    def timed_out(self, key: str):
+        """Backs off the timeout for `key` after a lost reply."""
+        est = self._get(key)
+        est.backoff = min(est.backoff * 2, self.max_backoff)
+
+    def reset(self):
+        self._estimators.clear()
+
+    def stats(self) -> dict:
+        """Per command: srtt_ms, rttvar_ms, timeout_ms, samples and backoff."""
+        return {
+            key: {
+                'srtt_ms': est.srtt * 1e3 if est.srtt is not None else math.nan,
+                'rttvar_ms': est.rttvar * 1e3 if est.rttvar is not None else math.nan,
+                'timeout_ms': self.timeout(key) * 1e3,
+                'samples': est.samples,
+                'backoff': est.backoff,
+            }
+            for key, est in self._estimators.items()
+        }
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# rwctl.py
+"""
+Command-line control of the RW4-12 reaction wheel.
+
+    python rwctl.py ping
+    python rwctl.py init
+    python rwctl.py telemetry [--json]
+    python rwctl.py spin --rpm 30 --duration 5 --yes
+    python rwctl.py ramp --percent 50 --yes
+    python rwctl.py linearity --yes --no-show
+    python rwctl.py saturation --yes --no-show
+
+The wheel is reached on config.SERIAL_PORT by default. Every command
+takes --port and the address options to override that, --session to go
+through the wheel session daemon (python -m rw_wheel.daemon) and
+--emulate to run against the software emulator, and --capture FILE to
+record the raw link traffic for replay (see rw_wheel/capture.py), e.g.
+
+    python rwctl.py telemetry --port /dev/ttyUSB0 --json
+
+Commands that move the wheel ask for confirmation first. --yes answers
+for them; without --yes and without a terminal to ask on, they refuse
+rather than block. Exit status is 0 on success, 1 if the command failed
+and 2 if it was refused or aborted.
+
+Startup only imports the standard library. Each command imports what it
+uses when it runs, so `rwctl ping` does not load NumPy, pandas or plotly
+(see benchmarks/bench_startup.py).
+"""
+import argparse
+import contextlib
+import json
+import sys
+import time
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_ABORTED = 2
+
+
+class Aborted(Exception):
+    """The user declined, or could not be asked, to go ahead."""
+    pass
+
+
+# --- Helpers ---
+
+def _ask(prompt: str, option: str) -> str:
+    """Asks on the terminal; refuses if there is none to ask on."""
+    if not sys.stdin.isatty():
+        raise Aborted(f"No terminal to ask on; pass {option} to run non-interactively.")
+    return input(prompt)
+
+
+def _confirm(args, warning: str):
+    """Prints the warning and asks to proceed, unless --yes was given."""
+    print(warning)
+    if args.yes:
+        return
+    if _ask("Are you sure you want to proceed? (yes/no): ", "--yes").strip().lower() != 'yes':
+        raise Aborted("Test aborted by user.")
+
+
+@contextlib.contextmanager
+def _connect(args, moves: bool = False):
+    """
+    Yields an unopened wheel (or session client) for the connection options.
+    Commands that move the wheel pass moves=True, so a session client
+    leaves it in IDLE; other session clients leave its mode alone.
+    """
+    if args.session:
+        if args.capture:
+            raise ValueError("--capture needs a direct connection; the session daemon owns the port.")
+        from rw_wheel.client import WheelClient
+        yield WheelClient(args.socket, idle_on_exit=moves)
+        return
+
+    from rw_wheel.driver import ReactionWheel
+    with contextlib.ExitStack() as stack:
+        port = args.port
+        if args.emulate:
+            from rw_wheel.emulator import WheelEmulator
+            port = stack.enter_context(WheelEmulator(wheel_addrs=(args.wheel_addr,))).port
+        wheel = ReactionWheel(port, args.baud, args.wheel_addr, args.host_addr)
+        if args.capture:
+            wheel.start_capture(args.capture, metadata={'command': args.command})
+            stack.callback(wheel.stop_capture)
+        yield wheel
+
+
+# --- Commands ---
+
+def cmd_ping(args) -> int:
+    with _connect(args) as wheel, wheel:
+        identity = wheel.ping()
+    print(f"Wheel reported identity: '{identity}'")
+    return EXIT_OK
+
+
+def cmd_init(args) -> int:
+    with _connect(args) as wheel, wheel:
+        wheel.initialize_application()
+        identity = wheel.ping()
+    print(f"Wheel initialized. Identity: '{identity}'")
+    return EXIT_OK
+
+
+def cmd_telemetry(args) -> int:
+    from rw_wheel.driver import TELEMETRY_SCHEMA, telemetry_file
+
+    files = [telemetry_file(name) for name in args.channels]
+    with _connect(args) as wheel, wheel:
+        snapshot = wheel.read_many(files)
+
+    if args.json:
+        values = {TELEMETRY_SCHEMA[f].name: snapshot[f] for f in files}
+        print(json.dumps({'values': values, 'timestamp': snapshot.timestamp, 'skew_s': snapshot.skew_s}))
+        return EXIT_OK
+    print(f"Telemetry (reply skew across {len(files)} channels: {snapshot.skew_s * 1000:.1f} ms)")
+    for f in files:
+        channel = TELEMETRY_SCHEMA[f]
+        print(f"  {channel.name:20s} {snapshot[f]:12.4f} {channel.units}")
+    return EXIT_OK
+
+
+def cmd_spin(args) -> int:
+    _confirm(args, "!!! WARNING: This test will command the motor to move. !!!\n"
+                   f"The wheel will spin at {args.rpm:.0f} RPM for {args.duration:g} seconds, then stop.")
+    with _connect(args, moves=True) as wheel, wheel:
+        wheel.set_speed_rpm(args.rpm)
+        print(f"Wheel spinning. Waiting for {args.duration:g} seconds...")
+        time.sleep(args.duration)
+        print("Commanding wheel to stop (IDLE).")
+        wheel.set_idle()
+        time.sleep(2)   # Give it time to receive the command before closing
+    print("SUCCESS! The safe spin test completed.")
+    return EXIT_OK
+
+
+def cmd_ramp(args) -> int:
+    from rw_wheel.driver import WheelMode
+    from rw_wheel.profiles import Profile, Sweep, Hold, ProfileRunner
+
+    percent = args.percent
+    if percent is None:
+        percent = int(_ask("Enter the percentage of max speed for the motor to ramp to: ", "--percent"))
+    if not 0 <= percent <= 100:
+        raise ValueError("Percentage must be between 0 and 100.")
+    _confirm(args, "!!! WARNING: This test will command the motor to move. !!!\n"
+                   f"The motor will ramp up to {percent}% of {args.max_rpm:.0f} RPM "
+                   f"in {args.step}% steps of {args.dwell:g} s, and back down to a stop.")
+
+    # Setpoints go out on absolute deadlines
+    up = [(i / 100.0) * args.max_rpm for i in range(0, percent + 1, args.step)]
+    down = [(i / 100.0) * args.max_rpm for i in range(percent, 0, -args.step)]
+    profile = Profile(
+        Sweep(WheelMode.SPEED, up, dwell=args.dwell, label="ramp up"),
+        Sweep(WheelMode.SPEED, down, dwell=args.dwell, label="ramp down"),
+        Hold(WheelMode.IDLE, duration=2.0, label="idle"),
+    )
+
+    def show(tick):
+        sp = tick.setpoint
+        if sp.mode == WheelMode.SPEED:
+            print(f"[{sp.label}] {sp.value:.2f} RPM (issued {tick.jitter_ns / 1e6:.1f} ms late)")
+
+    with _connect(args, moves=True) as wheel, wheel:
+        report = ProfileRunner(wheel, profile, on_setpoint=show).run()
+    summary = report.summary()
+    print(f"Motor has stopped. {summary['issued']}/{summary['setpoints']} setpoints issued, "
+          f"{summary['missed_deadlines']} missed deadlines, "
+          f"p99 jitter {summary['jitter'].get('p99_us', 0.0) / 1000:.1f} ms.")
+    return EXIT_OK
+
+
+def cmd_linearity(args) -> int:
+    import numpy as np
+    from analysis import test_torque_linearity as test
+
+    torque_commands = np.linspace(args.min_torque, args.max_torque, args.steps)
+    _confirm(args, f"Torque linearity & deadband test: {len(torque_commands)} torque commands from "
+                   f"{args.min_torque:+.3f} to {args.max_torque:+.3f} N·m, {args.step_duration:g} s each.\n"
+                   "This is an automated test. Ensure wheel is secure.")
+    with _connect(args, moves=True) as wheel:
+        ok = test.run(wheel, torque_commands, args.step_duration, show=not args.no_show)
+    return EXIT_OK if ok else EXIT_FAILED
+
+
+def cmd_saturation(args) -> int:
+    from analysis import test_saturation_and_power as test
+
+    _confirm(args, "!!! WARNING: HIGH-SPEED MOTION TEST. Ensure wheel is secure. !!!\n"
+                   f"The wheel will spin to {args.target_rpm:.0f} RPM at {args.max_torque:g} N·m, "
+                   f"hold for {args.hold:g} s, then brake.")
+    with _connect(args, moves=True) as wheel:
+        ok = test.run(wheel, args.target_rpm, args.hold, args.max_torque, show=not args.no_show)
+    return EXIT_OK if ok else EXIT_FAILED
+
+
+# --- Entry point ---
+
+def build_parser() -> argparse.ArgumentParser:
+    from rw_wheel import config
+
+    parser = argparse.ArgumentParser(prog="rwctl", description="Control and test the RW4-12 reaction wheel.")
+
+    # Every command takes the connection options (after the command name)
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--no-log", action="store_true", help="do not set up the log file and console logging")
+    common.add_argument("-v", "--verbose", action="store_true",
+                        help="also write DEBUG records (TX/RX hex dumps) to the log file")
+    conn = common.add_argument_group("connection")
+    conn.add_argument("--port", default=config.SERIAL_PORT, help="serial port of the wheel")
+    conn.add_argument("--baud", type=int, default=config.BAUD_RATE)
+    conn.add_argument("--wheel-addr", type=lambda s: int(s, 0), default=config.WHEEL_ADDRESS)
+    conn.add_argument("--host-addr", type=lambda s: int(s, 0), default=config.HOST_ADDRESS)
+    conn.add_argument("--session", action="store_true", help="go through the wheel session daemon")
+    conn.add_argument("--socket", default=config.DAEMON_SOCKET, help="session daemon socket (with --session)")
+    conn.add_argument("--emulate", action="store_true", help="run against the software emulator")
+    conn.add_argument("--capture", metavar="FILE",
+                      help="record the raw link traffic to FILE (replay with python -m rw_wheel.capture)")
+
+    # Shared by the commands that move the wheel
+    motion = argparse.ArgumentParser(add_help=False)
+    motion.add_argument("-y", "--yes", action="store_true", help="do not ask for confirmation")
+    plots = argparse.ArgumentParser(add_help=False)
+    plots.add_argument("--no-show", action="store_true", help="save the plot without opening it")
+
+    sub = parser.add_subparsers(dest="command", required=True, metavar="COMMAND")
+    p = sub.add_parser("ping", parents=[common], help="check communication with the wheel")
+    p.set_defaults(func=cmd_ping)
+
+    p = sub.add_parser("init", parents=[common], help="start the application firmware (INIT), then ping")
+    p.set_defaults(func=cmd_init)
+
+    p = sub.add_parser("telemetry", parents=[common], help="read a telemetry snapshot")
+    p.add_argument("channels", nargs="*",
+                   default=['vbus', 'vcc', 'speed', 'momentum', 'temp0', 'temp1', 'temp2', 'temp3'],
+                   help="channel names from the telemetry schema (default: the core set)")
+    p.add_argument("--json", action="store_true", help="print the snapshot as JSON")
+    p.set_defaults(func=cmd_telemetry)
+
+    p = sub.add_parser("spin", parents=[common, motion], help="spin at a low speed, then stop")
+    p.add_argument("--rpm", type=float, default=30.0)
+    p.add_argument("--duration", type=float, default=5.0, help="seconds to spin")
+    p.set_defaults(func=cmd_spin)
+
+    p = sub.add_parser("ramp", parents=[common, motion], help="ramp the speed up and back down")
+    p.add_argument("--percent", type=int, help="percentage of --max-rpm to ramp to (asked if omitted)")
+    p.add_argument("--max-rpm", type=float, default=1000.0)
+    p.add_argument("--step", type=int, default=5, help="percent per step")
+    p.add_argument("--dwell", type=float, default=2.0, help="seconds per step")
+    p.set_defaults(func=cmd_ramp)
+
+    p = sub.add_parser("linearity", parents=[common, motion, plots], help="torque linearity & deadband test")
+    p.add_argument("--min-torque", type=float, default=-0.2, help="N·m")
+    p.add_argument("--max-torque", type=float, default=0.2, help="N·m")
+    p.add_argument("--steps", type=int, default=21)
+    p.add_argument("--step-duration", type=float, default=3.0, help="seconds per torque command")
+    p.set_defaults(func=cmd_linearity)
+
+    p = sub.add_parser("saturation", parents=[common, motion, plots], help="saturation & power profile test")
+    p.add_argument("--target-rpm", type=float, default=5252.0 * 0.95)
+    p.add_argument("--hold", type=float, default=5.0, help="seconds to hold the target speed")
+    p.add_argument("--max-torque", type=float, default=0.2, help="N·m")
+    p.set_defaults(func=cmd_saturation)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if not args.no_log:
+        from logging_config import setup_logging
+        setup_logging(debug=args.verbose)
+    try:
+        return args.func(args)
+    except Aborted as e:
+        print(e)
+        return EXIT_ABORTED
+    except KeyboardInterrupt:
+        print("\nInterrupted.")
+        return EXIT_ABORTED
+    except Exception as e:
+        print(f"ERROR: {e}")
+        return EXIT_FAILED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+# tests/test_alloc.py
+"""
+Regression check for the allocation-free receive path (no hardware needed).
+
+Polls read(EDACFile.SPEED) against the emulator in a child process, with
+tracemalloc running (see benchmarks/bench_alloc.py), and fails if:
+
+  - replies stop taking the zero-copy path (they go through the deframer);
+  - the per-read allocation peak grows past the deframer path's or past
+    PEAK_LIMIT_BYTES;
+  - blocks retained by polling grow with the number of reads.
+
+Run with `python -m pytest tests/test_alloc.py` or `python tests/test_alloc.py`.
+"""
+import sys
+import os
+import statistics
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'benchmarks'))
+
+from bench_alloc import start_emulator, per_read_peaks, retained_blocks
+from rw_wheel import ReactionWheel, EDACFile
+
+READS = 1000
+PEAK_LIMIT_BYTES = 2048     # about 900 bytes when this was written
+RETAINED_GROWTH_LIMIT = 16  # blocks, between READS and 4 * READS reads
+
+
+def test_polling_path_does_not_allocate():
+    proc, port = start_emulator()
+    wheel = ReactionWheel(port, 115200, 0x20, 0x11)
+    try:
+        wheel.open()
+        for _ in range(200):    # warm up caches, RTT estimator and buffers
+            wheel.read(EDACFile.SPEED)
+
+        tracemalloc.start()
+        try:
+            frames = wheel._deframer.frames
+            zero_copy_peak = statistics.median(per_read_peaks(wheel, READS))
+            assert wheel._deframer.frames == frames, "replies went through the deframer"
+            growth = retained_blocks(wheel, 4 * READS) - retained_blocks(wheel, READS)
+
+            wheel._zero_copy_rx = False
+            deframer_peak = statistics.median(per_read_peaks(wheel, READS))
+        finally:
+            tracemalloc.stop()
+    finally:
+        wheel.close()
+        proc.terminate()
+        proc.wait()
+
+    assert zero_copy_peak <= PEAK_LIMIT_BYTES, f"{zero_copy_peak} bytes allocated per read"
+    assert zero_copy_peak <= deframer_peak, f"zero-copy {zero_copy_peak} vs deframer {deframer_peak} bytes per read"
+    assert growth <= RETAINED_GROWTH_LIMIT, f"{growth} more blocks retained after {4 * READS} reads than after {READS}"
+
+
+if __name__ == "__main__":
+    test_polling_path_does_not_allocate()
+    print("OK")
@@ -0,0 +1,44 @@
+# tests/test_emulator.py
+"""
+Checks that the emulator refuses malformed requests with a NACK and keeps
+serving afterwards (no hardware needed).
+
+Run with `python -m pytest tests/test_emulator.py` or `python tests/test_emulator.py`.
+"""
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rw_wheel import ReactionWheel, NSPCommand, WheelNackError
+from rw_wheel.emulator import WheelEmulator
+
+MALFORMED = [
+    (NSPCommand.WRITE_FILE, b''),       # no file byte
+    (NSPCommand.READ_FILE, b''),
+    (NSPCommand.PEEK, b'\x00\x00'),     # address cut short
+    (NSPCommand.POKE, b''),
+]
+
+
+def test_malformed_requests_are_nacked():
+    with WheelEmulator() as emu:
+        wheel = ReactionWheel(emu.port, 115200, 0x20, 0x11)
+        try:
+            wheel.open()
+            for command, payload in MALFORMED:
+                try:
+                    wheel._send_and_receive(command, payload)
+                except WheelNackError:
+                    pass
+                else:
+                    raise AssertionError(f"{command.name} with payload {payload.hex() or 'none'} was ACKed")
+                assert wheel.ping() == "RW4-12 EMULATOR", f"no reply to PING after a malformed {command.name}"
+        finally:
+            wheel.close()
+        assert emu.nacks == len(MALFORMED)
+
+
+if __name__ == "__main__":
+    test_malformed_requests_are_nacked()
+    print("OK")
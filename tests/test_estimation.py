@@ -0,0 +1,51 @@
+# tests/test_estimation.py
+"""
+Checks TorqueResponseEstimator on synthetic steps (no hardware needed).
+
+Run with `python -m pytest tests/test_estimation.py` or `python tests/test_estimation.py`.
+"""
+import sys
+import os
+import math
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rw_wheel import TorqueResponseEstimator
+
+INERTIA = 0.025     # kg·m², as the emulator
+
+
+def test_single_torque_magnitude_falls_back_to_origin_fit():
+    # A ±0.2 N·m square wave: every moving step has the same |torque|, so
+    # the |accel|-vs-|torque| line is undefined
+    estimator = TorqueResponseEstimator()
+    for i, noise in enumerate((0.1, -0.2, 0.05, 0.15, -0.1, 0.0)):
+        torque = 0.2 if i % 2 == 0 else -0.2
+        assert estimator.add_step(torque, torque / INERTIA + noise, 0.01)
+    estimator.add_step(0.0, 0.0)
+
+    e = estimator.estimate()
+    assert (e.moving_steps, e.stalled_steps) == (6, 1)
+    assert math.isclose(e.gain, 1 / INERTIA, rel_tol=0.01), e
+    assert math.isclose(e.inertia, INERTIA, rel_tol=0.01), e
+    assert math.isfinite(e.gain_stderr) and e.gain_stderr < 1.0, e
+    assert e.deadband == 0.0
+
+
+def test_deadband_and_gain_from_a_sweep():
+    estimator = TorqueResponseEstimator()
+    deadband = 0.01
+    for torque in (0.005, 0.02, 0.05, 0.1, -0.1, 0.2):
+        accel = math.copysign(max(abs(torque) - deadband, 0.0) / INERTIA, torque)
+        estimator.add_step(torque, accel, 0.001)
+
+    e = estimator.estimate()
+    assert (e.moving_steps, e.stalled_steps) == (5, 1)
+    assert math.isclose(e.gain, 1 / INERTIA, rel_tol=1e-6), e
+    assert math.isclose(e.deadband, deadband, abs_tol=1e-6), e
+
+
+if __name__ == "__main__":
+    test_single_torque_magnitude_falls_back_to_origin_fit()
+    test_deadband_and_gain_from_a_sweep()
+    print("OK")